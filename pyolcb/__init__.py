@@ -1,7 +1,7 @@
-from .node import SimpleNode, Node
+from .node import SimpleNode, Node, AsyncNode
 from .message import Message
 from . import message_types, utilities
-from .interface import Interface
+from .interface import Interface, AsyncInterface
 from .address import Address
 from .datagram import Datagram
-from .event import Event
+from .event import Event, EventReport
@@ -2,14 +2,56 @@ from . import utilities
 
 
 class Address:
-    full = None
-    alias = None
+    """
+    A node address, made up of the full 48-bit node ID and/or the 12-bit CAN alias. Both are stored
+    as :class:`int` internally; the ``full`` and ``alias`` attributes give their byte representations.
+    """
+    __slots__ = ('_full', '_alias', '_shared')
+    _alias_cache = {}
 
     def __init__(self, address: utilities.byte_options = None, alias: utilities.byte_options = None) -> None:
-        if not address is None:
-            self.full = utilities.process_bytes(6, address)
-        if not alias is None:
-            self.alias = utilities.process_bytes(1.5, alias)
+        self._full = None if address is None else utilities.process_int(6, address)
+        self._alias = None if alias is None else utilities.process_int(1.5, alias)
+        self._shared = False
+
+    @classmethod
+    def from_alias(cls, alias: int):
+        """
+        Get the shared, alias-only :class:`Address` for a given alias. Used when decoding received frames
+        so that each alias is only ever represented by one object. The returned object must not be modified.
+        """
+        address = cls._alias_cache.get(alias)
+        if address is None:
+            address = cls(alias=alias)
+            address._shared = True
+            cls._alias_cache[alias] = address
+        return address
+
+    @property
+    def full(self) -> bytes:
+        if self._full is None:
+            return None
+        return self._full.to_bytes(6, 'big')
+
+    @full.setter
+    def full(self, address: utilities.byte_options):
+        self._check_mutable()
+        self._full = None if address is None else utilities.process_int(6, address)
+
+    @property
+    def alias(self) -> bytes:
+        if self._alias is None:
+            return None
+        return self._alias.to_bytes(2, 'big')
+
+    @alias.setter
+    def alias(self, alias: utilities.byte_options):
+        self._check_mutable()
+        self._alias = None if alias is None else utilities.process_int(1.5, alias)
+
+    def _check_mutable(self):
+        if self._shared:
+            raise Exception("Shared addresses cannot be modified")
 
     def __str__(self):
         return ".".join(format(x, '02x') for x in self.full)
@@ -17,28 +59,33 @@ class Address:
     def __iter__(self):
         return iter(self.full)
 
+    def __bytes__(self) -> bytes:
+        return self.full
+
     def __int__(self) -> int:
-        return int.from_bytes(self.full, 'big')
+        return self._full
 
     def __eq__(self, x: object) -> bool:
-        if self.alias == x.alias and self.full == x.full:
+        if not isinstance(x, Address):
+            return NotImplemented
+        if self._alias == x._alias and self._full == x._full:
             return True
-        elif (self.alias is None or x.alias is None) and self.full == x.full:
+        elif (self._alias is None or x._alias is None) and self._full == x._full:
             return True
-        elif (self.full is None or x.full is None) and self.alias == x.alias:
+        elif (self._full is None or x._full is None) and self._alias == x._alias:
             return True
         else:
             return False
 
     def has_alias(self) -> bool:
-        if self.alias is None:
+        if self._alias is None:
             return False
         else:
             return True
 
     def get_alias(self) -> int:
-        if self.has_alias():
-            return int.from_bytes(self.alias, 'big')
+        if self._alias is not None:
+            return self._alias
         else:
             raise Exception("No alias has been set for this address")
 
@@ -49,11 +96,11 @@ class Address:
             raise Exception("No alias has been set for this address")
 
     def set_alias(self, alias: utilities.byte_options) -> bytes:
-        self.alias = utilities.process_bytes(1.5, alias)
+        self.alias = alias
         return self.alias
     
     def get_full_address(self) -> int:
-        return int.from_bytes(self.full, 'big')
+        return self._full
 
 
     def get_full_address_bytes(self) -> bytes:
@@ -61,6 +108,5 @@ class Address:
 
 
     def set_full_address(self, address: utilities.byte_options) -> bytes:
-        self.full = utilities.process_bytes(3, address)
+        self.full = address
         return self.full
-
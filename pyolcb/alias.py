@@ -0,0 +1,230 @@
+"""
+==============
+alias
+==============
+
+Reservation of 12-bit CAN aliases for hosted nodes: the Check ID (CID) / Reserve ID (RID) / Alias Map Definition
+(AMD) sequence, detection of and recovery from alias collisions, and replies to Alias Map Enquiry (AME).
+
+Every reservation waits 200 ms after its Check ID frames, so reservations run concurrently: they share the
+:mod:`pyolcb.scheduler` thread, and each :class:`AliasAllocator` keeps the aliases in use on its segment in a set,
+so picking a free alias is a constant-time lookup.
+"""
+import itertools
+import threading
+from concurrent.futures import Future
+import can
+from .scheduler import scheduler
+
+RESERVATION_DELAY = 0.2
+# Candidate aliases tried for each reservation attempt before giving up (there are only 4095 aliases)
+MAX_CANDIDATES = 4096
+
+# Control frame variable fields (bits 23-12 of frames with frame type 0)
+RID = 0x0700
+AMD = 0x0701
+AME = 0x0702
+AMR = 0x0703
+
+_lock = threading.RLock()
+
+
+def alias_sequence(node_id: int):
+    """
+    Generate the sequence of candidate aliases for a node ID, using the pseudo-random generator from the OpenLCB
+    CAN Frame Transfer standard. Zero is never generated.
+    """
+    lfsr1 = (node_id >> 24) & 0xFFFFFF
+    lfsr2 = node_id & 0xFFFFFF
+    while True:
+        alias = (lfsr1 ^ lfsr2 ^ (lfsr1 >> 12) ^ (lfsr2 >> 12)) & 0xFFF
+        if alias:
+            yield alias
+        temp1 = ((lfsr1 << 9) | ((lfsr2 >> 15) & 0x1FF)) & 0xFFFFFF
+        temp2 = (lfsr2 << 9) & 0xFFFFFF
+        lfsr1 = lfsr1 + temp1 + 0x1B0CA3
+        lfsr2 = lfsr2 + temp2 + 0x7A4BA9
+        lfsr1 = (lfsr1 & 0xFFFFFF) + ((lfsr2 & 0xFF000000) >> 24)
+        lfsr2 &= 0xFFFFFF
+
+
+def control_frame(alias: int, field: int, data: bytes = b'') -> can.Message:
+    """
+    Build a CAN control frame (CID, RID, AMD, AME or AMR) from an alias.
+    """
+    return can.Message(arbitration_id=0x10000000 | field << 12 | alias, data=data, is_extended_id=True)
+
+
+def check_id_frames(alias: int, node_id: int) -> list[can.Message]:
+    """
+    The four Check ID frames (CID 7 to CID 4) for an alias, each carrying 12 bits of the node ID.
+    """
+    return [can.Message(arbitration_id=(0x10 | sequence) << 24 | ((node_id >> (12 * (sequence - 4))) & 0xFFF) << 12
+                        | alias, is_extended_id=True) for sequence in range(7, 3, -1)]
+
+
+class AliasReservation:
+    """
+    Reserves an alias for a node ID on one or more interfaces, retrying with the next candidate alias after a
+    collision.
+
+    Parameters
+    ----------
+    node_id : int
+        The 48-bit node ID.
+    interfaces : list[Interface]
+        The interfaces to reserve the alias on.
+    callback : callable = None
+        Called with the alias once it is reserved (after the RID frame is sent).
+
+    Attributes
+    ----------
+    future : concurrent.futures.Future
+        Resolves to the alias once it is reserved, or fails if every candidate alias is in use.
+    collisions : int
+        Number of candidate aliases abandoned because another node was using them.
+    """
+    delay = RESERVATION_DELAY
+
+    def __init__(self, node_id: int, interfaces: list, callback: callable = None) -> None:
+        self.node_id = node_id
+        self.interfaces = interfaces
+        self.callback = callback
+        self.future = Future()
+        self.alias = None
+        self.collisions = 0
+        self._candidates = alias_sequence(node_id)
+        self._generation = 0
+
+    def start(self):
+        """
+        Pick a free candidate alias, send its Check ID frames and schedule the reservation.
+        """
+        with _lock:
+            self._generation += 1
+            alias = next((x for x in itertools.islice(self._candidates, MAX_CANDIDATES)
+                          if not any(i.aliases.in_use(x) for i in self.interfaces)), None)
+            self.alias = alias
+            if alias is None:
+                if not self.future.done():
+                    self.future.set_exception(Exception("No free alias to reserve"))
+                return
+            generation = self._generation
+            for interface in self.interfaces:
+                interface.aliases.reserving[alias] = self
+        frames = check_id_frames(alias, self.node_id)
+        for interface in self.interfaces:
+            interface.aliases.start()
+            interface.send_frames(frames)
+        scheduler.schedule(self.delay, self._reserve, generation)
+
+    def collision(self):
+        """
+        Abandon the current candidate alias (which another node is using) and try the next one.
+        """
+        with _lock:
+            self._release()
+            self.collisions += 1
+        self.start()
+
+    def _release(self):
+        for interface in self.interfaces:
+            if interface.aliases.reserving.get(self.alias) is self:
+                del interface.aliases.reserving[self.alias]
+
+    def _reserve(self, generation: int):
+        with _lock:
+            if generation != self._generation or self.future.done():
+                return
+            alias = self.alias
+            frames = [control_frame(alias, RID)]
+            for interface in self.interfaces:
+                interface.send_frames(frames)
+            # Still holding the lock, so no other reservation can pick the alias before the node is indexed by it
+            self._release()
+            if self.callback is not None:
+                self.callback(alias)
+        self.future.set_result(alias)
+
+
+class AliasAllocator:
+    """
+    Tracks the aliases in use on the segment an :class:`Interface` is connected to, detects collisions with the
+    aliases of its hosted nodes and answers Alias Map Enquiries for them.
+
+    Parameters
+    ----------
+    interface : Interface
+        The interface.
+
+    Attributes
+    ----------
+    observed : set[int]
+        Aliases seen in use by other nodes.
+    reserving : dict[int, AliasReservation]
+        Candidate aliases currently being checked.
+    """
+    def __init__(self, interface) -> None:
+        self.interface = interface
+        self.observed = set()
+        self.reserving = {}
+
+    def start(self):
+        self.interface._start()
+
+    def in_use(self, alias: int) -> bool:
+        """
+        Whether an alias is used by another node, by a hosted node or by a reservation in progress.
+        """
+        return alias in self.observed or alias in self.reserving or self.interface.get_node(alias) is not None
+
+    def reserve(self, node_id: int, callback: callable = None) -> AliasReservation:
+        """
+        Start reserving an alias for a node ID on this interface.
+        """
+        reservation = AliasReservation(node_id, [self.interface], callback)
+        reservation.start()
+        return reservation
+
+    def process_frame(self, frame: can.Message) -> bool:
+        """
+        Track the alias used by a received frame. Returns ``True`` if the frame was a control frame.
+        """
+        header = frame.arbitration_id
+        if not frame.is_rx:
+            # Our own frame, echoed back by a bus receiving its own messages
+            return not header & 0x08000000
+        alias = header & 0xFFF
+        reservation = self.reserving.get(alias)
+        if reservation is not None:
+            # Any frame from another node using the candidate alias, even its own Check ID, means trying another
+            reservation.collision()
+        if header & 0x08000000:
+            self.observed.add(alias)
+            node = self.interface.get_node(alias)
+            if node is not None:
+                node._alias_collision()
+            return False
+        if header & 0x04000000:
+            # Check ID: another node wants this alias; defend it if it is ours
+            node = self.interface.get_node(alias)
+            if node is not None:
+                self.interface.send_frames([control_frame(alias, RID)])
+            return True
+        match (header >> 12) & 0xFFF:
+            case 0x700 | 0x701:
+                self.observed.add(alias)
+                node = self.interface.get_node(alias)
+                if node is not None:
+                    node._alias_collision()
+            case 0x702:
+                self._process_enquiry(bytes(frame.data))
+            case 0x703:
+                self.observed.discard(alias)
+        return True
+
+    def _process_enquiry(self, node_id: bytes):
+        nodes = [node for node in self.interface.hosted_nodes()
+                 if not node_id or node.address.full == node_id]
+        if nodes:
+            self.interface.send_frames([control_frame(node.get_alias(), AMD, node.address.full) for node in nodes])
@@ -0,0 +1,306 @@
+"""
+==============
+benchmark
+==============
+
+Throughput benchmarks of the codec, dispatch and protocol paths, for sizing hardware and for spotting regressions
+between releases. Run them from the command line:
+
+.. code-block:: bash
+
+    python -m pyolcb.benchmark --json results.json
+    python -m pyolcb.benchmark --compare results.json
+
+Each benchmark is run ``repeat`` times and the fastest run is reported, as operations per second and microseconds
+per operation. Results are a JSON-serializable :class:`dict` recording the pyOLCB and Python versions and the
+platform with the figures, so that files from different releases and machines can be compared with
+:func:`compare`.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import platform
+import sys
+import time
+import can
+from . import message_types, utilities
+from .address import Address
+from .datagram import Datagram, DatagramReassembler
+from .event import Event
+from .interface import Interface
+from .message import Message
+from .node import Node
+from .simulation import SimulatedNetwork
+
+SCHEMA = 1
+
+SOURCE = Address('05.01.01.01.8C.01', 0xC01)
+DESTINATION = Address('05.01.01.01.8C.00', 0xC00)
+EVENT_ID = bytes([0x05, 0x01, 0x01, 0x01, 0x8C, 0x00, 0x00, 0x01])
+
+
+def _frame(header: int, data: bytes) -> can.Message:
+    return can.Message(arbitration_id=header, data=data, is_extended_id=True)
+
+
+@contextlib.contextmanager
+def _node(alias: int = 0xC00):
+    # A node with a fixed alias on an otherwise empty simulated bus, so that replies cost a send but go nowhere. The
+    # interface's receive thread is stopped and the bus shut down on exit, even if the node could not be created.
+    interface = Interface(SimulatedNetwork().bus())
+    try:
+        yield Node(Address(0x050101018000 + alias, alias), interface)
+    finally:
+        interface.stop()
+        interface.connection.shutdown()
+
+
+def bench_mti_get_can_header(n: int) -> float:
+    mtis = [message_types.Producer_Consumer_Event_Report, message_types.Verified_Node_ID_Number,
+            message_types.Protocol_Support_Inquiry, message_types.Identify_Consumer]
+    calls = (mtis * (n // len(mtis) + 1))[:n]
+    start = time.perf_counter()
+    for mti in calls:
+        mti.get_can_header(SOURCE, DESTINATION)
+    return time.perf_counter() - start
+
+
+def bench_mti_from_can_header(n: int) -> float:
+    headers = [0x195B4C01, 0x19170C01, 0x19828C01, 0x198F4C01, 0x1AC00C01, 0x1F000C01]
+    headers = (headers * (n // len(headers) + 1))[:n]
+    from_can_header = message_types.MessageTypeIndicator.from_can_header
+    start = time.perf_counter()
+    for header in headers:
+        from_can_header(header)
+    return time.perf_counter() - start
+
+
+def bench_message_decode(n: int) -> float:
+    frames = [
+        _frame(message_types.Producer_Consumer_Event_Report.get_can_header(SOURCE), EVENT_ID),
+        _frame(message_types.Verify_Node_ID_Number_Global.get_can_header(SOURCE), b''),
+        _frame(message_types.Protocol_Support_Inquiry.get_can_header(SOURCE), bytes([0x0C, 0x00])),
+        _frame(message_types.Datagram.get_can_header(SOURCE, DESTINATION, 1), bytes(8)),
+    ]
+    frames = (frames * (n // len(frames) + 1))[:n]
+    decode = Message.from_can_message
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    return time.perf_counter() - start
+
+
+def bench_dispatch_event(n: int) -> float:
+    with _node() as node:
+        node.add_consumer(Event(EVENT_ID), lambda *args: None)
+        message = Message.from_can_message(
+            _frame(message_types.Producer_Consumer_Event_Report.get_can_header(SOURCE), EVENT_ID))
+        process = node.process_message
+        start = time.perf_counter()
+        for _ in range(n):
+            process(message)
+        return time.perf_counter() - start
+
+
+def bench_dispatch_datagram(n: int) -> float:
+    with _node() as node:
+        node.set_datagram_handler(lambda *args: None)
+        message = Message.from_can_message(_frame(message_types.Datagram.get_can_header(SOURCE, DESTINATION),
+                                                  bytes([0x20, 0x43, 0, 0, 0, 0, 0x40, 0])))
+        process = node.process_message
+        start = time.perf_counter()
+        for _ in range(n):
+            process(message)
+        return time.perf_counter() - start
+
+
+def bench_datagram_fragment(n: int) -> float:
+    datagram = Datagram(bytes(range(72)), SOURCE, DESTINATION)
+    start = time.perf_counter()
+    for _ in range(n):
+        datagram.as_message_list()
+    return time.perf_counter() - start
+
+
+def bench_datagram_reassemble(n: int) -> float:
+    frames = Datagram(bytes(range(72)), SOURCE, DESTINATION).as_can_frames()
+    messages = [Message.from_can_message(x) for x in frames]
+    reassembler = DatagramReassembler()
+    add = reassembler.add
+    start = time.perf_counter()
+    for _ in range(n):
+        for message in messages:
+            add(message)
+    return time.perf_counter() - start
+
+
+def bench_process_bytes(n: int) -> float:
+    values = ['05.01.01.01.8C.00', [5, 1, 1, 1, 0x8C, 0], 0x050101018C00, bytes([5, 1, 1, 1, 0x8C, 0])]
+    values = (values * (n // len(values) + 1))[:n]
+    process_bytes = utilities.process_bytes
+    start = time.perf_counter()
+    for value in values:
+        process_bytes(6, value)
+    return time.perf_counter() - start
+
+
+def bench_end_to_end(n: int, nodes: int = 256) -> float:
+    """
+    Frames received per second by an :class:`Interface` hosting ``nodes`` nodes on a simulated bus, through its
+    receive loop: event reports each consumed by one node, and single-frame datagrams each acknowledged.
+    """
+    network = SimulatedNetwork()
+    interface = Interface(network.bus())
+    sender = network.bus()
+    try:
+        hosted = [Node(Address(0x050101018000 + i, 0x100 + i), interface) for i in range(nodes)]
+        for node in hosted:
+            node.add_consumer(Event(node.address.get_full_address() << 16), lambda *args: None)
+            node.set_datagram_handler(lambda *args: None)
+        if not network.wait_idle():
+            raise Exception("Simulated network did not settle")
+        network.pause()
+        for i in range(n):
+            node = hosted[i * 7 % nodes]
+            if i % 2:
+                sender.send(_frame(message_types.Datagram.get_can_header(SOURCE, node.address),
+                                   bytes([0x20, 0x43, 0, 0, 0, 0, 0x40, 0])))
+            else:
+                sender.send(_frame(message_types.Producer_Consumer_Event_Report.get_can_header(SOURCE),
+                                   (node.address.get_full_address() << 16).to_bytes(8, 'big')))
+        start = time.perf_counter()
+        network.resume()
+        if not network.wait_idle(timeout=max(60.0, n / 1000)):
+            raise Exception("Simulated network did not settle")
+        return time.perf_counter() - start
+    finally:
+        interface.stop()
+        interface.connection.shutdown()
+        sender.shutdown()
+
+
+# Name: (function, operations per run at scale 1, unit)
+BENCHMARKS = {
+    'mti_get_can_header': (bench_mti_get_can_header, 200000, 'calls'),
+    'mti_from_can_header': (bench_mti_from_can_header, 200000, 'calls'),
+    'message_decode': (bench_message_decode, 200000, 'frames'),
+    'dispatch_event': (bench_dispatch_event, 100000, 'messages'),
+    'dispatch_datagram': (bench_dispatch_datagram, 50000, 'messages'),
+    'datagram_fragment': (bench_datagram_fragment, 50000, 'datagrams'),
+    'datagram_reassemble': (bench_datagram_reassemble, 50000, 'datagrams'),
+    'process_bytes': (bench_process_bytes, 200000, 'calls'),
+    'end_to_end': (bench_end_to_end, 50000, 'frames'),
+}
+
+
+def _version() -> str | None:
+    try:
+        from importlib.metadata import version
+        return version('pyOLCB')
+    except Exception:
+        return None
+
+
+def run(names: list[str] = None, scale: float = 1.0, repeat: int = 3) -> dict:
+    """
+    Run benchmarks.
+
+    Parameters
+    ----------
+    names : list[str] = None
+        The benchmarks to run (keys of ``BENCHMARKS``), or all of them.
+    scale : float = 1.0
+        Multiplier for the number of operations in each run.
+    repeat : int = 3
+        Runs of each benchmark; the fastest is reported.
+
+    Returns
+    -------
+    dict
+        The environment and, under ``"benchmarks"``, the operations, seconds, operations per second and
+        microseconds per operation of each benchmark.
+    """
+    names = list(BENCHMARKS) if names is None else names
+    for name in names:
+        if name not in BENCHMARKS:
+            raise Exception("Unknown benchmark %s" % name)
+    results = {}
+    for name in names:
+        function, operations, unit = BENCHMARKS[name]
+        n = max(1, int(operations * scale))
+        seconds = min(function(n) for _ in range(repeat))
+        results[name] = {
+            "operations": n,
+            "unit": unit,
+            "seconds": seconds,
+            "per_second": n / seconds if seconds else None,
+            "us_per_operation": seconds / n * 1e6,
+        }
+    return {
+        "schema": SCHEMA,
+        "pyolcb": _version(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.1) -> dict:
+    """
+    Find the benchmarks more than ``tolerance`` (a fraction) slower in ``current`` than in ``baseline``.
+
+    Benchmarks missing from the baseline, or with no time recorded there, are skipped.
+
+    Returns
+    -------
+    dict
+        The ratio of current to baseline time per operation of each slower benchmark, by name.
+    """
+    regressions = {}
+    for name, result in current["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None or not previous.get("us_per_operation", 0) > 0:
+            continue
+        ratio = result["us_per_operation"] / previous["us_per_operation"]
+        if ratio > 1 + tolerance:
+            regressions[name] = ratio
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pyolcb.benchmark', description=__doc__.split('\n')[5])
+    parser.add_argument('names', nargs='*', metavar='name', help="benchmarks to run (default: all): %s"
+                        % ", ".join(BENCHMARKS))
+    parser.add_argument('--json', metavar='PATH', help="write the results as JSON to PATH ('-' for stdout)")
+    parser.add_argument('--compare', metavar='PATH', help="compare with earlier JSON results, failing on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="slowdown allowed by --compare (default 0.1)")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier for the operations per run")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each benchmark (default 3)")
+    args = parser.parse_args(argv)
+
+    results = run(args.names or None, args.scale, args.repeat)
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+        for name, result in results["benchmarks"].items():
+            print("%-22s %12.0f %-12s %9.3f us" % (name, result["per_second"] or 0, result["unit"] + "/s",
+                                                   result["us_per_operation"]))
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for name, ratio in regressions.items():
+            print("%s is %.0f%% slower" % (name, (ratio - 1) * 100), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
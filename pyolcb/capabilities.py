@@ -0,0 +1,189 @@
+"""
+==============
+capabilities
+==============
+
+Map of the protocols supported by every node on a network, built from Protocol Support Inquiries and kept up to
+date as nodes join, restart and change alias.
+"""
+import threading
+from concurrent.futures import Future
+from . import message_types
+from .address import Address
+from .message import Message
+from .protocols import Protocol
+from .request_pool import PendingRequest, RequestPool
+from .scheduler import scheduler
+
+
+class _Inquiry(PendingRequest):
+    __slots__ = ('node_id',)
+
+    def __init__(self, node_id: int, alias: int) -> None:
+        super().__init__(alias)
+        self.node_id = node_id
+
+
+class CapabilityMap:
+    """
+    The protocols supported by each node on the network, by 48-bit node ID.
+
+    Nodes are found from their Verified Node ID and Initialization Complete messages: a node not yet in the map is
+    sent a Protocol Support Inquiry, and a node sending Initialization Complete (after a restart, perhaps with new
+    firmware) is asked again. Up to ``max_concurrent`` inquiries are outstanding at once. The map is indexed by
+    protocol, so finding the nodes that support a protocol does not scan every node.
+
+    Parameters
+    ----------
+    node : Node
+        The local :class:`pyolcb.Node` to send inquiries from.
+    max_concurrent : int = 8
+        Maximum number of inquiries outstanding at once.
+    timeout : float = 3.0
+        Seconds to wait for each reply.
+    """
+    def __init__(self, node, max_concurrent: int = 8, timeout: float = 3.0) -> None:
+        self.node = node
+        self._lock = threading.Lock()
+        self._protocols = {}
+        self._aliases = {}
+        self._by_flag = {}
+        self._requests = RequestPool(self._transmit, max_concurrent, timeout, "No reply to Protocol Support Inquiry")
+        node.register_message_handler(message_types.Protocol_Support_Reply, self._process_reply)
+        for mti in (message_types.Initialization_Complete, message_types.Initialization_Complete_Simple):
+            node.chain_message_handler(mti, self._initialized)
+        for mti in (message_types.Verified_Node_ID_Number, message_types.Verified_Node_ID_Number_Simple):
+            node.chain_message_handler(mti, self._verified)
+
+    def __len__(self) -> int:
+        return len(self._protocols)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self._protocols
+
+    def get(self, node_id: int) -> Protocol | None:
+        """
+        Get the protocols supported by a node, or ``None`` if they are not known (yet).
+        """
+        return self._protocols.get(node_id)
+
+    def get_alias(self, node_id: int) -> int | None:
+        """
+        Get the alias a node uses: as tracked by the node directory of an interface (which follows Alias Map
+        Definitions), or else the alias it last replied from.
+        """
+        for interface in self.node.interfaces:
+            alias = interface.network.get_alias(node_id)
+            if alias is not None:
+                return alias
+        return self._aliases.get(node_id)
+
+    def nodes_supporting(self, protocol: Protocol) -> set[int]:
+        """
+        Get the node IDs of the nodes supporting every protocol in ``protocol``, e.g.
+        ``Protocol.MEMORY_CONFIGURATION | Protocol.CONFIGURATION_DESCRIPTION_INFORMATION``.
+        """
+        protocol = Protocol(protocol)
+        if not protocol:
+            return set(self._protocols)
+        sets = sorted((self._by_flag.get(flag, set()) for flag in protocol.flags()), key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def query(self, destination: Address) -> Future:
+        """
+        Send a Protocol Support Inquiry to one node (whose full address must be known), updating the map.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the node's :class:`Protocol` flags, or fails with :class:`TimeoutError`.
+        """
+        return self._inquire(destination.get_full_address(), destination.get_alias())
+
+    def refresh(self, discovery_time: float = 0.5) -> Future:
+        """
+        Send Verify Node ID Global so that every node replies, and wait ``discovery_time`` seconds and then for the
+        inquiries to the nodes found.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to this :class:`CapabilityMap`.
+        """
+        future = Future()
+        self.node.send(Message(message_types.Verify_Node_ID_Number_Global, b'', self.node.address))
+        scheduler.schedule(discovery_time, self._refreshed, future)
+        return future
+
+    def forget(self, node_id: int):
+        """
+        Remove a node from the map.
+        """
+        with self._lock:
+            self._store(node_id, None)
+            self._aliases.pop(node_id, None)
+
+    def _refreshed(self, future: Future):
+        pending = [x.future for x in self._requests.pending()]
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            future.set_result(self)
+
+        if not pending:
+            future.set_result(self)
+        for inquiry in pending:
+            inquiry.add_done_callback(done)
+
+    def _store(self, node_id: int, protocols: Protocol | None):
+        # Called holding the lock
+        previous = self._protocols.pop(node_id, None)
+        if previous is not None:
+            for flag in previous.flags():
+                self._by_flag[flag].discard(node_id)
+        if protocols is not None:
+            self._protocols[node_id] = protocols
+            for flag in protocols.flags():
+                self._by_flag.setdefault(flag, set()).add(node_id)
+
+    def _inquire(self, node_id: int, alias: int) -> Future:
+        with self._lock:
+            self._aliases[node_id] = alias
+        inquiry = self._requests.submit(alias, lambda: _Inquiry(node_id, alias))
+        # The reply will be from whichever node now uses the alias
+        inquiry.node_id = node_id
+        return inquiry.future
+
+    def _transmit(self, inquiry: _Inquiry):
+        self.node.protocol_support_inquiry(Address.from_alias(inquiry.key))
+
+    def _store_reply(self, inquiry: _Inquiry, protocols: Protocol):
+        with self._lock:
+            if self._aliases.get(inquiry.node_id) == inquiry.key:
+                self._store(inquiry.node_id, protocols)
+
+    def _process_reply(self, message: Message):
+        inquiry = self._requests.get(message.source.get_alias())
+        if inquiry is not None:
+            self._requests.complete(inquiry, Protocol.decode(message.data[2:]), store=self._store_reply)
+
+    def _initialized(self, message: Message):
+        self._learn(message, True)
+
+    def _verified(self, message: Message):
+        self._learn(message, False)
+
+    def _learn(self, message: Message, initialized: bool):
+        alias = message.source.get_alias()
+        if len(message.data) >= 6 and alias != self.node.get_alias():
+            node_id = int.from_bytes(message.data[:6], 'big')
+            with self._lock:
+                known = node_id in self._protocols
+                self._aliases[node_id] = alias
+            if initialized or not known:
+                self._inquire(node_id, alias)
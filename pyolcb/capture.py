@@ -0,0 +1,222 @@
+"""
+==============
+capture
+==============
+
+Recording of the frames seen by an :class:`Interface` to a compact binary file, and replay of recordings into an
+:class:`Interface` or a :class:`Node`, at their original timing or as fast as possible.
+
+A capture file is a 16 byte header (``OLCBCAP`` and a version byte, the record size and reserved bytes) followed by
+fixed-size 24 byte records, so that it can be memory-mapped and indexed without parsing:
+
+====== ====== ==================================================
+Offset Size   Field
+====== ====== ==================================================
+0      8      Timestamp (seconds, little-endian double)
+8      4      CAN header (little-endian)
+12     1      Data length
+13     1      Flags (1: extended header, 2: received)
+14     2      Reserved
+16     8      Data (padded with zeros)
+====== ====== ==================================================
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import can
+from .message import Message
+
+MAGIC = b'OLCBCAP\x01'
+HEADER = struct.Struct('<8sH6x')
+RECORD = struct.Struct('<dIBB2x8s')
+
+_EXTENDED = 0x01
+_RECEIVED = 0x02
+
+
+class CaptureWriter:
+    """
+    Appends frames to a capture file. Register :meth:`write` as a listener to record an :class:`Interface`, with
+    ``transmitted=True`` to record the frames its nodes send as well as those they receive:
+
+    .. code-block:: python
+
+        capture = CaptureWriter('incident.olcbcap')
+        interface.register_listener(capture.write, transmitted=True)
+
+    Parameters
+    ----------
+    path : str
+        The file to write. An existing capture is appended to.
+    buffer_size : int = 65536
+        Bytes of records buffered before they are written to the file.
+    """
+    def __init__(self, path: str, buffer_size: int = 65536) -> None:
+        self.path = path
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab', buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, RECORD.size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, frame: can.Message):
+        """
+        Append a frame.
+        """
+        flags = (_EXTENDED if frame.is_extended_id else 0) | (_RECEIVED if frame.is_rx else 0)
+        record = RECORD.pack(frame.timestamp or time.time(), frame.arbitration_id, frame.dlc, flags,
+                             bytes(frame.data))
+        with self._lock:
+            self._file.write(record)
+            self.frames += 1
+
+    def flush(self):
+        """
+        Write buffered records to the file.
+        """
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class Capture:
+    """
+    A capture file, memory-mapped for reading. Frames are decoded only when accessed.
+
+    Parameters
+    ----------
+    path : str
+        The file to read.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size:
+                raise Exception("Not a capture file")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, record_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or record_size != RECORD.size:
+            self._mmap.close()
+            raise Exception("Not a capture file")
+        # A partly written last record is ignored
+        self._count = (size - HEADER.size) // RECORD.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> can.Message:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Capture index out of range")
+        return self._decode(*RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size))
+
+    def __iter__(self):
+        return self.frames()
+
+    def frames(self, start: int = 0, stop: int = None):
+        """
+        Iterate over the frames from ``start`` to ``stop`` as :class:`can.Message` objects.
+        """
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return
+        view = memoryview(self._mmap)[HEADER.size + start * RECORD.size:HEADER.size + stop * RECORD.size]
+        try:
+            for record in RECORD.iter_unpack(view):
+                yield self._decode(*record)
+        finally:
+            view.release()
+
+    def timestamp(self, index: int) -> float:
+        """
+        Get the timestamp of a frame without decoding it.
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Capture index out of range")
+        return struct.unpack_from('<d', self._mmap, HEADER.size + index * RECORD.size)[0]
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds from the first frame to the last.
+        """
+        return self.timestamp(self._count - 1) - self.timestamp(0) if self._count else 0.0
+
+    def close(self):
+        self._mmap.close()
+
+    @staticmethod
+    def _decode(timestamp: float, header: int, length: int, flags: int, data: bytes) -> can.Message:
+        return can.Message(timestamp=timestamp, arbitration_id=header, is_extended_id=bool(flags & _EXTENDED),
+                           is_rx=bool(flags & _RECEIVED), dlc=length, data=data[:length], check=False)
+
+
+def replay(capture: Capture, target, realtime: bool = False, speed: float = 1.0, start: int = 0,
+           stop: int = None) -> int:
+    """
+    Feed the frames of a capture to a target, as if they had been received.
+
+    Parameters
+    ----------
+    capture : Capture
+        The capture to replay.
+    target : Interface | Node | callable
+        An :class:`Interface` (which routes the frames to its nodes), a :class:`Node` (which is given each decoded
+        :class:`Message`), or a function taking each :class:`can.Message`.
+    realtime : bool = False
+        Whether to keep the original time between frames. Otherwise frames are replayed as fast as possible.
+    speed : float = 1.0
+        With ``realtime``, how many times faster than the original to replay.
+    start : int = 0
+        Index of the first frame to replay.
+    stop : int = None
+        Index after the last frame to replay.
+
+    Returns
+    -------
+    int
+        The number of frames replayed.
+    """
+    if hasattr(target, 'receive_frame'):
+        deliver = target.receive_frame
+    elif hasattr(target, 'process_message'):
+        def deliver(frame):
+            message = Message.from_can_message(frame)
+            if message is not None:
+                target.process_message(message)
+    else:
+        deliver = target
+    count = 0
+    origin = None
+    for frame in capture.frames(start, stop):
+        if realtime:
+            if origin is None:
+                origin = (frame.timestamp, time.monotonic())
+            delay = origin[1] + (frame.timestamp - origin[0]) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        deliver(frame)
+        count += 1
+    return count
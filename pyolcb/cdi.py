@@ -0,0 +1,330 @@
+"""
+==============
+cdi
+==============
+
+Fetching, caching and indexing of Configuration Description Information (CDI): the XML document describing the
+layout of a node's configuration memory.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import Future
+from .address import Address
+from .exceptions import MemoryConfigError
+from .memory_config import MemoryConfigClient, MAX_READ_LENGTH, SPACE_CDI
+
+# Default sizes of variables without a size attribute
+_VARIABLE_SIZES = {'int': 1, 'eventid': 8, 'float': 4, 'string': 0, 'blob': 0, 'action': 1}
+
+
+class CDIVariable:
+    """
+    A variable described by CDI, and where it is in the node's memory.
+
+    Attributes
+    ----------
+    path : str
+        The names of the enclosing segment and groups and of the variable, separated by ``/``. Replicated groups
+        are numbered from 1, e.g. ``Inputs/Input(3)/Event``.
+    space : int
+        The address space holding the variable.
+    address : int
+        The variable's address within the space.
+    size : int
+        The variable's size in bytes.
+    type : str
+        The kind of variable: ``int``, ``string``, ``eventid``, ``float``, ``blob`` or ``action``.
+    """
+    __slots__ = ('path', 'space', 'address', 'size', 'type')
+
+    def __init__(self, path: str, space: int, address: int, size: int, type: str) -> None:
+        self.path = path
+        self.space = space
+        self.address = address
+        self.size = size
+        self.type = type
+
+    def __repr__(self) -> str:
+        return 'CDIVariable(%r, space=0x%02X, address=%d, size=%d, type=%r)' % (
+            self.path, self.space, self.address, self.size, self.type)
+
+
+class _Group:
+    __slots__ = ('name', 'start', 'replication', 'variables')
+
+    def __init__(self, name: str, start: int, replication: int) -> None:
+        self.name = name
+        self.start = start
+        self.replication = replication
+        self.variables = []
+
+
+class CDI:
+    """
+    A CDI document, indexed on demand.
+
+    The XML is not parsed until a variable is looked up, and is then read incrementally (without building the
+    element tree) only as far as the variable; the index built so far is kept for later lookups.
+
+    Parameters
+    ----------
+    xml : bytes
+        The CDI XML document.
+    """
+    def __init__(self, xml: bytes) -> None:
+        self.xml = bytes(xml).split(b'\0')[0]
+        self._index = {}
+        self._indexer = None
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def find(self, path: str) -> CDIVariable | None:
+        """
+        Find a variable by its path.
+
+        Parameters
+        ----------
+        path : str
+            The path to the variable, e.g. ``Inputs/Input(3)/Event``.
+
+        Returns
+        -------
+        CDIVariable
+            The variable, or ``None`` if the CDI does not describe it.
+        """
+        with self._lock:
+            variable = self._index.get(path)
+            if variable is not None or self._complete:
+                return variable
+            for variable in self._indexed():
+                if variable.path == path:
+                    return variable
+            return None
+
+    def variables(self) -> list[CDIVariable]:
+        """
+        All of the variables described by the CDI, in document order (which indexes the whole document).
+        """
+        with self._lock:
+            for _ in self._indexed():
+                pass
+            return list(self._index.values())
+
+    def _indexed(self):
+        if self._indexer is None:
+            self._indexer = self._parse()
+        for variable in self._indexer:
+            self._index.setdefault(variable.path, variable)
+            yield variable
+        self._complete = True
+
+    def _parse(self):
+        space = None
+        address = 0
+        groups = []
+        names = []
+        for event, element in ElementTree.iterparse(io.BytesIO(self.xml), events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                match tag:
+                    case 'segment':
+                        space = int(element.get('space', 0))
+                        address = int(element.get('origin', 0))
+                        groups = [_Group('', address, 1)]
+                    case 'group' if space is not None:
+                        address += int(element.get('offset', 0))
+                        groups.append(_Group('', address, int(element.get('replication', 1))))
+                    case 'int' | 'string' | 'eventid' | 'float' | 'blob' | 'action' if space is not None:
+                        address += int(element.get('offset', 0))
+                        names.append(None)
+                continue
+            match tag:
+                case 'name':
+                    if names and names[-1] is None and len(element) == 0:
+                        names[-1] = (element.text or '').strip()
+                    elif groups and not groups[-1].name:
+                        groups[-1].name = (element.text or '').strip()
+                case 'int' | 'string' | 'eventid' | 'float' | 'blob' | 'action' if space is not None:
+                    size = int(element.get('size', _VARIABLE_SIZES[tag]))
+                    name = names.pop()
+                    if name:
+                        groups[-1].variables.append(CDIVariable(name, space, address, size, tag))
+                    address += size
+                    element.clear()
+                case 'group' if space is not None:
+                    group = groups.pop()
+                    size = address - group.start
+                    parent = groups[-1]
+                    for i in range(group.replication):
+                        prefix = group.name
+                        if group.replication > 1:
+                            prefix = '%s(%d)' % (group.name, i + 1)
+                        for variable in group.variables:
+                            parent.variables.append(CDIVariable(prefix + '/' + variable.path if prefix else variable.path,
+                                                                space, variable.address + i * size, variable.size,
+                                                                variable.type))
+                    address = group.start + size * group.replication
+                    element.clear()
+                    if len(groups) == 1:
+                        yield from self._flush(groups[0])
+                case 'segment' if space is not None:
+                    yield from self._flush(groups[0])
+                    space = None
+                    element.clear()
+
+    @staticmethod
+    def _flush(segment: _Group):
+        for variable in segment.variables:
+            if segment.name:
+                variable.path = segment.name + '/' + variable.path
+            yield variable
+        segment.variables = []
+
+
+class CDICache:
+    """
+    On-disk cache of CDI documents, keyed by the manufacturer, model and software version reported by each node's
+    Simple Node Information, so that identical nodes share one copy.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to store documents in (created if necessary).
+    """
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, manufacturer: str, model: str, software_version: str) -> str:
+        """
+        The file a CDI document is cached in.
+        """
+        key = '\0'.join((manufacturer, model, software_version))
+        readable = re.sub(r'[^A-Za-z0-9.-]+', '_', '_'.join((manufacturer, model, software_version)))[:80]
+        return os.path.join(self.directory, '%s_%s.xml' % (readable, hashlib.sha1(key.encode()).hexdigest()[:12]))
+
+    def get(self, manufacturer: str, model: str, software_version: str) -> bytes | None:
+        """
+        Get a cached CDI document, or ``None`` if it is not cached.
+        """
+        try:
+            with open(self.path(manufacturer, model, software_version), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, manufacturer: str, model: str, software_version: str, xml: bytes):
+        """
+        Store a CDI document. The file is replaced atomically, so concurrent readers never see partial documents.
+        """
+        path = self.path(manufacturer, model, software_version)
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        with open(temporary, 'wb') as f:
+            f.write(xml)
+        os.replace(temporary, path)
+
+
+class CDIFetcher:
+    """
+    Gets the CDI of nodes, from the on-disk cache where possible, and otherwise by reading it from the node with
+    the Memory Configuration Protocol. Concurrent fetches for nodes of the same kind share a single download, and
+    the parsed :class:`CDI` (with its index) is shared by all of them.
+
+    Parameters
+    ----------
+    client : MemoryConfigClient
+        The client to read CDI with.
+    cache : CDICache = None
+        The on-disk cache; without one, documents are only shared in memory.
+    """
+    def __init__(self, client: MemoryConfigClient, cache: CDICache = None) -> None:
+        self.client = client
+        self.cache = cache
+        self.downloads = 0
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, destination: Address, manufacturer: str, model: str, software_version: str) -> Future:
+        """
+        Get the CDI of a node.
+
+        Parameters
+        ----------
+        destination : Address
+            The node.
+        manufacturer, model, software_version : str
+            The node's Simple Node Information, identifying which nodes share the same CDI.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to a :class:`CDI`.
+        """
+        key = (manufacturer, model, software_version)
+        with self._lock:
+            future = self._documents.get(key)
+            if future is not None:
+                return future
+            future = self._documents[key] = Future()
+        xml = self.cache.get(*key) if self.cache is not None else None
+        if xml is not None:
+            future.set_result(CDI(xml))
+            return future
+        self.downloads += 1
+
+        def downloaded(read):
+            if read.exception() is not None:
+                with self._lock:
+                    self._documents.pop(key, None)
+                future.set_exception(read.exception())
+                return
+            if self.cache is not None:
+                self.cache.put(*key, read.result())
+            future.set_result(CDI(read.result()))
+
+        self.read(destination).add_done_callback(downloaded)
+        return future
+
+    def read(self, destination: Address) -> Future:
+        """
+        Read a node's CDI document (up to its terminating null) from the node, bypassing the caches.
+        """
+        future = Future()
+        data = bytearray()
+        lock = threading.Lock()
+
+        def read_window(start: int):
+            # Read max_in_flight chunks at once, then use them in order up to the null, a short read or an error
+            parts = [self.client.read(destination, SPACE_CDI, address, MAX_READ_LENGTH, cache=False)
+                     for address in range(start, start + MAX_READ_LENGTH * self.client.max_in_flight, MAX_READ_LENGTH)]
+            remaining = [len(parts)]
+
+            def done(_):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        return
+                for part in parts:
+                    error = part.exception()
+                    if error is not None:
+                        if data and isinstance(error, MemoryConfigError):
+                            future.set_result(bytes(data))
+                        else:
+                            future.set_exception(error)
+                        return
+                    chunk = part.result()
+                    data.extend(chunk)
+                    if b'\0' in chunk or len(chunk) < MAX_READ_LENGTH:
+                        future.set_result(bytes(data).split(b'\0')[0])
+                        return
+                read_window(start + len(parts) * MAX_READ_LENGTH)
+
+            for part in parts:
+                part.add_done_callback(done)
+
+        read_window(0)
+        return future
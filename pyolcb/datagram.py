@@ -3,32 +3,202 @@ from .address import Address
 from .message import Message
 from . import message_types
 from . import utilities
-from math import ceil
+from functools import lru_cache
+import threading
+import time
+import can
+
+MAX_DATAGRAM_LENGTH = 72
+
+# Datagram Rejected error codes
+DATAGRAM_PERMANENT_ERROR = 0x1000
+DATAGRAM_TIMEOUT = 0x2010
+DATAGRAM_BUFFER_UNAVAILABLE = 0x2020
+DATAGRAM_OUT_OF_ORDER = 0x2040
+
+
+@lru_cache(maxsize=4096)
+def datagram_headers(source: int, destination: int) -> tuple[int, int, int, int]:
+    """
+    The CAN headers of the only, first, middle and last frames of a datagram between two aliases.
+    """
+    base = destination << 12 | source
+    return (0x1A000000 | base, 0x1B000000 | base, 0x1C000000 | base, 0x1D000000 | base)
 
 
 class Datagram(Message):
+    __slots__ = ()
+
     def __init__(self, data: bytes | bytearray, source: Address, destination: Address):
         super().__init__(message_types.Datagram, data, source, destination)
 
     def as_message_list(self):
-        num_frames = ceil(len(self.data)/8)
-        if num_frames <= 1:
+        """
+        Split the :class:`Datagram` into one :class:`Message` per CAN frame. Frame data are :class:`memoryview`
+        slices of the datagram's data rather than copies.
+        """
+        data = memoryview(self.data)
+        if len(data) <= 8:
             return [Message(message_types.Datagram, self.data, self.source, self.destination)]
-        else:
-            messages = []
-            for frame_id in range(1, num_frames):
-                messages.append(Message(message_types.Datagram, self.data[(
-                    frame_id-1)*8:frame_id*8], self.source, self.destination, frame_id))
-            messages.append(Message(message_types.Datagram, self.data[(
-                num_frames-1)*8:], self.source, self.destination, frame_id))
-            return messages
-        
+        last = (len(data) - 1) // 8 * 8
+        messages = [Message(message_types.Datagram, data[0:8], self.source, self.destination, 1)]
+        messages += [Message(message_types.Datagram, data[i:i + 8], self.source, self.destination, 2)
+                     for i in range(8, last, 8)]
+        messages.append(Message(message_types.Datagram, data[last:], self.source, self.destination, -1))
+        return messages
+
+    def as_can_frames(self) -> list[can.Message]:
+        """
+        Split the :class:`Datagram` into CAN frames, using the headers precomputed for its source and destination.
+        """
+        only, first, middle, final = datagram_headers(self.source.get_alias(), self.destination.get_alias())
+        data = memoryview(self.data)
+        if len(data) <= 8:
+            return [can.Message(arbitration_id=only, data=data, is_extended_id=True)]
+        last = (len(data) - 1) // 8 * 8
+        frames = [can.Message(arbitration_id=first, data=data[0:8], is_extended_id=True)]
+        frames += [can.Message(arbitration_id=middle, data=data[i:i + 8], is_extended_id=True) for i in range(8, last, 8)]
+        frames.append(can.Message(arbitration_id=final, data=data[last:], is_extended_id=True))
+        return frames
 
     @classmethod
-    def from_message_list(cls, message_list: list[Message]):
+    def from_message_list(cls, message_list: Message | list[Message]):
+        if isinstance(message_list, Message):
+            message_list = [message_list]
         data_bytearray = bytearray()
         for message in message_list:
-            data_bytearray.append(message.data)
-        cls(data_bytearray, message_list[0].source, message_list[0].destination)
+            data_bytearray += message.data
+        return cls(bytes(data_bytearray), message_list[0].source, message_list[0].destination)
+
+
+class DatagramReassembler:
+    """
+    Reassembles multi-frame datagrams, keyed by (source alias, destination alias).
+
+    Frames are copied into 72 byte buffers taken from a pool preallocated at construction, so memory use is
+    bounded however many partial datagrams arrive. Partial datagrams are discarded once stale, and ``reject`` (if set)
+    is called for each so that its sender can be sent Datagram Rejected with a temporary error and retry.
+
+    Parameters
+    ----------
+    timeout : float = 3.0
+        Seconds after its first frame that an incomplete datagram is discarded.
+    max_per_source : int = 4
+        Maximum number of datagrams being reassembled from any one source at a time.
+    max_buffers : int = 64
+        Maximum number of datagrams being reassembled at a time (the size of the buffer pool).
+    reject : callable = None
+        Called with the source alias, destination alias and error code (``DATAGRAM_TIMEOUT``) of each partial
+        datagram discarded because it is stale.
+    """
+    timeout = 3.0
+    max_per_source = 4
+    max_buffers = 64
+    reject = None
+
+    def __init__(self, timeout: float = 3.0, max_per_source: int = 4, max_buffers: int = 64,
+                 reject: callable = None) -> None:
+        self.timeout = timeout
+        self.max_per_source = max_per_source
+        self.max_buffers = max_buffers
+        self.reject = reject
+        self.expired = 0
+        self.rejected = 0
+        self._free = [bytearray(MAX_DATAGRAM_LENGTH) for _ in range(max_buffers)]
+        self._partial = {}
+        self._per_source = {}
+        self._discarding = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, message: Message) -> tuple[Datagram, int]:
+        """
+        Add a received datagram frame.
+
+        Returns
+        -------
+        tuple[Datagram, int]
+            The completed :class:`Datagram` (or ``None`` if more frames are needed), and the error code to
+            reject the datagram with (or ``None``).
+        """
+        if message.frame_id is None:
+            return Datagram(bytes(message.data), message.source, message.destination), None
+        source = message.source.get_alias()
+        key = (source, message.destination.get_alias())
+        now = time.monotonic()
+        if now - self._last_sweep > self.timeout / 4:
+            self._expire_and_reject(now)
+        with self._lock:
+            partial = self._partial.get(key)
+            if message.frame_id == 1:
+                self._discarding.pop(key, None)
+                if partial is not None:
+                    self._release(key)
+                elif self._per_source.get(source, 0) >= self.max_per_source or not self._free:
+                    return None, self._reject(key, DATAGRAM_BUFFER_UNAVAILABLE)
+                partial = [self._free.pop(), 0, now]
+                self._partial[key] = partial
+                self._per_source[source] = self._per_source.get(source, 0) + 1
+            elif partial is None:
+                # Only reject each datagram once, then drop the rest of its frames
+                if key in self._discarding:
+                    if message.frame_id == -1:
+                        del self._discarding[key]
+                    return None, None
+                if message.frame_id == -1:
+                    self.rejected += 1
+                    return None, DATAGRAM_OUT_OF_ORDER
+                return None, self._reject(key, DATAGRAM_OUT_OF_ORDER)
+
+            buffer, length, _ = partial
+            end = length + len(message.data)
+            if end > MAX_DATAGRAM_LENGTH:
+                self._release(key)
+                if message.frame_id == -1:
+                    self.rejected += 1
+                    return None, DATAGRAM_PERMANENT_ERROR
+                return None, self._reject(key, DATAGRAM_PERMANENT_ERROR)
+            buffer[length:end] = message.data
+            partial[1] = end
+            if message.frame_id != -1:
+                return None, None
+            datagram = Datagram(bytes(memoryview(buffer)[:end]), message.source, message.destination)
+            self._release(key)
+            return datagram, None
+
+    def _reject(self, key: tuple[int, int], code: int) -> int:
+        self.rejected += 1
+        self._discarding[key] = None
+        if len(self._discarding) > 4 * self.max_buffers + 16:
+            del self._discarding[next(iter(self._discarding))]
+        return code
+
+    def _release(self, key: tuple[int, int]):
+        partial = self._partial.pop(key)
+        self._free.append(partial[0])
+        count = self._per_source[key[0]] - 1
+        if count:
+            self._per_source[key[0]] = count
+        else:
+            del self._per_source[key[0]]
+
+    def _expire_and_reject(self, now: float):
+        with self._lock:
+            self._last_sweep = now
+            expired = [k for k, v in self._partial.items() if now - v[2] > self.timeout]
+            for key in expired:
+                self._release(key)
+                self.expired += 1
+        # Outside the lock, as rejecting sends a frame
+        if self.reject is not None:
+            for source, destination in expired:
+                self.reject(source, destination, DATAGRAM_TIMEOUT)
 
+    def expire(self):
+        """
+        Discard any stale partial datagrams now, rather than on receipt of the next frame.
+        """
+        self._expire_and_reject(time.monotonic())
 
+    def __len__(self) -> int:
+        return len(self._partial)
@@ -0,0 +1,214 @@
+"""
+==============
+directory
+==============
+
+Directory of the nodes on the network reached through an :class:`Interface`, mapping aliases to node IDs.
+"""
+import threading
+import time
+import can
+from .address import Address
+from .message import Message
+from . import message_types
+
+# Messages whose content is the sender's node ID
+_IDENTIFYING = frozenset(x.value for x in (
+    message_types.Verified_Node_ID_Number, message_types.Verified_Node_ID_Number_Simple,
+    message_types.Initialization_Complete, message_types.Initialization_Complete_Simple))
+
+
+class _Entry:
+    __slots__ = ('node_id', 'alias', 'last_seen', 'local')
+
+    def __init__(self, node_id: int, alias: int, local: bool) -> None:
+        self.node_id = node_id
+        self.alias = alias
+        self.last_seen = time.monotonic()
+        self.local = local
+
+
+class NodeDirectory:
+    """
+    Nodes known on the network, indexed by alias and by 48-bit node ID.
+
+    The directory learns from Verified Node ID, Initialization Complete and Alias Map Definition frames, and
+    forgets aliases released with Alias Map Reset. Nodes not heard from for ``max_age`` seconds are removed, except
+    those hosted locally.
+
+    Parameters
+    ----------
+    max_age : float = 600.0
+        Seconds after which a silent node is forgotten, or ``None`` to keep nodes indefinitely.
+    """
+    def __init__(self, max_age: float = 600.0) -> None:
+        self.max_age = max_age
+        self._by_alias = {}
+        self._by_id = {}
+        self._lock = threading.Lock()
+        self._next_expiry = time.monotonic() + (max_age or 0)
+
+    def __len__(self) -> int:
+        return len(self._by_id) + sum(1 for x in self._by_alias.values() if x.node_id is None)
+
+    def __iter__(self):
+        return iter(self.addresses())
+
+    def __contains__(self, address: Address | int) -> bool:
+        if isinstance(address, Address):
+            if address.get_full_address() is not None:
+                return address.get_full_address() in self._by_id
+            return address.has_alias() and address.get_alias() in self._by_alias
+        return address in self._by_id
+
+    def add(self, node_id: int = None, alias: int = None, local: bool = False):
+        """
+        Record that a node ID uses an alias, replacing any previous mapping of either.
+
+        Parameters
+        ----------
+        node_id : int = None
+            The 48-bit node ID, if known.
+        alias : int = None
+            The 12-bit alias, if known.
+        local : bool = False
+            Whether the node is hosted locally (and so never expires).
+        """
+        with self._lock:
+            entry = self._by_id.get(node_id) if node_id is not None else None
+            if entry is None and alias is not None:
+                entry = self._by_alias.get(alias)
+                if entry is not None and node_id is not None and entry.node_id not in (None, node_id):
+                    # The alias has been reused by another node
+                    entry.alias = None
+                    entry = None
+            if entry is None:
+                entry = _Entry(node_id, alias, local)
+            else:
+                entry.last_seen = time.monotonic()
+                entry.local = entry.local or local
+                if alias is not None and entry.alias not in (None, alias) and self._by_alias.get(entry.alias) is entry:
+                    del self._by_alias[entry.alias]
+                if node_id is not None:
+                    entry.node_id = node_id
+                if alias is not None:
+                    entry.alias = alias
+            if entry.node_id is not None:
+                self._by_id[entry.node_id] = entry
+            if entry.alias is not None:
+                self._by_alias[entry.alias] = entry
+        self._expire_if_due()
+
+    def add_address(self, address: Address, local: bool = False):
+        """
+        Record a node's :class:`Address`.
+        """
+        self.add(address.get_full_address(), address.get_alias() if address.has_alias() else None, local)
+
+    def remove_alias(self, alias: int):
+        """
+        Forget an alias (the node ID stays known, without an alias).
+        """
+        with self._lock:
+            entry = self._by_alias.pop(alias, None)
+            if entry is not None:
+                entry.alias = None
+
+    def resolve(self, alias: int) -> int | None:
+        """
+        Get the node ID using an alias, or ``None`` if it is not known.
+        """
+        entry = self._by_alias.get(alias)
+        return entry.node_id if entry is not None else None
+
+    def get_alias(self, node_id: int) -> int | None:
+        """
+        Get the alias used by a node ID, or ``None`` if it is not known.
+        """
+        entry = self._by_id.get(node_id)
+        return entry.alias if entry is not None else None
+
+    def get(self, alias: int) -> Address | None:
+        """
+        Get the :class:`Address` of the node using an alias, or ``None``.
+        """
+        entry = self._by_alias.get(alias)
+        if entry is None:
+            return None
+        if entry.node_id is None:
+            # Only the alias is known, e.g. from traffic before the node identified itself
+            return Address(alias=alias)
+        return Address(entry.node_id, alias)
+
+    def last_seen(self, node: Address | int) -> float | None:
+        """
+        The :func:`time.monotonic` time a node (given by :class:`Address` or alias) was last heard from.
+        """
+        entry = self._find(node)
+        return entry.last_seen if entry is not None else None
+
+    def addresses(self) -> list[Address]:
+        """
+        The addresses of all known nodes.
+        """
+        entries = {id(x): x for x in list(self._by_id.values()) + list(self._by_alias.values())}
+        return [Address(x.node_id, x.alias) for x in entries.values()]
+
+    def seen(self, alias: int):
+        """
+        Update the last-seen time of the node using an alias, and forget silent nodes if they are due to be.
+        """
+        now = time.monotonic()
+        entry = self._by_alias.get(alias)
+        if entry is not None:
+            entry.last_seen = now
+        if self.max_age is not None and now >= self._next_expiry:
+            self.expire(now)
+
+    def process_message(self, message: Message):
+        """
+        Learn from a received :class:`Message`.
+        """
+        alias = message.source.get_alias()
+        if message.message_type.value in _IDENTIFYING and len(message.data) >= 6:
+            self.add(int.from_bytes(message.data[:6], 'big'), alias)
+        else:
+            self.seen(alias)
+
+    def process_control_frame(self, frame: can.Message):
+        """
+        Learn from a received CAN control frame (Alias Map Definition / Reset).
+        """
+        header = frame.arbitration_id
+        if header & 0x0F000000:
+            return
+        match (header >> 12) & 0xFFF:
+            case 0x701 if len(frame.data) >= 6:
+                self.add(int.from_bytes(frame.data[:6], 'big'), header & 0xFFF)
+            case 0x703:
+                self.remove_alias(header & 0xFFF)
+
+    def expire(self, now: float = None):
+        """
+        Remove nodes that have not been heard from for ``max_age`` seconds.
+        """
+        if self.max_age is None:
+            return
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.max_age
+        with self._lock:
+            for index in (self._by_alias, self._by_id):
+                for key in [k for k, v in index.items() if v.last_seen < cutoff and not v.local]:
+                    del index[key]
+            self._next_expiry = now + self.max_age / 2
+
+    def _expire_if_due(self):
+        if self.max_age is not None and time.monotonic() >= self._next_expiry:
+            self.expire()
+
+    def _find(self, node: Address | int):
+        if isinstance(node, Address):
+            if node.get_full_address() is not None and node.get_full_address() in self._by_id:
+                return self._by_id[node.get_full_address()]
+            node = node.get_alias() if node.has_alias() else None
+        return self._by_alias.get(node)
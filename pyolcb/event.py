@@ -3,13 +3,21 @@ from .address import Address
 from .message import Message
 from . import message_types
 from . import utilities
+import threading
+import time
+
+MAX_EVENT_PAYLOAD = 256
+
+_PAYLOAD_FRAMES = frozenset(x.value for x in (
+    message_types.PCER_w_Payload_1st, message_types.PCER_w_Payload_middle, message_types.PCER_w_Payload_last))
 
 class Event(Message):
-    id = bytes(8)
-    well_known = False
+    __slots__ = ('id', 'well_known')
+
     def __init__(self, event_id: utilities.byte_options, source: Address = None):
         self.id = utilities.process_bytes(8, event_id)
-        if self.id[0:2] in [[0x01,0x00],[0x01,0x01]] or self.id[0:4] == [0x09, 0x00, 0x99, 0xFF]:
+        self.well_known = False
+        if self.id[0:2] in [b'\x01\x00', b'\x01\x01'] or self.id[0:4] == b'\x09\x00\x99\xFF':
             self.well_known = True
         elif not source is None:
             self.id = ((source.get_full_address() << 16 )+int.from_bytes(self.id[-2:],'big')).to_bytes(8,'big')
@@ -18,3 +26,198 @@ class Event(Message):
     def __eq__(self, x: object):
         return self.id == x.id
 
+    def __int__(self) -> int:
+        return int.from_bytes(self.id, 'big')
+
+
+
+class EventReport(Message):
+    """
+    A received event report carrying a payload. ``data`` is the 8 byte event ID and ``payload`` the bytes that
+    followed it, both :class:`memoryview` slices of the reassembled report rather than copies.
+    """
+    __slots__ = ('payload',)
+
+    def __init__(self, data: bytes | bytearray | memoryview, source: Address = None) -> None:
+        data = memoryview(data)
+        super().__init__(message_types.Producer_Consumer_Event_Report, data[:8], source)
+        self.payload = data[8:]
+
+
+def payload_messages(event_id: bytes, payload: bytes | bytearray | memoryview, source: Address) -> list[Message]:
+    """
+    Split an event report with a payload into PCER with Payload first, middle and last messages of 8 bytes each.
+    Message data are :class:`memoryview` slices of a single buffer holding the event ID and payload.
+    """
+    if len(payload) > MAX_EVENT_PAYLOAD:
+        raise Exception("Event payload longer than %d bytes" % MAX_EVENT_PAYLOAD)
+    data = memoryview(bytes(event_id) + bytes(payload))
+    last = (len(data) - 1) // 8 * 8
+    messages = [Message(message_types.PCER_w_Payload_1st, data[0:8], source)]
+    messages += [Message(message_types.PCER_w_Payload_middle, data[i:i + 8], source) for i in range(8, last, 8)]
+    messages.append(Message(message_types.PCER_w_Payload_last, data[last:], source))
+    return messages
+
+
+class EventPayloadReassembler:
+    """
+    Reassembles event reports with payloads from their PCER with Payload frames, keyed by source alias. Frames are
+    appended to one buffer per report; partial reports are discarded once stale or once longer than the cap.
+
+    Parameters
+    ----------
+    timeout : float = 3.0
+        Seconds after its first frame that an incomplete report is discarded.
+    max_payload : int = MAX_EVENT_PAYLOAD
+        Maximum payload length; longer reports are discarded.
+    """
+    timeout = 3.0
+    max_payload = MAX_EVENT_PAYLOAD
+
+    def __init__(self, timeout: float = 3.0, max_payload: int = MAX_EVENT_PAYLOAD) -> None:
+        self.timeout = timeout
+        self.max_payload = max_payload
+        self.expired = 0
+        self.rejected = 0
+        self._partial = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def handles(message: Message) -> bool:
+        """
+        Whether a :class:`Message` is a PCER with Payload frame.
+        """
+        return message.message_type.value in _PAYLOAD_FRAMES
+
+    def add(self, message: Message) -> EventReport | None:
+        """
+        Add a received PCER with Payload frame.
+
+        Returns
+        -------
+        EventReport
+            The completed report, or ``None`` if more frames are needed (or the frame was discarded).
+        """
+        source = message.source.get_alias()
+        now = time.monotonic()
+        with self._lock:
+            partial = self._partial.get(source)
+            if partial is not None and now - partial[1] > self.timeout:
+                del self._partial[source]
+                self.expired += 1
+                partial = None
+            match message.message_type.value:
+                case message_types.PCER_w_Payload_1st.value:
+                    if partial is not None:
+                        # A new report from the same source abandons the incomplete one
+                        self.rejected += 1
+                    self._sweep(now)
+                    self._partial[source] = (bytearray(message.data), now)
+                    return None
+                case _ if partial is None:
+                    self.rejected += 1
+                    return None
+            buffer = partial[0]
+            if buffer is not None:
+                buffer += message.data
+                if len(buffer) > 8 + self.max_payload:
+                    # Skip the rest of the report
+                    self._partial[source] = (None, partial[1])
+                    buffer = None
+                    self.rejected += 1
+            if message.message_type.value == message_types.PCER_w_Payload_middle.value:
+                return None
+            del self._partial[source]
+            if buffer is None:
+                return None
+        return EventReport(buffer, message.source)
+
+    def _sweep(self, now: float):
+        for source in [k for k, v in self._partial.items() if now - v[1] > self.timeout]:
+            del self._partial[source]
+            self.expired += 1
+
+
+def encode_event_range(base: int, mask: int) -> int:
+    """
+    Encode an event range as the single event ID sent in Producer/Consumer Range Identified messages: the masked
+    low-order bits are set to the opposite of the bit above them, so that their extent can be recovered.
+    """
+    if mask & (mask + 1):
+        raise Exception("Event range mask must cover contiguous low-order bits")
+    if not mask:
+        return base
+    return (base & ~mask) | (0 if (base >> mask.bit_length()) & 1 else mask)
+
+
+def decode_event_range(event_id: int) -> tuple[int, int]:
+    """
+    Decode the event ID of a Producer/Consumer Range Identified message into a base event ID and mask.
+    """
+    run = ~event_id & 0xFFFFFFFFFFFFFFFF if event_id & 1 else event_id
+    size = (run & -run).bit_length() - 1 if run else 64
+    mask = (1 << size) - 1
+    return event_id & ~mask & 0xFFFFFFFFFFFFFFFF, mask
+
+
+class EventRangeIndex:
+    """
+    Index of event ranges, each a base event ID and a mask of low-order bits that may take any value.
+
+    Ranges are grouped by mask size and keyed by their fixed high-order bits, so matching an event costs one
+    dictionary lookup per distinct range size rather than one comparison per range.
+    """
+    __slots__ = ('_sizes',)
+
+    def __init__(self) -> None:
+        self._sizes = {}
+
+    def __len__(self) -> int:
+        return sum(len(x) for table in self._sizes.values() for x in table.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._sizes)
+
+    def add(self, base: int, mask: int, value):
+        """
+        Add a value for the events matching ``base`` in all bits not set in ``mask``.
+        """
+        if mask & (mask + 1):
+            raise Exception("Event range mask must cover contiguous low-order bits")
+        size = mask.bit_length()
+        values = self._sizes.setdefault(size, {}).setdefault(base >> size, [])
+        if value not in values:
+            values.append(value)
+
+    def remove(self, base: int, mask: int, value=None) -> list:
+        """
+        Remove a value (or all values) for a range, returning those removed.
+        """
+        size = mask.bit_length()
+        table = self._sizes.get(size, {})
+        values = table.get(base >> size, [])
+        removed = [x for x in values if value is None or x == value]
+        values[:] = [x for x in values if x not in removed]
+        if not values:
+            table.pop(base >> size, None)
+            if not table:
+                self._sizes.pop(size, None)
+        return removed
+
+    def match(self, event_id: int) -> list:
+        """
+        Get the values of all ranges containing an event ID.
+        """
+        matches = []
+        for size, table in self._sizes.items():
+            values = table.get(event_id >> size)
+            if values:
+                matches += values
+        return matches
+
+    def ranges(self, event_id: int = None) -> list[tuple[int, int]]:
+        """
+        Get the ``(base, mask)`` of every range, or of those containing an event ID.
+        """
+        return [(prefix << size, (1 << size) - 1) for size, table in self._sizes.items() for prefix in table
+                if event_id is None or event_id >> size == prefix]
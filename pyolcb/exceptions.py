@@ -0,0 +1,42 @@
+class TransmitQueueFull(Exception):
+    """
+    Raised (or set on the completion future) when a frame cannot be queued for transmission.
+    """
+    pass
+
+
+class TransmitQueueClosed(TransmitQueueFull):
+    """
+    Set on the completion future of frames queued after the transmit queue was closed (e.g. by
+    :meth:`Interface.stop`).
+    """
+    pass
+
+
+class DatagramRejected(Exception):
+    """
+    Raised (or set on the completion future) when the destination rejects a datagram.
+    """
+    def __init__(self, code: int) -> None:
+        super().__init__("Datagram rejected with error code 0x%04X" % code)
+        self.code = code
+
+
+class MemoryConfigError(Exception):
+    """
+    Raised (or set on the completion future) when a node reports that a Memory Configuration Protocol
+    operation failed.
+    """
+    def __init__(self, code: int, message: str = '') -> None:
+        super().__init__("Memory configuration operation failed with error code 0x%04X%s"
+                         % (code, (': ' + message) if message else ''))
+        self.code = code
+
+
+class TractionError(Exception):
+    """
+    Raised (or set on the completion future) when a train node refuses a Traction Control command.
+    """
+    def __init__(self, code: int) -> None:
+        super().__init__("Traction control command failed with result code 0x%02X" % code)
+        self.code = code
@@ -0,0 +1,328 @@
+"""
+==============
+executor
+==============
+
+Executors running a :class:`Node`'s event consumers and datagram handlers, so that slow callbacks need not run on
+(and hold up) the thread receiving frames.
+"""
+import asyncio
+import inspect
+import logging
+import threading
+from collections import deque
+from enum import Enum
+from .transmit import OverflowPolicy
+
+logger = logging.getLogger(__name__)
+
+_QUEUED = 0
+_RUNNING = 1
+_DONE = 2
+_DROPPED = 3
+
+
+class Ordering(Enum):
+    """
+    Which callbacks an executor runs one at a time, in the order they were submitted.
+    """
+    EVENT = 0
+    """Callbacks for the same event ID (or, for datagrams, from the same source) are ordered."""
+    SOURCE = 1
+    """Callbacks for messages from the same source node are ordered."""
+    NONE = 2
+    """Callbacks may run in any order."""
+
+
+class InlineExecutor:
+    """
+    Runs each callback immediately, on the thread that received the message. This is the default.
+
+    Attributes
+    ----------
+    queued : int
+        Callbacks waiting to run (always 0).
+    in_flight : int
+        Callbacks running.
+    completed : int
+        Callbacks that have finished.
+    dropped : int
+        Callbacks discarded because the queue was full (always 0).
+    failed : int
+        Callbacks that raised an exception.
+    """
+    def __init__(self) -> None:
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, function: callable, argument, event: bytes = None, source: int = None) -> bool:
+        """
+        Run ``function(argument)``.
+
+        Parameters
+        ----------
+        function : callable
+            The callback.
+        argument : object
+            The :class:`Message` or :class:`Datagram` to pass to the callback.
+        event : bytes = None
+            The event ID the callback is for, if any.
+        source : int = None
+            The alias of the node the message came from.
+
+        Returns
+        -------
+        bool
+            ``True`` if the callback was run (or queued to run), ``False`` if it was dropped.
+        """
+        self.in_flight += 1
+        try:
+            function(argument)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+        return True
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class _QueuedExecutor(InlineExecutor):
+    # Bookkeeping shared by executors with a bounded queue: entries are [function, argument, state], held in a
+    # deque per ordering key and, for dropping the oldest, in one FIFO across keys
+    def __init__(self, max_queue: int, overflow: OverflowPolicy, block_timeout: float, ordering: Ordering) -> None:
+        super().__init__()
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.ordering = ordering
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._fifo = deque()
+        self._closed = False
+
+    def _key(self, event: bytes, source: int):
+        match self.ordering:
+            case Ordering.EVENT:
+                return ('event', event) if event is not None else ('source', source)
+            case Ordering.SOURCE:
+                return ('source', source)
+        return object()
+
+    def _admit(self, entry: list, block: bool) -> bool:
+        # Called holding the condition; makes room for one more entry according to the overflow policy
+        while self._fifo and self._fifo[0][2] != _QUEUED:
+            self._fifo.popleft()
+        if self.queued >= self.max_queue:
+            match self.overflow:
+                case OverflowPolicy.BLOCK if block:
+                    if not self._condition.wait_for(lambda: self.queued < self.max_queue or self._closed,
+                                                    self.block_timeout) or self._closed:
+                        self.dropped += 1
+                        return False
+                case OverflowPolicy.DROP_OLDEST:
+                    while self._fifo and self._fifo[0][2] != _QUEUED:
+                        self._fifo.popleft()
+                    if not self._fifo:
+                        self.dropped += 1
+                        return False
+                    self._fifo.popleft()[2] = _DROPPED
+                    self.queued -= 1
+                    self.dropped += 1
+                case _:
+                    self.dropped += 1
+                    return False
+        self.queued += 1
+        if self.overflow == OverflowPolicy.DROP_OLDEST:
+            self._fifo.append(entry)
+        return True
+
+    def _next(self, key) -> list | None:
+        # Called holding the condition: the next entry to run for a key, or None (and the key is released)
+        entries = self._pending.get(key)
+        while entries:
+            entry = entries.popleft()
+            if entry[2] == _QUEUED:
+                entry[2] = _RUNNING
+                self.queued -= 1
+                self.in_flight += 1
+                return entry
+        self._pending.pop(key, None)
+        return None
+
+    def _finished(self, entry: list, error: bool):
+        # Called holding the condition
+        entry[2] = _DONE
+        self.in_flight -= 1
+        self.completed += 1
+        if error:
+            self.failed += 1
+        self._condition.notify_all()
+
+
+class ThreadPoolCallbackExecutor(_QueuedExecutor):
+    """
+    Runs callbacks on a pool of worker threads. Callbacks with the same ordering key run one at a time, in order;
+    others run concurrently.
+
+    Parameters
+    ----------
+    workers : int = 4
+        Number of worker threads.
+    max_queue : int = 1024
+        Maximum number of callbacks waiting to run.
+    overflow : OverflowPolicy = OverflowPolicy.BLOCK
+        What to do when the queue is full: wait for space (holding up the receiving thread), drop the new
+        callback, or drop the oldest queued callback.
+    block_timeout : float = None
+        With :attr:`OverflowPolicy.BLOCK`, seconds to wait for space before dropping the callback.
+    ordering : Ordering = Ordering.EVENT
+        Which callbacks must run in order.
+    """
+    def __init__(self, workers: int = 4, max_queue: int = 1024, overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+                 block_timeout: float = None, ordering: Ordering = Ordering.EVENT) -> None:
+        super().__init__(max_queue, overflow, block_timeout, ordering)
+        self._ready = deque()
+        self._threads = [threading.Thread(target=self._run, name='pyolcb-callback-%d' % i, daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, function: callable, argument, event: bytes = None, source: int = None) -> bool:
+        """
+        Queue ``function(argument)`` to run on a worker thread (see :meth:`InlineExecutor.submit`).
+        """
+        key = self._key(event, source)
+        entry = [function, argument, _QUEUED]
+        with self._condition:
+            if self._closed or not self._admit(entry, True):
+                return False
+            entries = self._pending.get(key)
+            if entries is None:
+                self._pending[key] = deque([entry])
+                self._ready.append(key)
+                self._condition.notify_all()
+            else:
+                # Already queued or running; the worker running the key picks this up afterwards
+                entries.append(entry)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    while not self._ready and not self._closed:
+                        self._condition.wait()
+                    if not self._ready:
+                        return
+                    key = self._ready.popleft()
+                    entry = self._next(key)
+                    if entry is not None:
+                        break
+            error = False
+            try:
+                entry[0](entry[1])
+            except Exception:
+                error = True
+                logger.exception("Error in callback %s", entry[0])
+            with self._condition:
+                self._finished(entry, error)
+                if self._pending.get(key):
+                    self._ready.append(key)
+                else:
+                    self._pending.pop(key, None)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the workers once the queued callbacks have run.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class AsyncioCallbackExecutor(_QueuedExecutor):
+    """
+    Runs callbacks on an :mod:`asyncio` event loop. Callbacks may be coroutine functions, which are awaited;
+    callbacks with the same ordering key run one at a time, in order.
+
+    Parameters
+    ----------
+    loop : asyncio.AbstractEventLoop = None
+        The event loop. Defaults to the running event loop.
+    max_queue : int = 1024
+        Maximum number of callbacks waiting to run.
+    overflow : OverflowPolicy = OverflowPolicy.BLOCK
+        As for :class:`ThreadPoolCallbackExecutor`. Submitting from the event loop's own thread never blocks;
+        the callback is dropped instead.
+    block_timeout : float = None
+        With :attr:`OverflowPolicy.BLOCK`, seconds to wait for space before dropping the callback.
+    ordering : Ordering = Ordering.EVENT
+        Which callbacks must run in order.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop = None, max_queue: int = 1024,
+                 overflow: OverflowPolicy = OverflowPolicy.BLOCK, block_timeout: float = None,
+                 ordering: Ordering = Ordering.EVENT) -> None:
+        super().__init__(max_queue, overflow, block_timeout, ordering)
+        self._loop_thread = None
+        if loop is None:
+            self.loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+        else:
+            self.loop = loop
+            self.loop.call_soon_threadsafe(self._set_loop_thread)
+
+    def _set_loop_thread(self):
+        self._loop_thread = threading.get_ident()
+
+    def submit(self, function: callable, argument, event: bytes = None, source: int = None) -> bool:
+        """
+        Queue ``function(argument)`` to run on the event loop (see :meth:`InlineExecutor.submit`).
+        """
+        key = self._key(event, source)
+        entry = [function, argument, _QUEUED]
+        with self._condition:
+            if self._closed or not self._admit(entry, threading.get_ident() != self._loop_thread):
+                return False
+        self.loop.call_soon_threadsafe(self._schedule, key, entry)
+        return True
+
+    def _schedule(self, key, entry: list):
+        with self._condition:
+            entries = self._pending.get(key)
+            if entries is not None:
+                entries.append(entry)
+                return
+            self._pending[key] = deque([entry])
+        self.loop.create_task(self._drain(key))
+
+    async def _drain(self, key):
+        while True:
+            with self._condition:
+                entry = self._next(key)
+            if entry is None:
+                return
+            error = False
+            try:
+                result = entry[0](entry[1])
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                error = True
+                logger.exception("Error in callback %s", entry[0])
+            with self._condition:
+                self._finished(entry, error)
+
+    def shutdown(self, wait: bool = True):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,114 @@
+"""
+==============
+gridconnect
+==============
+
+Codec for the GridConnect ASCII format used by most LCC hubs, USB adapters and log files, e.g.
+``:X19170123N0501010118C00;``. Can be used as the codec of a TCP or serial :class:`Interface`.
+"""
+import re
+import can
+from .message import Message
+
+# Data must be whole bytes: a frame with an odd number of digits (line noise) is skipped, not decoded
+_frame = re.compile(rb':([XS])([0-9A-Fa-f]{1,8})N((?:[0-9A-Fa-f]{2}){0,8});')
+
+
+def encode(frame: can.Message | Message) -> bytes:
+    """
+    Encode a frame (or :class:`Message`) as a GridConnect frame.
+    """
+    if isinstance(frame, Message):
+        return b':X%08XN%s;' % (frame.get_can_header(), bytes(frame.data).hex().upper().encode())
+    if frame.is_extended_id:
+        return b':X%08XN%s;' % (frame.arbitration_id, bytes(frame.data).hex().upper().encode())
+    return b':S%03XN%s;' % (frame.arbitration_id, bytes(frame.data).hex().upper().encode())
+
+
+def encode_many(frames: list[can.Message | Message], separator: bytes = b'\n') -> bytes:
+    """
+    Encode a list of frames (or messages) as GridConnect text, one frame per line.
+    """
+    return separator.join([encode(frame) for frame in frames]) + separator
+
+
+def decode(text: str | bytes) -> can.Message:
+    """
+    Decode a single GridConnect frame.
+    """
+    if isinstance(text, str):
+        text = text.encode()
+    match = _frame.search(text)
+    if match is None:
+        raise Exception("Invalid GridConnect frame")
+    return _to_can_message(*match.groups())
+
+
+def _to_can_message(kind: bytes, header: bytes, data: bytes) -> can.Message:
+    return can.Message(arbitration_id=int(header, 16), data=bytes.fromhex(data.decode()), is_extended_id=kind == b'X')
+
+
+def iter_frames(data: bytes | bytearray | memoryview):
+    """
+    Iterate over the frames in a buffer of GridConnect text as ``(arbitration_id, data, is_extended_id)`` tuples,
+    skipping anything that is not a frame (timestamps, comments, partial frames).
+    """
+    fromhex = bytes.fromhex
+    for kind, header, payload in _frame.findall(data):
+        yield int(header, 16), fromhex(payload.decode()), kind == b'X'
+
+
+def decode_buffer(data: bytes | bytearray | memoryview) -> list[can.Message]:
+    """
+    Decode every frame in a buffer of GridConnect text.
+    """
+    fromhex = bytes.fromhex
+    return [can.Message(arbitration_id=int(header, 16), data=fromhex(payload.decode()), is_extended_id=kind == b'X')
+            for kind, header, payload in _frame.findall(data)]
+
+
+def read_file(path: str) -> list[can.Message]:
+    """
+    Decode every frame in a GridConnect log file.
+    """
+    with open(path, 'rb') as f:
+        return decode_buffer(f.read())
+
+
+class GridConnectDecoder:
+    """
+    Incremental GridConnect parser. Handles frames split across reads by keeping any trailing partial frame
+    until the rest arrives.
+    """
+    max_pending = 64
+
+    def __init__(self) -> None:
+        self._pending = b''
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[can.Message]:
+        data = self._pending + bytes(data) if self._pending else bytes(data)
+        end = data.rfind(b';')
+        start = data.rfind(b':')
+        frames = decode_buffer(memoryview(data)[:end + 1]) if end >= 0 else []
+        pending = data[start:] if start > end else b''
+        self._pending = pending if len(pending) <= self.max_pending else b''
+        return frames
+
+    def reset(self):
+        self._pending = b''
+
+
+class GridConnectCodec:
+    """
+    GridConnect framing for :class:`pyolcb.tcp.TCPConnection` and :class:`pyolcb.serial_port.SerialConnection`.
+    """
+    separator = b'\n'
+
+    def __init__(self, separator: bytes = b'\n') -> None:
+        self.separator = separator
+
+    def encode_many(self, frames: list[can.Message]) -> list[bytes]:
+        return [encode_many(frames, self.separator)]
+
+    def decoder(self):
+        return GridConnectDecoder()
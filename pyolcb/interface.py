@@ -1,38 +1,432 @@
 import can
 import socket
 import asyncio
+import logging
+import threading
+import time
+from collections import deque
 from .message import Message
 from .address import Address
+from . import message_types
+from .transmit import TransmitQueue
+from .tcp import TCPConnection
+from .serial_port import SerialConnection
+from .alias import AliasAllocator
+from .directory import NodeDirectory
+from .event import EventRangeIndex, EventPayloadReassembler
+from .scheduler import scheduler
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
+
 class InterfaceType(Enum):
     CAN = 0
     TCP = 1
+    SERIAL = 2
 
 class Interface:
-    network = []
+    """
+    Wrapper around a transport connection. Each :class:`Interface` owns a single receive loop which reads
+    every frame once, decodes it once, and routes the resulting :class:`Message` to the hosted nodes:
+
+    - addressed messages go straight to the node holding the destination alias
+    - global messages go to the nodes that subscribed to that message type
+    - event reports go to the nodes that consume that event (or subscribed to event reports); reports with a
+      payload are first reassembled from their frames
+
+    Parameters
+    ----------
+    connection : can.BusABC | socket.socket | tuple[str, int] | object
+        The bus to read from and write to, a TCP hub to connect to (as a connected socket or a (host, port) pair),
+        or an open serial port (any stream with ``read`` and ``write`` methods).
+    transmit_queue : bool | TransmitQueue = False
+        If set, messages are sent through a :class:`TransmitQueue` written by a background thread, and
+        :meth:`send` returns without waiting for the bus. Pass a :class:`TransmitQueue` to configure its
+        size and overflow policy, or ``True`` for the defaults.
+    codec : object = None
+        For TCP and serial connections, the framing used on the stream. Defaults to
+        :class:`pyolcb.gridconnect.GridConnectCodec`, as spoken by OpenLCB hubs and JMRI.
+    reconnect : bool = True
+        For TCP connections, whether to reconnect automatically when the connection drops.
+    """
+    network = None
     phy = None
     connection = None
-    def __init__(self, connection: can.BusABC | socket.socket) -> None:
+    transmit_queue = None
+    paced_frame_rate = 400.0
+
+    def __init__(self, connection: can.BusABC | socket.socket | tuple[str, int], transmit_queue: bool | TransmitQueue = False,
+                 codec=None, reconnect: bool = True) -> None:
         if isinstance(connection, can.BusABC):
             self.connection = connection
             self.phy = InterfaceType.CAN
+        elif isinstance(connection, (socket.socket, tuple)):
+            self.connection = TCPConnection(connection, codec, reconnect)
+            self.phy = InterfaceType.TCP
+        elif hasattr(connection, 'read') and hasattr(connection, 'write'):
+            self.connection = SerialConnection(connection, codec)
+            self.phy = InterfaceType.SERIAL
         else:
-            raise NotImplementedError("TCP/IP support is not yet implemented")
-        
-    def send(self, message:Message):
-        if self.phy == InterfaceType.CAN:
-            can_message = can.Message(arbitration_id=message.get_can_header(), data=message.data, is_extended_id=True)
-            return self.connection.send(can_message)
-        
+            raise NotImplementedError("Unsupported connection type")
+        self._notifier = None
+        self._listeners = ()
+        self._transmit_listeners = ()
+        self._nodes_by_alias = {}
+        self._mti_subscribers = {}
+        self._event_subscribers = {}
+        self._event_range_subscribers = EventRangeIndex()
+        self.event_payloads = EventPayloadReassembler()
+        self._promiscuous = ()
+        self.aliases = AliasAllocator(self)
+        self.network = NodeDirectory()
+        self._paced = deque()
+        self._paced_lock = threading.Lock()
+        self._pacing = False
+        if transmit_queue is True:
+            transmit_queue = TransmitQueue()
+        # An empty queue is falsy (it has a length), so test for the argument itself
+        if transmit_queue is not None and transmit_queue is not False:
+            self.transmit_queue = transmit_queue
+            self.transmit_queue.start(self._write_frames)
+
+    def send(self, message:Message, block: bool = True):
+        """
+        Send a :class:`Message`. If this :class:`Interface` has a transmit queue, the message is queued and
+        a :class:`concurrent.futures.Future` completing once it has been written is returned; with ``block=False``,
+        the future fails at once with :class:`TransmitQueueFull` rather than waiting for space in a full queue.
+        """
+        can_message = can.Message(arbitration_id=message.get_can_header(), data=message.data, is_extended_id=True)
+        if self.transmit_queue is not None:
+            return self.transmit_queue.put(can_message, block)
+        return self._write_frames([can_message])[0]
+
+    def send_many(self, messages: list[Message], block: bool = True):
+        """
+        Send an ordered list of messages. If this :class:`Interface` has a transmit queue, they are queued together
+        (so they are written back to back) and a single :class:`concurrent.futures.Future` is returned. ``block``
+        is as for :meth:`send`.
+        """
+        return self.send_frames(
+            [can.Message(arbitration_id=m.get_can_header(), data=m.data, is_extended_id=True) for m in messages], block)
+
+    def send_frames(self, frames: list[can.Message], block: bool = True):
+        """
+        Send an ordered list of raw CAN frames, as for :meth:`send_many`.
+        """
+        if self.transmit_queue is not None:
+            return self.transmit_queue.put(frames, block)
+        return self._write_frames(frames)
+
+    def send_paced(self, frames: list[can.Message]):
+        """
+        Send a (possibly long) list of frames at no more than ``paced_frame_rate`` frames per second, so that bulk
+        replies such as those to Identify Events leave room on the bus for other traffic. Paced frames from all
+        hosted nodes share the rate and are sent in order, in short bursts from the :mod:`pyolcb.scheduler` thread.
+        """
+        if not self.paced_frame_rate:
+            return self.send_frames(frames)
+        with self._paced_lock:
+            self._paced.extend(frames)
+            if self._pacing:
+                return
+            self._pacing = True
+        self._send_paced_burst()
+
+    def _send_paced_burst(self):
+        # Bursts of about 20 ms worth of frames keep the timer overhead low while staying close to the rate
+        with self._paced_lock:
+            count = min(len(self._paced), max(1, int(self.paced_frame_rate * 0.02)))
+            burst = [self._paced.popleft() for _ in range(count)]
+            if not burst:
+                self._pacing = False
+                return
+        try:
+            self.send_frames(burst)
+        except Exception:
+            logger.exception("Error sending paced frames")
+        scheduler.schedule(count / self.paced_frame_rate, self._send_paced_burst)
+
+    def _write_frames(self, frames: list[can.Message]) -> list:
+        match self.phy:
+            case InterfaceType.CAN:
+                results = [self.connection.send(frame) for frame in frames]
+            case InterfaceType.TCP | InterfaceType.SERIAL:
+                self.connection.send(frames)
+                results = [None] * len(frames)
+        if self._transmit_listeners:
+            now = time.time()
+            for frame in frames:
+                frame.is_rx = False
+                if not frame.timestamp:
+                    frame.timestamp = now
+                for listener in self._transmit_listeners:
+                    try:
+                        listener(frame)
+                    except Exception:
+                        logger.exception("Error in listener %s", listener)
+        return results
+
     def register_connected_device(self, address:Address):
-        if not address in self.network:
-            self.network.append(address)
+        """
+        Record the :class:`Address` of a locally hosted node in the :class:`NodeDirectory` ``network``.
+        """
+        self.network.add_address(address, local=True)
         return self.network
 
-    def register_listener(self, function:callable):
-        if self.phy == InterfaceType.CAN:
-            can.Notifier(self.connection, [function])
+    def register_listener(self, function:callable, transmitted: bool = False):
+        """
+        Register a function to be called with every raw frame received on this :class:`Interface`.
+
+        Parameters
+        ----------
+        function : callable
+            Called with each :class:`can.Message`.
+        transmitted : bool = False
+            Whether to also call it with every frame the hosted nodes send, once written (with ``is_rx`` set to
+            ``False``), so that it sees both sides of the traffic. The bus's echoes of them, if any, are not passed on.
+        """
+        self._listeners = self._listeners + (function,)
+        if transmitted:
+            self._transmit_listeners = self._transmit_listeners + (function,)
+        self._start()
 
     def list_connected_devices(self):
-        return self.network
+        return self.network.addresses()
+
+    def attach_node(self, node):
+        """
+        Host a :class:`Node` on this :class:`Interface`, so that messages addressed to its alias are routed to it.
+        """
+        if node.address.has_alias():
+            self._nodes_by_alias[node.address.get_alias()] = node
+        self._start()
+
+    def detach_node(self, node):
+        """
+        Stop routing any messages to a :class:`Node`.
+        """
+        if node.address.has_alias() and self._nodes_by_alias.get(node.address.get_alias()) is node:
+            del self._nodes_by_alias[node.address.get_alias()]
+        for mti in list(self._mti_subscribers):
+            self.unsubscribe(node, mti)
+        for event_id in list(self._event_subscribers):
+            self.unsubscribe_event(node, event_id)
+        for base, mask in self._event_range_subscribers.ranges():
+            self._event_range_subscribers.remove(base, mask, node)
+        self._promiscuous = tuple(x for x in self._promiscuous if x is not node)
+
+    def update_node_alias(self, node, old_alias: int = None):
+        """
+        Re-index a hosted :class:`Node` after its alias has changed.
+        """
+        if old_alias is not None and self._nodes_by_alias.get(old_alias) is node:
+            del self._nodes_by_alias[old_alias]
+        if node.address.has_alias():
+            self._nodes_by_alias[node.address.get_alias()] = node
+            self.network.add_address(node.address, local=True)
+
+    def release_alias(self, node):
+        """
+        Stop routing addressed messages to a hosted :class:`Node` while it reserves a new alias.
+        """
+        if node.address.has_alias() and self._nodes_by_alias.get(node.address.get_alias()) is node:
+            del self._nodes_by_alias[node.address.get_alias()]
+
+    def get_node(self, alias: int):
+        """
+        Get the hosted :class:`Node` with a given alias, or ``None``.
+        """
+        return self._nodes_by_alias.get(alias)
+
+    def hosted_nodes(self) -> list:
+        """
+        Get the hosted nodes which have an alias.
+        """
+        return list(self._nodes_by_alias.values())
+
+    def subscribe(self, node, message_type: message_types.MessageTypeIndicator | int = None):
+        """
+        Route global messages of a given type to a :class:`Node`. If no message type is given, every
+        global message is routed to the :class:`Node`.
+        """
+        if message_type is None:
+            if node not in self._promiscuous:
+                self._promiscuous = self._promiscuous + (node,)
+            return
+        mti = int(message_type)
+        subscribers = self._mti_subscribers.get(mti, ())
+        if node not in subscribers:
+            self._mti_subscribers[mti] = subscribers + (node,)
+
+    def unsubscribe(self, node, message_type: message_types.MessageTypeIndicator | int = None):
+        """
+        Stop routing global messages of a given type (or all global messages) to a :class:`Node`.
+        """
+        if message_type is None:
+            self._promiscuous = tuple(x for x in self._promiscuous if x is not node)
+            return
+        mti = int(message_type)
+        subscribers = tuple(x for x in self._mti_subscribers.get(mti, ()) if x is not node)
+        if subscribers:
+            self._mti_subscribers[mti] = subscribers
+        else:
+            self._mti_subscribers.pop(mti, None)
+
+    def subscribe_event(self, node, event_id: bytes):
+        """
+        Route event reports for a given event ID to a :class:`Node`.
+        """
+        event_id = bytes(event_id)
+        subscribers = self._event_subscribers.get(event_id, ())
+        if node not in subscribers:
+            self._event_subscribers[event_id] = subscribers + (node,)
+
+    def unsubscribe_event(self, node, event_id: bytes):
+        """
+        Stop routing event reports for a given event ID to a :class:`Node`.
+        """
+        event_id = bytes(event_id)
+        subscribers = tuple(x for x in self._event_subscribers.get(event_id, ()) if x is not node)
+        if subscribers:
+            self._event_subscribers[event_id] = subscribers
+        else:
+            self._event_subscribers.pop(event_id, None)
+
+    def subscribe_event_range(self, node, base: int, mask: int):
+        """
+        Route event reports for a range of event IDs (``base`` in all bits not set in ``mask``) to a :class:`Node`.
+        """
+        self._event_range_subscribers.add(base, mask, node)
+
+    def unsubscribe_event_range(self, node, base: int, mask: int):
+        """
+        Stop routing event reports for a range of event IDs to a :class:`Node`.
+        """
+        self._event_range_subscribers.remove(base, mask, node)
+
+    def dispatch(self, message: Message):
+        """
+        Route a decoded :class:`Message` to the hosted nodes interested in it.
+        """
+        destination = message.destination
+        if destination is not None:
+            node = self._nodes_by_alias.get(destination.get_alias())
+            if node is not None:
+                self._deliver(node, message)
+            return
+
+        mti = message.message_type.value
+        nodes = self._mti_subscribers.get(mti, ())
+        if mti == message_types.Producer_Consumer_Event_Report.value:
+            consumers = self._event_subscribers.get(bytes(message.data), ())
+            if self._event_range_subscribers:
+                ranges = self._event_range_subscribers.match(int.from_bytes(message.data[:8], 'big'))
+                consumers = consumers + tuple(x for x in ranges if x not in consumers)
+            if consumers:
+                nodes = consumers + tuple(x for x in nodes if x not in consumers)
+        if self._promiscuous:
+            nodes = nodes + tuple(x for x in self._promiscuous if x not in nodes)
+        for node in nodes:
+            self._deliver(node, message)
+
+    def receive_frame(self, frame: can.Message):
+        """
+        Process a frame as if it had been received on this :class:`Interface`, e.g. when replaying a capture.
+        """
+        self._receive(frame)
+
+    def _deliver(self, node, message: Message):
+        try:
+            node.process_message(message)
+        except Exception:
+            logger.exception("Error processing message for node %s", node.address)
+
+    def _receive(self, can_message: can.Message):
+        for listener in self._listeners:
+            if not can_message.is_rx and listener in self._transmit_listeners:
+                # An echo of a frame already passed to the listener when it was written
+                continue
+            try:
+                listener(can_message)
+            except Exception:
+                logger.exception("Error in listener %s", listener)
+        if self.aliases.process_frame(can_message):
+            self.network.process_control_frame(can_message)
+            return
+        message = Message.from_can_message(can_message)
+        if message is not None:
+            self.network.process_message(message)
+            if self.event_payloads.handles(message):
+                # Event reports with payloads are routed like any other once all their frames have arrived
+                message = self.event_payloads.add(message)
+                if message is None:
+                    return
+            self.dispatch(message)
+
+    def _start(self):
+        if self._notifier is None and self.phy == InterfaceType.CAN:
+            self._notifier = can.Notifier(self.connection, [self._receive])
+        elif self.phy in (InterfaceType.TCP, InterfaceType.SERIAL):
+            self.connection.start(self._receive)
+
+    def stop(self):
+        """
+        Stop the receive loop (and transmit queue, once drained) of this :class:`Interface`.
+        """
+        with self._paced_lock:
+            self._paced.clear()
+        if self.transmit_queue is not None:
+            self.transmit_queue.close()
+        if self.phy in (InterfaceType.TCP, InterfaceType.SERIAL):
+            self.connection.close()
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+
+
+class AsyncInterface(Interface):
+    """
+    :class:`Interface` whose receive loop runs on an :mod:`asyncio` event loop. Frames are read through a
+    :class:`can.AsyncBufferedReader` and routed to the hosted nodes from a task on that loop, so
+    :class:`AsyncNode` handlers never run on a separate thread.
+
+    Parameters
+    ----------
+    connection : can.BusABC
+        The bus to read from and write to.
+    loop : asyncio.AbstractEventLoop = None
+        The event loop to run on. Defaults to the running event loop when the first :class:`Node` attaches.
+    """
+    loop = None
+
+    def __init__(self, connection: can.BusABC, loop: asyncio.AbstractEventLoop = None,
+                 transmit_queue: bool | TransmitQueue = False) -> None:
+        super().__init__(connection, transmit_queue)
+        self.loop = loop
+        self._reader = None
+        self._reader_task = None
+
+    def _start(self):
+        if self._notifier is None and self.phy == InterfaceType.CAN:
+            if self.loop is None:
+                self.loop = asyncio.get_running_loop()
+            self._reader = can.AsyncBufferedReader()
+            self._notifier = can.Notifier(self.connection, [self._reader], loop=self.loop)
+            self._reader_task = self.loop.create_task(self._read())
+
+    async def _read(self):
+        async for can_message in self._reader:
+            self._receive(can_message)
+
+    def stop(self):
+        """
+        Stop the receive loop of this :class:`AsyncInterface`.
+        """
+        super().stop()
+        if self._reader is not None:
+            self._reader.stop()
+            self._reader = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
@@ -0,0 +1,445 @@
+"""
+==============
+memory_config
+==============
+
+Client for the OpenLCB Memory Configuration Protocol, which reads and writes the address spaces (configuration,
+CDI, ...) of other nodes using datagrams.
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+from . import message_types
+from .address import Address
+from .exceptions import MemoryConfigError
+
+MEMORY_CONFIG = 0x20
+MAX_READ_LENGTH = 64
+
+SPACE_CDI = 0xFF
+SPACE_ALL = 0xFE
+SPACE_CONFIG = 0xFD
+SPACE_ACDI_MANUFACTURER = 0xFC
+SPACE_ACDI_USER = 0xFB
+
+_WRITE = 0x00
+_WRITE_REPLY = 0x10
+_WRITE_FAILED = 0x18
+_READ = 0x40
+_READ_REPLY = 0x50
+_READ_FAILED = 0x58
+_GET_SPACE_INFO = 0x84
+_SPACE_INFO_PRESENT = 0x86
+_SPACE_INFO_ABSENT = 0x87
+_LOCK = 0x88
+_LOCK_REPLY = 0x8A
+
+_REPLY_PENDING = 0x80
+
+
+def _space_command(command: int, space: int, address: int) -> bytes:
+    # Spaces 0xFD-0xFF are encoded in the low bits of the command, others in a byte after the address
+    if space >= 0xFD:
+        return bytes([MEMORY_CONFIG, command | (space - 0xFC)]) + address.to_bytes(4, 'big')
+    return bytes([MEMORY_CONFIG, command]) + address.to_bytes(4, 'big') + bytes([space])
+
+
+def _chunks(address: int, length: int):
+    # Split at 64-byte boundaries, so that repeated reads of a range use the same (cacheable) requests
+    end = address + length
+    while address < end:
+        size = min(MAX_READ_LENGTH - address % MAX_READ_LENGTH, end - address)
+        yield address, size
+        address += size
+
+
+def _chain(source: Future, target: Future):
+    def copy(future):
+        if future.exception() is not None:
+            target.set_exception(future.exception())
+        else:
+            target.set_result(future.result())
+    source.add_done_callback(copy)
+
+
+class AddressSpaceInfo:
+    """
+    Description of an address space, as returned by :meth:`MemoryConfigClient.get_space_info`.
+
+    Attributes
+    ----------
+    space : int
+        The address space number.
+    present : bool
+        Whether the node has this address space.
+    highest_address : int
+        The highest address in the space.
+    lowest_address : int
+        The lowest address in the space.
+    read_only : bool
+        Whether the space is read-only.
+    description : str
+        Optional description of the space.
+    """
+    def __init__(self, space: int, present: bool, highest_address: int = 0, lowest_address: int = 0,
+                 read_only: bool = False, description: str = '') -> None:
+        self.space = space
+        self.present = present
+        self.highest_address = highest_address
+        self.lowest_address = lowest_address
+        self.read_only = read_only
+        self.description = description
+
+    @property
+    def size(self) -> int:
+        return self.highest_address - self.lowest_address + 1 if self.present else 0
+
+    @staticmethod
+    def from_reply(data: bytes):
+        space = data[2]
+        if data[1] != _SPACE_INFO_PRESENT:
+            return AddressSpaceInfo(space, False)
+        highest = int.from_bytes(data[3:7], 'big')
+        flags = data[7] if len(data) > 7 else 0
+        lowest = int.from_bytes(data[8:12], 'big') if flags & 0x02 else 0
+        description = bytes(data[12 if flags & 0x02 else 8:]).split(b'\0')[0].decode('utf-8', 'replace')
+        return AddressSpaceInfo(space, True, highest, lowest, bool(flags & 0x01), description)
+
+
+class _Request:
+    __slots__ = ('destination', 'key', 'payload', 'future', 'timer')
+
+    def __init__(self, destination: Address, key: tuple, payload: bytes) -> None:
+        self.destination = destination
+        self.key = key
+        self.payload = payload
+        self.future = Future()
+        self.timer = None
+
+
+class MemoryConfigClient:
+    """
+    Reads and writes the memory of other nodes using the Memory Configuration Protocol.
+
+    Reads longer than 64 bytes are split into several requests, and up to ``max_in_flight`` requests to each node
+    are outstanding at once: the next request is sent as soon as the node accepts the previous datagram, rather
+    than after its reply arrives. Requests to different nodes proceed independently.
+
+    Data read is cached per node and address space, so that reading the same range again does not go back to
+    the network. Writes invalidate the cached data they overlap, and all cached data for a node is discarded when
+    it sends Initialization Complete.
+
+    Parameters
+    ----------
+    node : Node
+        The local :class:`pyolcb.Node` to send requests from.
+    max_in_flight : int = 4
+        Maximum number of requests outstanding to each node.
+    timeout : float = 3.0
+        Seconds to wait for the reply to each request after the node has accepted it.
+    cache : bool = True
+        Whether to cache data read.
+    """
+    def __init__(self, node, max_in_flight: int = 4, timeout: float = 3.0, cache: bool = True) -> None:
+        self.node = node
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.cache_enabled = cache
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._queued = {}
+        self._in_flight = {}
+        self._cache = {}
+        self._space_info = {}
+        node.add_datagram_handler(MEMORY_CONFIG, self._process_datagram)
+        for mti in (message_types.Initialization_Complete, message_types.Initialization_Complete_Simple):
+            node.chain_message_handler(mti, self._initialized)
+
+    def read(self, destination: Address, space: int, address: int, length: int, cache: bool = True) -> Future:
+        """
+        Read from an address space of another node.
+
+        Parameters
+        ----------
+        destination : Address
+            The node to read from.
+        space : int
+            The address space, e.g. ``SPACE_CONFIG``.
+        address : int
+            The address to start reading from.
+        length : int
+            The number of bytes to read.
+        cache : bool = True
+            Whether data may be taken from (and stored in) the cache.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the data read (which is shorter than ``length`` if the space ends first), or fails with
+            :class:`pyolcb.exceptions.MemoryConfigError` or :class:`TimeoutError`.
+        """
+        cache = cache and self.cache_enabled
+        stored = self._cache.setdefault((destination.get_alias(), space), {}) if cache else None
+        parts = []
+        for chunk_address, size in _chunks(address, length):
+            data = stored.get((chunk_address, size)) if cache else None
+            if data is not None:
+                self.cache_hits += 1
+                part = Future()
+                part.set_result(data)
+            else:
+                part = self._submit(destination, (destination.get_alias(), _READ, space, chunk_address),
+                                    _space_command(_READ, space, chunk_address) + bytes([size]))
+                if cache:
+                    part.add_done_callback(self._store(stored, chunk_address, size))
+            parts.append(part)
+        return self._gather(parts)
+
+    def write(self, destination: Address, space: int, address: int, data: bytes) -> Future:
+        """
+        Write to an address space of another node.
+
+        Parameters
+        ----------
+        destination : Address
+            The node to write to.
+        space : int
+            The address space, e.g. ``SPACE_CONFIG``.
+        address : int
+            The address to start writing at.
+        data : bytes
+            The data to write.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves once the node has confirmed every write, or fails with
+            :class:`pyolcb.exceptions.MemoryConfigError` or :class:`TimeoutError`.
+        """
+        data = memoryview(bytes(data))
+        self._invalidate_range(destination, space, address, len(data))
+        parts = []
+        for chunk_address, size in _chunks(address, len(data)):
+            offset = chunk_address - address
+            parts.append(self._submit(destination, (destination.get_alias(), _WRITE, space, chunk_address),
+                                      _space_command(_WRITE, space, chunk_address) + data[offset:offset + size]))
+        future = self._gather(parts)
+        future.add_done_callback(lambda _: self._invalidate_range(destination, space, address, len(data)))
+        return future
+
+    def get_space_info(self, destination: Address, space: int) -> Future:
+        """
+        Get the size and properties of an address space of another node.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to an :class:`AddressSpaceInfo`.
+        """
+        info = self._space_info.get((destination.get_alias(), space)) if self.cache_enabled else None
+        if info is not None:
+            future = Future()
+            future.set_result(info)
+            return future
+        future = self._submit(destination, (destination.get_alias(), _GET_SPACE_INFO, space),
+                              bytes([MEMORY_CONFIG, _GET_SPACE_INFO, space]))
+        if self.cache_enabled:
+            future.add_done_callback(self._store(self._space_info, destination.get_alias(), space))
+        return future
+
+    def read_space(self, destination: Address, space: int) -> Future:
+        """
+        Read the whole of an address space of another node, e.g. to back up its configuration.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the contents of the space (empty if the node does not have it).
+        """
+        future = Future()
+
+        def read(info_future):
+            if info_future.exception() is not None:
+                future.set_exception(info_future.exception())
+                return
+            info = info_future.result()
+            _chain(self.read(destination, space, info.lowest_address, info.size), future)
+
+        self.get_space_info(destination, space).add_done_callback(read)
+        return future
+
+    def lock(self, destination: Address, node_id: bytes = None) -> Future:
+        """
+        Reserve another node for configuration by this node (or the given node ID; all zeros releases the lock).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the node ID now holding the lock; if this is not the requested ID, another node holds it.
+        """
+        node_id = self.node.address.full if node_id is None else bytes(node_id)
+        return self._submit(destination, (destination.get_alias(), _LOCK),
+                            bytes([MEMORY_CONFIG, _LOCK]) + node_id)
+
+    def unlock(self, destination: Address) -> Future:
+        """
+        Release a lock taken with :meth:`lock`.
+        """
+        return self.lock(destination, bytes(6))
+
+    def invalidate(self, destination: Address = None, space: int = None):
+        """
+        Discard cached data and space information, for one node (and optionally one space), or for all nodes.
+        """
+        with self._lock:
+            if destination is None:
+                self._cache.clear()
+                self._space_info.clear()
+                return
+            alias = destination.get_alias()
+            for store in (self._cache, self._space_info):
+                for key in [x for x in store if x[0] == alias and (space is None or x[1] == space)]:
+                    del store[key]
+
+    def _initialized(self, message):
+        self.invalidate(message.source)
+
+    def _invalidate_range(self, destination: Address, space: int, address: int, length: int):
+        stored = self._cache.get((destination.get_alias(), space))
+        if not stored:
+            return
+        with self._lock:
+            for key in [x for x in stored if x[0] < address + length and address < x[0] + x[1]]:
+                del stored[key]
+
+    def _store(self, stored: dict, *key):
+        def store(future):
+            if future.exception() is None:
+                stored[key] = future.result()
+        return store
+
+    def _gather(self, parts: list[Future]) -> Future:
+        if len(parts) == 1:
+            return parts[0]
+        future = Future()
+        remaining = [len(parts)]
+        lock = threading.Lock()
+
+        def done(part):
+            with lock:
+                if future.done():
+                    return
+                if part.exception() is not None:
+                    future.set_exception(part.exception())
+                    return
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            future.set_result(b''.join(x.result() or b'' for x in parts))
+
+        if not parts:
+            future.set_result(b'')
+        for part in parts:
+            part.add_done_callback(done)
+        return future
+
+    def _submit(self, destination: Address, key: tuple, payload: bytes) -> Future:
+        alias = destination.get_alias()
+        with self._lock:
+            existing = self._pending.get(key)
+            if existing is not None:
+                if existing.payload == payload:
+                    return existing.future
+                # Replies can only be matched by address, so wait for the earlier request to the same address
+                future = Future()
+                existing.future.add_done_callback(lambda _: _chain(self._submit(destination, key, payload), future))
+                return future
+            request = _Request(destination, key, payload)
+            self._pending[key] = request
+            start = self._in_flight.get(alias, 0) < self.max_in_flight
+            if start:
+                self._in_flight[alias] = self._in_flight.get(alias, 0) + 1
+            else:
+                self._queued.setdefault(alias, deque()).append(request)
+        if start:
+            self._transmit(request)
+        return request.future
+
+    def _transmit(self, request: _Request):
+        try:
+            sent = self.node.send_datagram(request.payload, request.destination)
+        except Exception as e:
+            self._complete(request, exception=e)
+            return
+        sent.add_done_callback(lambda f: self._accepted(request, f))
+
+    def _accepted(self, request: _Request, sent: Future):
+        if sent.exception() is not None:
+            self._complete(request, exception=sent.exception())
+            return
+        reply = sent.result()
+        if request.key[1] == _WRITE and not (len(reply.data) > 2 and reply.data[2] & _REPLY_PENDING):
+            self._complete(request)
+            return
+        with self._lock:
+            if self._pending.get(request.key) is not request:
+                return
+            request.timer = threading.Timer(self.timeout, self._complete, (request,),
+                                            {'exception': TimeoutError("No reply to memory configuration request")})
+            request.timer.daemon = True
+            request.timer.start()
+
+    def _complete(self, request: _Request, result=None, exception: Exception = None):
+        alias = request.destination.get_alias()
+        with self._lock:
+            if self._pending.get(request.key) is not request:
+                return
+            del self._pending[request.key]
+            if request.timer is not None:
+                request.timer.cancel()
+            queued = self._queued.get(alias)
+            following = queued.popleft() if queued else None
+            if following is None:
+                self._in_flight[alias] -= 1
+                if queued is not None:
+                    del self._queued[alias]
+        if exception is not None:
+            request.future.set_exception(exception)
+        else:
+            request.future.set_result(result)
+        if following is not None:
+            self._transmit(following)
+
+    def _process_datagram(self, datagram):
+        data = datagram.data
+        if len(data) < 2:
+            return
+        alias = datagram.source.get_alias()
+        command = data[1]
+        match command & 0xF0, command:
+            case (0x50 | 0x10, _):
+                if len(data) < 6:
+                    return
+                if command & 0x03:
+                    space, payload = 0xFC + (command & 0x03), data[6:]
+                else:
+                    space, payload = data[6], data[7:]
+                request = self._pending.get((alias, _READ if command & _READ else _WRITE, space,
+                                             int.from_bytes(data[2:6], 'big')))
+                if request is None:
+                    return
+                if command & 0x08:
+                    self._complete(request, exception=MemoryConfigError(
+                        int.from_bytes(payload[:2], 'big'),
+                        bytes(payload[2:]).split(b'\0')[0].decode('utf-8', 'replace')))
+                else:
+                    self._complete(request, bytes(payload))
+            case (_, 0x86 | 0x87):
+                request = self._pending.get((alias, _GET_SPACE_INFO, data[2]))
+                if request is not None:
+                    self._complete(request, AddressSpaceInfo.from_reply(data))
+            case (_, 0x8A):
+                request = self._pending.get((alias, _LOCK))
+                if request is not None:
+                    self._complete(request, bytes(data[2:8]))
@@ -1,11 +1,18 @@
 from .address import Address
-from .message_types import MessageTypeIndicator, is_known_mti
+from .message_types import MessageTypeIndicator, MTI
 import can
 
+# Frame IDs of the datagram frame types (only, first, middle, last)
+_frame_ids = {
+    0x1A: None,
+    0x1B: 1,
+    0x1C: 2,
+    0x1D: -1,
+}
+
 class Message:
-    source = None
-    destination = None
-    data = bytes(8)
+    __slots__ = ('source', 'destination', 'data', 'message_type', 'frame_id')
+
     def __init__(self, message_type:MessageTypeIndicator, data:bytes | bytearray = None, source:Address = None, destination:Address = None, frame_id:int = None) -> None:
         self.source = source
         self.destination = destination
@@ -31,22 +38,84 @@ class Message:
     @classmethod
     def from_can_message(cls, message:can.Message):
         if message.is_extended_id:
-            mti = MessageTypeIndicator.from_can_header(message.arbitration_id)
-            frame_id = None
-            destination = None
-            match (message.arbitration_id >> 24):
-                case 0x1A:
-                    frame_id = None
-                case 0x1B:
-                    frame_id = 1
-                case 0x1D:
-                    frame_id = -1
-                case 0x1C:
-                    frame_id = 2
-            if is_known_mti(mti):
-                return cls(mti,message.data, Address(alias=message.arbitration_id & 0xFFF), destination, frame_id)
+            header = message.arbitration_id
+            mti = MessageTypeIndicator.from_can_header(header)
+            if isinstance(mti, MTI):
+                data = message.data
+                destination = None
+                if (header >> 24) != 0x19:
+                    destination = Address.from_alias((header >> 12) & 0xFFF)
+                elif mti.value & 0x0008 and len(data) >= 2:
+                    destination = Address.from_alias(((data[0] & 0x0F) << 8) | data[1])
+                return cls(mti, data, Address.from_alias(header & 0xFFF), destination, _frame_ids.get(header >> 24))
             else:
                 return None
         else:
             return None
-        
+
+
+# Framing bits in the high nibble of the first data byte of addressed messages sent in several frames
+FRAME_ONLY = 0x00
+FRAME_FIRST = 0x10
+FRAME_LAST = 0x20
+FRAME_MIDDLE = 0x30
+
+
+def addressed_messages(message_type: MessageTypeIndicator, payload: bytes | bytearray | memoryview, source: Address,
+                       destination: Address) -> list[Message]:
+    """
+    Split the payload of an addressed message into as many frames as needed: each frame starts with the destination
+    alias and the framing bits (first, middle or last), followed by up to 6 bytes of the payload.
+    """
+    payload = memoryview(bytes(payload))
+    alias = destination.get_alias()
+    if len(payload) <= 6:
+        return [Message(message_type, alias.to_bytes(2, 'big') + payload, source, destination)]
+    starts = range(0, len(payload), 6)
+    messages = []
+    for start in starts:
+        framing = FRAME_FIRST if start == 0 else FRAME_LAST if start == starts[-1] else FRAME_MIDDLE
+        messages.append(Message(message_type, bytes([framing | alias >> 8, alias & 0xFF]) + payload[start:start + 6],
+                                source, destination))
+    return messages
+
+
+class AddressedReassembler:
+    """
+    Reassembles the payloads of addressed messages sent in several frames (as by :func:`addressed_messages`),
+    keyed by source alias and message type. A first frame replaces any incomplete payload from the same source.
+
+    Parameters
+    ----------
+    max_length : int = 256
+        Maximum payload length; longer payloads are discarded.
+    """
+    def __init__(self, max_length: int = 256) -> None:
+        self.max_length = max_length
+        self._partial = {}
+
+    def add(self, message: Message) -> bytes | None:
+        """
+        Add a received frame. Returns the payload (after the destination alias) once complete, otherwise ``None``.
+        """
+        key = (message.source.get_alias(), message.message_type.value)
+        payload = message.data[2:]
+        framing = message.data[0] & 0xF0
+        match framing:
+            case 0x00:  # FRAME_ONLY
+                self._partial.pop(key, None)
+                return bytes(payload)
+            case 0x10:  # FRAME_FIRST
+                self._partial[key] = bytearray(payload)
+                return None
+        buffer = self._partial.get(key)
+        if buffer is None:
+            return None
+        buffer += payload
+        if len(buffer) > self.max_length:
+            del self._partial[key]
+            return None
+        if framing == FRAME_LAST:
+            del self._partial[key]
+            return bytes(buffer)
+        return None
@@ -1,7 +1,12 @@
 from .address import Address
 
+# Registry of every defined message type, keyed by its integer MTI value.
+_registry = {}
+
 
 class MessageTypeIndicator:
+    __slots__ = ('value',)
+
     def __init__(self, mti: int):
         self.value = mti
 
@@ -9,13 +14,28 @@ class MessageTypeIndicator:
         return self.value
 
     def __eq__(self, x: object) -> bool:
-        return (self.value == x.value)
+        if x is self:
+            return True
+        if isinstance(x, MessageTypeIndicator):
+            return self.value == x.value
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __repr__(self) -> str:
+        return "%s(0x%04X)" % (type(self).__name__, self.value)
 
     def get_can_header(self, source: Address, destination: Address = None, frame_id: int = None) -> int:
-        temp_bytes = ((0x0FFF & self.value) << 12) | source.get_alias()
         if self.value & (0b1 << 12):
             if not destination is None:
-                temp_bytes = temp_bytes | destination.get_alias() << 12
+                temp_bytes = destination.get_alias() << 12 | source.get_alias()
+                frame_type = _single_frame_type.get(self.value)
+                if frame_type is not None:
+                    return int(temp_bytes | frame_type << 24)
                 match frame_id:
                     case None:
                         return int(temp_bytes | 0x1A000000)
@@ -28,7 +48,7 @@ class MessageTypeIndicator:
             else:
                 raise Exception("Destination address not provided")
         else:
-            return int(temp_bytes | 0x19000000)
+            return int(((0x0FFF & self.value) << 12) | source.get_alias() | 0x19000000)
     
     def get_can_header_bytes(self, source: Address, destination: Address = None, frame_id: int = None) -> bytes:
         return self.get_can_header(source, destination, frame_id).to_bytes(4, 'big')
@@ -36,17 +56,46 @@ class MessageTypeIndicator:
 
     @classmethod
     def from_can_header(cls, can_header: int):
-        mti = 0x0000
-        if (can_header >> 24) in [0x1A, 0x1B, 0x1C, 0x1D]:
-            return cls(0x1C48)
-        if (can_header >> 24) == 0x1F:
-            mti = 0x1000
-        mti = mti | ((can_header >> 12) & 0x00FFF)
-        return cls(mti)
+        """
+        Decode the message type of a CAN frame.
+
+        Returns the canonical (interned) :class:`MTI` for known message types, otherwise a new
+        unregistered :class:`MessageTypeIndicator`.
+        """
+        frame_type = (can_header >> 24) & 0x1F
+        if frame_type == 0x19:
+            mti = (can_header >> 12) & 0x0FFF
+            known = _registry.get(mti)
+            if known is not None:
+                return known
+            return MessageTypeIndicator(mti)
+        fixed = _frame_type_mti.get(frame_type)
+        if fixed is not None:
+            return fixed
+        # Not an OpenLCB message frame (e.g. CAN control frames), never matches a registered MTI
+        return MessageTypeIndicator((can_header >> 12) & 0x1FFFF)
 
 
 class MTI(MessageTypeIndicator):
-    pass
+    """
+    A defined (known) message type. Instances are interned, so constructing an :class:`MTI` for a
+    value that already exists returns the existing object.
+    """
+    __slots__ = ()
+
+    def __new__(cls, mti: int):
+        instance = _registry.get(mti)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.value = mti
+            _registry[mti] = instance
+        return instance
+
+    def __init__(self, mti: int):
+        pass
+
+    def __reduce__(self):
+        return (MTI, (self.value,))
 
 
 Initialization_Complete = MTI(0x0100)
@@ -100,8 +149,31 @@ Stream_Data_Complete = MTI(0x08A8)
 Node_number_Allocate = MTI(0x2000)
 No_Filtering = MTI(0x2020)
 
-def is_known_mti(mti:MessageTypeIndicator) -> bool:
-    if mti in locals().values():
-        return True
-    else:
-        return False
+# CAN frame types whose message type is implied by the frame type rather than carried in the header
+_frame_type_mti = {
+    0x1A: Datagram,
+    0x1B: Datagram,
+    0x1C: Datagram,
+    0x1D: Datagram,
+    0x1F: Stream_Data_Send,
+}
+# Message types always sent in one CAN frame type, other than datagrams (which use one of four by position)
+_single_frame_type = {mti.value: frame_type for frame_type, mti in _frame_type_mti.items() if mti is not Datagram}
+
+
+def is_known_mti(mti: MessageTypeIndicator | int) -> bool:
+    if isinstance(mti, MessageTypeIndicator):
+        return mti.value in _registry
+    return mti in _registry
+
+
+def get_mti(value: int) -> MTI:
+    """
+    Look up the canonical :class:`MTI` for an integer MTI value.
+
+    Returns
+    -------
+    MTI
+        The registered :class:`MTI`, or ``None`` if the value is not a known message type.
+    """
+    return _registry.get(value)
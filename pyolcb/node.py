@@ -8,10 +8,19 @@ node
 
 from .address import Address
 from .interface import Interface
-from .message import Message
-from .event import Event
-from .datagram import Datagram
+from .message import Message, addressed_messages
+from .event import Event, EventRangeIndex, encode_event_range, payload_messages
+from .datagram import Datagram, DatagramReassembler
+from .alias import AliasReservation, control_frame, AMD, AMR
+from .executor import InlineExecutor
+from .snip import SNIPRecord
+from .stream import (StreamSender, StreamReceiver, DEFAULT_BUFFER_SIZE, STREAM_ACCEPT, STREAM_REJECT_PERMANENT,
+                     STREAM_REJECT_INVALID_REQUEST)
 from . import utilities, message_types, protocols, exceptions
+from collections import deque
+import asyncio
+import concurrent.futures
+import threading
 import can
 
 
@@ -19,21 +28,41 @@ class Node:
     """
     Implementation of an OpenLCB/LCC :class:`Node`.
 
+    If the address has no alias, one is reserved on the CAN bus (Check ID, 200 ms wait, Reserve ID, Alias Map
+    Definition) before the :class:`Node` sends Initialization Complete; wait for ``initialized`` before sending
+    anything. Nodes reserve aliases concurrently, and a :class:`Node` whose alias is later used by another node
+    releases it and reserves a new one.
+
     Parameters
     ----------
     address : Address
         The address (full and alias) to be associated with the :class:`Node`.
     interfaces : int, Interface | list[Interface]
         An :class:`Interface` or list thereof to connect the :class:`Node` to.
+
+    Attributes
+    ----------
+    initialized : concurrent.futures.Future
+        Resolves to the :class:`Node`'s alias once it has sent Initialization Complete.
     """
     address = None
-    supported_protocols = protocols.Protocol()
-    interfaces = []
-    consumers = {}
+    supported_protocols = protocols.Protocol.DATAGRAM | protocols.Protocol.STREAM | protocols.Protocol.EVENT_EXCHANGE
+    interfaces = None
+    consumers = None
     datagram_handler = lambda *args: None
+    stream_handler = lambda *args: None
     unknown_message_processor = lambda *args: None
     simple = False
-    _datagram_queue = {}
+    permitted = True
+    message_handlers = None
+    datagram_reassembler = None
+    executor = None
+    snip = None
+    datagram_timeout = 3.0
+    datagram_retries = 3
+    datagram_retry_delay = 0.1
+    stream_buffer_size = DEFAULT_BUFFER_SIZE
+    stream_timeout = 3.0
 
     def __init__(self, address: Address, interfaces: Interface | list[Interface]):
         """
@@ -47,10 +76,46 @@ class Node:
             An :class:`Interface` or list thereof to attach the :class:`Node` to.
         """
         self.address = address
-        if not self.address.has_alias():
-            if self.address.alias is None:
-                self.address.set_alias(
-                    self.address.get_full_address() & 0xFFF)  # temporary
+        self.interfaces = []
+        self.consumers = {}
+        self.consumer_ranges = EventRangeIndex()
+        self.producer_ranges = EventRangeIndex()
+        self.producers = set()
+        self._identify_frames = None
+        self._snip_frames = {}
+        self._protocol_reply = None
+        if self.datagram_reassembler is None:
+            self.datagram_reassembler = DatagramReassembler()
+        if self.datagram_reassembler.reject is None:
+            self.datagram_reassembler.reject = self._reject_stale_datagram
+        if self.executor is None:
+            self.executor = InlineExecutor()
+        self._datagram_outbox = {}
+        self._datagram_lock = threading.Lock()
+        self._stream_lock = threading.Lock()
+        self._streams_out = {}
+        self._streams_in = {}
+        self.datagram_handlers = {}
+        self.message_handlers = {
+            message_types.Verify_Node_ID_Number_Addressed.value: self._process_verify_node_id_addressed,
+            message_types.Verify_Node_ID_Number_Global.value: self._process_verify_node_id_global,
+            message_types.Protocol_Support_Inquiry.value: self._process_protocol_support_inquiry,
+            message_types.Producer_Consumer_Event_Report.value: self._process_event,
+            message_types.Identify_Consumer.value: self._process_identify_consumer,
+            message_types.Identify_Producer.value: self._process_identify_producer,
+            message_types.Identify_Events_Global.value: self._process_identify_events,
+            message_types.Identify_Events_Addressed.value: self._process_identify_events,
+            message_types.Datagram.value: self._process_datagram,
+            message_types.Datagram_Received_OK.value: self._process_datagram_received_ok,
+            message_types.Datagram_Rejected.value: self._process_datagram_rejected,
+            message_types.Stream_Initiate_Request.value: self._process_stream_initiate_request,
+            message_types.Stream_Initiate_Reply.value: self._process_stream_initiate_reply,
+            message_types.Stream_Data_Send.value: self._process_stream_data,
+            message_types.Stream_Data_Proceed.value: self._process_stream_proceed,
+            message_types.Stream_Data_Complete.value: self._process_stream_complete,
+        }
+        self.initialized = concurrent.futures.Future()
+        self.alias_reservation = None
 
         if isinstance(interfaces, Interface):
             self.interfaces.append(interfaces)
@@ -59,16 +124,63 @@ class Node:
         else:
             raise Exception("No Interfaces to attach to")
 
+        if self.address.has_alias():
+            self._send_initialization_complete()
+        elif self.address.get_full_address() is None:
+            raise Exception("A full address is required to reserve an alias")
+        else:
+            self.permitted = False
+
+        for interface in self.interfaces:
+            interface.register_connected_device(self.address)
+            interface.attach_node(self)
+            for mti in self.message_handlers:
+                # Event reports are routed by consumed event ID instead
+                if mti != message_types.Producer_Consumer_Event_Report.value:
+                    interface.subscribe(self, mti)
+
+        if not self.address.has_alias():
+            self._reserve_alias()
+        if self.snip is not None:
+            self.set_snip(self.snip)
+
+    def _send_initialization_complete(self):
         if not self.simple:
             self.send(Message(message_types.Initialization_Complete,
                       bytes(self.address), self.address))
         else:
             self.send(Message(message_types.Initialization_Complete_Simple, bytes(
                 self.address), self.address))
+        if not self.initialized.done():
+            self.initialized.set_result(self.address.get_alias())
+
+    def _reserve_alias(self):
+        self.permitted = False
+        self.alias_reservation = AliasReservation(self.address.get_full_address(), self.interfaces,
+                                                  self._alias_reserved)
+        self.alias_reservation.future.add_done_callback(self._alias_reservation_failed)
+        self.alias_reservation.start()
+
+    def _alias_reservation_failed(self, future: concurrent.futures.Future):
+        if future.exception() is not None and not self.initialized.done():
+            self.initialized.set_exception(future.exception())
+
+    def _alias_reserved(self, alias: int):
+        self.set_alias(alias)
+        self.permitted = True
+        self._send_frames([control_frame(alias, AMD, self.address.full)])
+        if not self.initialized.done():
+            self._send_initialization_complete()
 
+    def _alias_collision(self):
+        # Another node is using this node's alias: release it and reserve a new one
+        if not self.permitted:
+            return
+        self.permitted = False
+        self._send_frames([control_frame(self.get_alias(), AMR, self.address.full)])
         for interface in self.interfaces:
-            interface.register_connected_device(self.address)
-            interface.register_listener(self.process_message)
+            interface.release_alias(self)
+        self._reserve_alias()
 
     def get_alias(self) -> int:
         """
@@ -85,9 +197,16 @@ class Node:
             return self.address.get_alias()
 
     def set_alias(self, alias: utilities.byte_options):
-        return self.address.set_alias(alias)
+        old_alias = self.address.get_alias() if self.address.has_alias() else None
+        alias = self.address.set_alias(alias)
+        self._identify_frames = None
+        self._snip_frames = {}
+        self._protocol_reply = None
+        for interface in self.interfaces:
+            interface.update_node_alias(self, old_alias)
+        return alias
 
-    def send(self, messages: Message | list[Message]):
+    def send(self, messages: Message | list[Message], block: bool = True):
         """
         Send a :class:`Message` (or sequence thereof) from this :class:`Node` on all registered interfaces.
 
@@ -95,16 +214,26 @@ class Node:
         ----------
         messages : Message | list[Message]
             The :class:`Message` (or ordered list thereof) to send
+        block : bool = True
+            For interfaces with a transmit queue, whether to wait for space if the queue is full. If ``False``, the
+            returned future fails at once with :class:`TransmitQueueFull` instead, e.g. so that a consumer replying
+            from the receive thread never stalls it.
+
+        Returns
+        -------
+        list
+            The result of sending on each interface: a list of per-message results, or a
+            :class:`concurrent.futures.Future` for interfaces with a transmit queue.
         """
         if isinstance(messages, Message):
             messages = [messages]
 
         if len(self.interfaces) > 0:
-            return [[i.send(m) for m in messages] for i in self.interfaces]
+            return [i.send_many(messages, block) for i in self.interfaces]
         else:
             raise Exception("No interfaces to send message on")
 
-    def produce(self, event: int | Event):
+    def produce(self, event: int | Event, payload: bytes | bytearray | memoryview = None):
         """
         Produce an :class:`Event` and send the resulting message on all interfaces.
 
@@ -115,18 +244,21 @@ class Node:
             this parameter, and the (unsigned) value fits within two bytes, the :class:`Event` will be tagged
             with the address of the :class:`Node`. This behavior can be overridden by passing an :class:`Event`
             object with no source address.
+        payload : bytes | bytearray | memoryview = None
+            Data to attach to the event report (up to 256 bytes), sent as PCER with Payload frames.
         """
         if isinstance(event, int):
             if event < 0:
                 raise Exception("Invalid Event")
             elif event > 2**16:
-                return self.send(Event(event))
+                event = Event(event)
             else:
-                return self.send(Event(event, self.address))
-        elif isinstance(event, Event):
-            return self.send(event)
-        else:
+                event = Event(event, self.address)
+        elif not isinstance(event, Event):
             raise Exception("Invalid event")
+        if payload:
+            return self.send(payload_messages(event.id, payload, self.address))
+        return self.send(event)
 
     def add_consumer(self, event: Event | int, function: callable):
         """
@@ -141,6 +273,8 @@ class Node:
             object with no source address.
         function : callable
             The function to be called upon receipt of the specified :class:`Event`. Must be able to take no parameters.
+            Reports carrying a payload are passed as an :class:`EventReport`, whose ``payload`` is a
+            :class:`memoryview` of the received data.
         """
         if isinstance(event, int):
             if event < 0:
@@ -151,6 +285,9 @@ class Node:
                 event = Event(event, self.address)
         if not event.id in self.consumers:
             self.consumers[event.id] = function
+            self._identify_frames = None
+            for interface in self.interfaces:
+                interface.subscribe_event(self, event.id)
             return self.consumers
         else:
             raise Exception("Consumer already registered")
@@ -176,6 +313,9 @@ class Node:
                 event = Event(event, self.address)
         if event.id in self.consumers:
             del self.consumers[event.id]
+            self._identify_frames = None
+            for interface in self.interfaces:
+                interface.unsubscribe_event(self, event.id)
         return self.consumers
 
     def replace_consumer(self, event: Event | int, function: callable):
@@ -260,6 +400,98 @@ class Node:
         else:
             raise Exception("Consumer not registered")
 
+    def add_consumer_range(self, base: Event | int, mask: int, function: callable):
+        """
+        Register a function to be run on receipt of any :class:`Event` in a range.
+
+        Parameters
+        ----------
+        base : int | Event
+            The first event ID of the range.
+        mask : int
+            The low-order bits of the event ID which may take any value, e.g. ``0xFFFF`` for a range of
+            65536 events. Must be one less than a power of two.
+        function : callable
+            The function to be called upon receipt of an :class:`Event` in the range. Must take a :class:`Message`
+            as the first parameter.
+        """
+        base = int(base)
+        self.consumer_ranges.add(base, mask, function)
+        self._identify_frames = None
+        for interface in self.interfaces:
+            interface.subscribe_event_range(self, base, mask)
+        return self.consumer_ranges
+
+    def remove_consumer_range(self, base: Event | int, mask: int):
+        """
+        Deregister the functions run on receipt of events in a range.
+
+        Parameters
+        ----------
+        base : int | Event
+            The first event ID of the range.
+        mask : int
+            The low-order bits of the event ID which may take any value.
+        """
+        base = int(base)
+        self.consumer_ranges.remove(base, mask)
+        self._identify_frames = None
+        for interface in self.interfaces:
+            interface.unsubscribe_event_range(self, base, mask)
+        return self.consumer_ranges
+
+    def add_producer_range(self, base: Event | int, mask: int):
+        """
+        Declare that this :class:`Node` produces the events in a range, so that it identifies the range when asked.
+
+        Parameters
+        ----------
+        base : int | Event
+            The first event ID of the range.
+        mask : int
+            The low-order bits of the event ID which may take any value.
+        """
+        self.producer_ranges.add(int(base), mask, True)
+        self._identify_frames = None
+        return self.producer_ranges
+
+    def remove_producer_range(self, base: Event | int, mask: int):
+        """
+        Stop identifying a range of produced events.
+        """
+        self.producer_ranges.remove(int(base), mask)
+        self._identify_frames = None
+        return self.producer_ranges
+
+    def add_producer(self, event: Event | int):
+        """
+        Declare that this :class:`Node` produces an :class:`Event`, so that it identifies the event when asked.
+
+        Parameters
+        ----------
+        event : int | Event
+            The ID or :class:`Event` produced, interpreted as for :meth:`produce`.
+        """
+        if isinstance(event, int):
+            if event < 0:
+                raise Exception("Invalid Event")
+            event = Event(event) if event > 2**16 else Event(event, self.address)
+        self.producers.add(event.id)
+        self._identify_frames = None
+        return self.producers
+
+    def remove_producer(self, event: Event | int):
+        """
+        Stop identifying a produced :class:`Event`.
+        """
+        if isinstance(event, int):
+            if event < 0:
+                raise Exception("Invalid Event")
+            event = Event(event) if event > 2**16 else Event(event, self.address)
+        self.producers.discard(event.id)
+        self._identify_frames = None
+        return self.producers
+
     def verify_node_id(self, address: Address | int = None):
         """
         Send a request to verify aliases on an OpenLCB/LCC network.
@@ -282,21 +514,63 @@ class Node:
         return self.send(Message(message_types.Verified_Node_ID_Number, bytes(self.address), self.address))
 
     def add_supported_protocol(self, protocol: protocols.Protocol):
-        self.supported_protocols += protocol
+        self.supported_protocols |= protocol
+        self._protocol_reply = None
         return self.supported_protocols
 
     def get_supported_protocols(self):
         return self.supported_protocols
 
-    def protocol_support_inqury(self, interface: Interface = None):
-        pass
+    def protocol_support_inquiry(self, destination: Address):
+        """
+        Ask another :class:`Node` which protocols it supports. Use a :class:`pyolcb.capabilities.CapabilityMap`
+        to collect the replies.
+
+        Parameters
+        ----------
+        destination : Address
+            The node to ask.
+        """
+        return self.send(self._addressed_message(message_types.Protocol_Support_Inquiry, destination))
+
+    protocol_support_inqury = protocol_support_inquiry
 
-    def protocol_support_reply(self, interface: Interface = None):
-        pass
+    def protocol_support_reply(self, destination: Address):
+        """
+        Send the protocols this :class:`Node` supports to another node. This is done automatically in reply to a
+        Protocol Support Inquiry, from a header and payload built once until the protocols (or the alias) change.
+
+        Parameters
+        ----------
+        destination : Address
+            The node to reply to.
+        """
+        reply = self._protocol_reply
+        if reply is None:
+            reply = self._protocol_reply = (message_types.Protocol_Support_Reply.get_can_header(self.address),
+                                            protocols.Protocol(self.supported_protocols).encode())
+        header, payload = reply
+        self._send_frames([can.Message(arbitration_id=header, data=destination.get_alias().to_bytes(2, 'big') + payload,
+                                       is_extended_id=True)])
+
+    def set_executor(self, executor):
+        """
+        Set how event consumers and datagram handlers are run. By default they run inline, on the thread that
+        received the message; a slow callback then delays the reception of every following message.
+
+        Parameters
+        ----------
+        executor : InlineExecutor | ThreadPoolCallbackExecutor | AsyncioCallbackExecutor
+            The executor, from :mod:`pyolcb.executor`.
+        """
+        self.executor = executor
+        return self.executor
 
     def set_datagram_handler(self, datagram_handler: callable):
         """
-        Register a function to be run on receipt of a :class:`Datagram`.
+        Register a function to be run on receipt of a :class:`Datagram`. Multi-frame datagrams are reassembled by
+        the :class:`Node`'s :class:`DatagramReassembler`, and Datagram Received OK (or Datagram Rejected) is sent
+        automatically.
 
         Parameters
         ----------
@@ -306,9 +580,181 @@ class Node:
         self.datagram_handler = datagram_handler
         return self.datagram_handler
 
+    def add_datagram_handler(self, content_type: int, datagram_handler: callable):
+        """
+        Register a function to be run when a :class:`Datagram` of a particular content type (its first byte) is
+        received. Datagrams with no handler for their content type are passed to the function set by
+        :meth:`set_datagram_handler`.
+
+        Parameters
+        ----------
+        content_type : int
+            The first byte of the datagrams to handle, e.g. ``0x20`` for the Memory Configuration Protocol.
+        datagram_handler : callable
+            The function to be called with each :class:`Datagram` of that type.
+        """
+        self.datagram_handlers[content_type] = datagram_handler
+        return datagram_handler
+
+    def remove_datagram_handler(self, content_type: int):
+        """
+        Stop handling datagrams of a content type separately.
+
+        Parameters
+        ----------
+        content_type : int
+            The first byte of the datagrams.
+        """
+        return self.datagram_handlers.pop(content_type, None)
+
+    def send_datagram(self, datagram: Datagram | bytes, destination: Address = None, timeout: float = None,
+                      retries: int = None) -> concurrent.futures.Future:
+        """
+        Send a :class:`Datagram` and wait (without blocking) for the destination to accept it.
+
+        Datagrams to the same destination are sent one at a time, in order; datagrams to different destinations
+        are in flight concurrently. A datagram is resent if the destination rejects it with a temporary error
+        (resend OK) or does not reply in time, up to ``retries`` times.
+
+        Parameters
+        ----------
+        datagram : Datagram | bytes
+            The :class:`Datagram`, or its content (in which case ``destination`` must be given).
+        destination : Address = None
+            The destination, if only the content of the datagram is given.
+        timeout : float = None
+            Seconds to wait for Datagram Received OK before resending. Defaults to ``datagram_timeout``.
+        retries : int = None
+            Maximum number of times to resend. Defaults to ``datagram_retries``.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the Datagram Received OK :class:`Message`, or fails with
+            :class:`pyolcb.exceptions.DatagramRejected` or :class:`TimeoutError`.
+        """
+        if not isinstance(datagram, Datagram):
+            datagram = Datagram(bytes(datagram), self.address, destination)
+        entry = _OutgoingDatagram(datagram, self.datagram_timeout if timeout is None else timeout,
+                                  self.datagram_retries if retries is None else retries)
+        alias = datagram.destination.get_alias()
+        with self._datagram_lock:
+            pending = self._datagram_outbox.get(alias)
+            if pending is None:
+                self._datagram_outbox[alias] = deque([entry])
+            else:
+                pending.append(entry)
+        if pending is None:
+            self._transmit_datagram(entry)
+        return entry.future
+
+    def _transmit_datagram(self, entry):
+        entry.timer = threading.Timer(entry.timeout, self._datagram_timed_out, (entry,))
+        entry.timer.daemon = True
+        entry.timer.start()
+        try:
+            frames = entry.datagram.as_can_frames()
+            for interface in self.interfaces:
+                interface.send_frames(frames)
+        except Exception as e:
+            self._finish_datagram(entry, exception=e)
+
+    def _retry_datagram(self, entry, exception: Exception, delay: float = 0):
+        if entry.retries <= 0:
+            self._finish_datagram(entry, exception=exception)
+            return
+        entry.retries -= 1
+        if delay:
+            timer = threading.Timer(delay, self._transmit_datagram, (entry,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._transmit_datagram(entry)
+
+    def _finish_datagram(self, entry, result: Message = None, exception: Exception = None):
+        alias = entry.datagram.destination.get_alias()
+        with self._datagram_lock:
+            pending = self._datagram_outbox.get(alias)
+            if not pending or pending[0] is not entry:
+                return
+            pending.popleft()
+            following = pending[0] if pending else None
+            if following is None:
+                del self._datagram_outbox[alias]
+        if entry.timer is not None:
+            entry.timer.cancel()
+        if exception is not None:
+            entry.future.set_exception(exception)
+        else:
+            entry.future.set_result(result)
+        if following is not None:
+            self._transmit_datagram(following)
+
+    def _in_flight_datagram(self, alias: int):
+        with self._datagram_lock:
+            pending = self._datagram_outbox.get(alias)
+            return pending[0] if pending else None
+
+    def _datagram_timed_out(self, entry):
+        if self._in_flight_datagram(entry.datagram.destination.get_alias()) is entry:
+            self._retry_datagram(entry, TimeoutError("No reply to datagram"))
+
+    def set_stream_handler(self, stream_handler: callable):
+        """
+        Register a function to be run when another node asks to send a stream to this :class:`Node`.
+
+        Parameters
+        ----------
+        stream_handler : callable
+            The function to be called with the :class:`StreamReceiver` for each incoming stream. Must return where
+            to write the data (a :class:`bytearray`, or a file-like object with a ``write`` method), or ``None`` to
+            reject the stream. The receiver's ``future`` resolves to that object once the stream is complete.
+        """
+        self.stream_handler = stream_handler
+        return self.stream_handler
+
+    def send_stream(self, source, destination: Address, buffer_size: int = None, timeout: float = None) -> StreamSender:
+        """
+        Send data to another :class:`Node` as a stream.
+
+        Parameters
+        ----------
+        source : bytes | bytearray | memoryview | object
+            The data to send, or a file-like object to read it from.
+        destination : Address
+            The receiving :class:`Node`'s address.
+        buffer_size : int = None
+            The buffer size to propose. Defaults to ``stream_buffer_size``.
+        timeout : float = None
+            Seconds to wait for each reply from the receiver. Defaults to ``stream_timeout``.
+
+        Returns
+        -------
+        StreamSender
+            The stream, whose ``future`` resolves (to the :class:`StreamSender`) once all data has been sent, and which
+            reports the transfer's ``throughput``.
+        """
+        with self._stream_lock:
+            stream_id = next((x for x in range(0xFF) if x not in self._streams_out), None)
+            if stream_id is None:
+                raise Exception("No stream IDs available")
+            sender = StreamSender(source, self.get_alias(), destination.get_alias(), stream_id, self._send_frames,
+                                  self.stream_buffer_size if buffer_size is None else buffer_size,
+                                  self.stream_timeout if timeout is None else timeout)
+            self._streams_out[stream_id] = sender
+        sender.future.add_done_callback(lambda _: self._streams_out.pop(stream_id, None))
+        sender.start(lambda payload: self.send(
+            self._addressed_message(message_types.Stream_Initiate_Request, destination, payload)))
+        return sender
+
+    def _send_frames(self, frames: list[can.Message]):
+        for interface in self.interfaces:
+            interface.send_frames(frames)
+
     def set_unknown_message_processor(self, function: callable):
         """
-        Register a function to be run on receipt of a message of unknown type.
+        Register a function to be run on receipt of a message of unknown type. Once set, the :class:`Node`
+        receives every global message seen on its interfaces.
 
         Parameters
         ----------
@@ -316,46 +762,322 @@ class Node:
             The function to be called upon receipt of an unknown message. Must take a :class:`Message` as the first parameter.
         """
         self.unknown_message_processor = function
+        for interface in self.interfaces:
+            interface.subscribe(self)
         return self.unknown_message_processor
 
+    def register_message_handler(self, message_type: message_types.MessageTypeIndicator | int, function: callable):
+        """
+        Register a function to be run on receipt of a specific message type. Replaces any handler
+        previously registered for that message type.
+
+        Parameters
+        ----------
+        message_type : MessageTypeIndicator | int
+            The message type (or integer MTI value) to handle.
+        function : callable
+            The function to be called upon receipt of a matching message. Must take a :class:`Message` as the first parameter.
+        """
+        self.message_handlers[int(message_type)] = function
+        for interface in self.interfaces:
+            interface.subscribe(self, message_type)
+        return self.message_handlers
+
+    def remove_message_handler(self, message_type: message_types.MessageTypeIndicator | int):
+        """
+        Deregister the function run on receipt of a specific message type. Messages of that type will
+        be passed to the unknown message processor.
+
+        Parameters
+        ----------
+        message_type : MessageTypeIndicator | int
+            The message type (or integer MTI value) to stop handling.
+        """
+        self.message_handlers.pop(int(message_type), None)
+        for interface in self.interfaces:
+            interface.unsubscribe(self, message_type)
+        return self.message_handlers
+
+    def get_message_handler(self, message_type: message_types.MessageTypeIndicator | int):
+        """
+        Get the function run on receipt of a specific message type.
+
+        Returns
+        -------
+        callable
+            Returns the registered handler, or ``None`` if the message type is not handled.
+        """
+        return self.message_handlers.get(int(message_type))
+
+    def chain_message_handler(self, message_type: message_types.MessageTypeIndicator | int, function: callable):
+        """
+        Register a function to be run on receipt of a specific message type before the handler already registered
+        for it, if any, rather than replacing it.
+
+        Parameters
+        ----------
+        message_type : MessageTypeIndicator | int
+            The message type (or integer MTI value) to handle.
+        function : callable
+            The function to be called upon receipt of a matching message. Must take a :class:`Message` as the first parameter.
+        """
+        previous = self.get_message_handler(message_type)
+        if previous is None:
+            return self.register_message_handler(message_type, function)
+
+        def chained(message):
+            function(message)
+            previous(message)
+        return self.register_message_handler(message_type, chained)
+
     def process_message(self, message):
-        if isinstance(message, can.Message):
+        if not self.permitted:
+            return
+        if isinstance(message, Message):
+            converted_message = message
+        elif isinstance(message, can.Message):
             converted_message = Message.from_can_message(message)
         else:
             raise NotImplementedError()
+        if converted_message is None:
+            return
+
+        handler = self.message_handlers.get(converted_message.message_type.value)
+        if handler is None:
+            self.unknown_message_processor(converted_message)
+        else:
+            handler(converted_message)
+
+    def _process_verify_node_id_addressed(self, message: Message):
+        if message.data == self.address.get_alias_bytes():
+            self.verified_node_id()
+
+    def _process_verify_node_id_global(self, message: Message):
+        self.verified_node_id()
+
+    def _process_protocol_support_inquiry(self, message: Message):
+        if message.destination == self.address:
+            self.protocol_support_reply(message.source)
+
+    def _process_event(self, message: Message):
+        event_id = bytes(message.data)
+        consumer = self.consumers.get(event_id)
+        if consumer is not None:
+            self.executor.submit(consumer, message, event_id, message.source.get_alias())
+        if self.consumer_ranges:
+            for consumer in self.consumer_ranges.match(int.from_bytes(message.data[:8], 'big')):
+                self.executor.submit(consumer, message, event_id, message.source.get_alias())
 
-        match converted_message.message_type:
-            case message_types.Verify_Node_ID_Number_Addressed:
-                if converted_message.data == self.address.get_alias_bytes():
-                    self.verified_node_id()
-                    return
-            case message_types.Verify_Node_ID_Number_Global:
-                self.verified_node_id()
+    def _process_identify_consumer(self, message: Message):
+        event_id = int.from_bytes(message.data[:8], 'big')
+        replies = [Message(message_types.Consumer_Range_Identified, encode_event_range(base, mask).to_bytes(8, 'big'),
+                           self.address) for base, mask in self.consumer_ranges.ranges(event_id)]
+        if bytes(message.data) in self.consumers:
+            replies.insert(0, Message(message_types.Consumer_Identified_w_validity_unknown, bytes(message.data),
+                                      self.address))
+        if replies:
+            self.send(replies)
+
+    def _process_identify_producer(self, message: Message):
+        event_id = int.from_bytes(message.data[:8], 'big')
+        replies = [Message(message_types.Producer_Range_Identified, encode_event_range(base, mask).to_bytes(8, 'big'),
+                           self.address) for base, mask in self.producer_ranges.ranges(event_id)]
+        if bytes(message.data) in self.producers:
+            replies.insert(0, Message(message_types.Producer_Identified_w_validity_unknown, bytes(message.data),
+                                      self.address))
+        if replies:
+            self.send(replies)
+
+    def _process_identify_events(self, message: Message):
+        frames = self.get_identify_frames()
+        if frames:
+            for interface in self.interfaces:
+                interface.send_paced(frames)
+
+    def get_identify_frames(self) -> list[can.Message]:
+        """
+        Get the frames this :class:`Node` sends in reply to Identify Events: Producer/Consumer Identified for each
+        produced and consumed event, and Producer/Consumer Range Identified for each range. The frames are built
+        once and reused until the events (or the alias) change.
+
+        Returns
+        -------
+        list[can.Message]
+            The reply frames.
+        """
+        frames = self._identify_frames
+        if frames is None:
+            entries = [(message_types.Producer_Identified_w_validity_unknown, x) for x in self.producers]
+            entries += [(message_types.Producer_Range_Identified, encode_event_range(base, mask).to_bytes(8, 'big'))
+                        for base, mask in self.producer_ranges.ranges()]
+            entries += [(message_types.Consumer_Identified_w_validity_unknown, x) for x in self.consumers]
+            entries += [(message_types.Consumer_Range_Identified, encode_event_range(base, mask).to_bytes(8, 'big'))
+                        for base, mask in self.consumer_ranges.ranges()]
+            headers = {}
+            frames = []
+            for mti, event_id in entries:
+                header = headers.get(mti)
+                if header is None:
+                    header = headers[mti] = mti.get_can_header(self.address)
+                frames.append(can.Message(arbitration_id=header, data=event_id, is_extended_id=True))
+            self._identify_frames = frames
+        return frames
+
+    def set_snip(self, snip: SNIPRecord):
+        """
+        Set the Simple Node Information this :class:`Node` returns when asked for it, and answer requests for it.
+
+        Parameters
+        ----------
+        snip : SNIPRecord
+            The manufacturer, model, versions, user name and user description of the :class:`Node`.
+        """
+        self.snip = snip
+        self._snip_frames = {}
+        self.add_supported_protocol(protocols.Protocol.SIMPLE_NODE_INFORMATION)
+        self.register_message_handler(message_types.Simple_Node_Ident_Info_Request, self._process_snip_request)
+        return self.snip
+
+    def get_snip_frames(self, destination: Address) -> list[can.Message]:
+        """
+        Get the frames this :class:`Node` sends in reply to a Simple Node Ident Info Request from a node. The
+        frames are built once per requesting node and reused until the information (or the alias) changes.
+        """
+        alias = destination.get_alias()
+        frames = self._snip_frames.get(alias)
+        if frames is None:
+            if len(self._snip_frames) >= 256:
+                self._snip_frames.clear()
+            frames = [can.Message(arbitration_id=x.get_can_header(), data=x.data, is_extended_id=True)
+                      for x in addressed_messages(message_types.Simple_Node_Ident_Info_Reply, self.snip.encode(),
+                                                  self.address, destination)]
+            self._snip_frames[alias] = frames
+        return frames
+
+    def _process_snip_request(self, message: Message):
+        if self.snip is not None and message.destination == self.address:
+            self._send_frames(self.get_snip_frames(message.source))
+
+    def _process_datagram(self, message: Message):
+        if message.destination != self.address:
+            return
+        datagram, error = self.datagram_reassembler.add(message)
+        if error is not None:
+            self.send(self._addressed_message(message_types.Datagram_Rejected, message.source, error.to_bytes(2, 'big')))
+        elif datagram is not None:
+            self.send(self._addressed_message(message_types.Datagram_Received_OK, message.source))
+            self.executor.submit(self.datagram_handlers.get(datagram.data[0] if datagram.data else None,
+                                                            self.datagram_handler),
+                                 datagram, source=message.source.get_alias())
+
+    def _reject_stale_datagram(self, source: int, destination: int, code: int):
+        # The reassembler may be shared by several nodes: reject from whichever hosted node the datagram was for
+        for interface in self.interfaces:
+            node = interface.get_node(destination)
+            if node is not None:
+                node.send(node._addressed_message(message_types.Datagram_Rejected, Address.from_alias(source),
+                                                  code.to_bytes(2, 'big')))
                 return
-            case message_types.Producer_Consumer_Event_Report:
-                event = Event(converted_message.data)
-                if event.id in self.consumers:
-                    self.consumers[event.id](converted_message)
-            case message_types.Datagram:
-                if converted_message.destination == self.address:
-                    match converted_message.frame_id:
-                        case None:
-                            Datagram.from_message_list(converted_message)
-                        case 1:
-                            self._datagram_queue[converted_message.source.alias] = []
-                            self._datagram_queue[converted_message.source.alias].append(
-                                converted_message)
-                        case -1:
-                            self._datagram_queue[converted_message.source.alias].append(
-                                converted_message)
-                            self.datagram_handler(Datagram.from_message_list(
-                                self._datagram_queue[converted_message.source.alias]))
-                            self._datagram_queue[converted_message.source.alias] = []
-                        case _:
-                            self._datagram_queue[converted_message.source.alias].append(
-                                converted_message)
-            case _:
-                self.unknown_message_processor(converted_message)
+
+    def _process_datagram_received_ok(self, message: Message):
+        entry = self._in_flight_datagram(message.source.get_alias())
+        if entry is not None:
+            self._finish_datagram(entry, result=message)
+
+    def _process_datagram_rejected(self, message: Message):
+        entry = self._in_flight_datagram(message.source.get_alias())
+        if entry is None:
+            return
+        code = int.from_bytes(message.data[2:4], 'big') if len(message.data) >= 4 else 0
+        entry.timer.cancel()
+        if code & 0x2000:
+            self._retry_datagram(entry, exceptions.DatagramRejected(code), self.datagram_retry_delay)
+        else:
+            self._finish_datagram(entry, exception=exceptions.DatagramRejected(code))
+
+    def _process_stream_initiate_request(self, message: Message):
+        if message.destination != self.address:
+            return
+        data = message.data
+        source = message.source
+        if len(data) < 7:
+            # Too short to carry the buffer size and source stream ID
+            self._reject_stream(source, STREAM_REJECT_INVALID_REQUEST, 0)
+            return
+        buffer_size = min(int.from_bytes(data[2:4], 'big'), self.stream_buffer_size)
+        key = None
+        with self._stream_lock:
+            stream_id = next((x for x in range(0xFF) if (source.get_alias(), x) not in self._streams_in), None)
+            if stream_id is not None:
+                receiver = StreamReceiver(source.get_alias(), data[6], stream_id, buffer_size)
+                # Hold the ID while the handler decides, so that concurrent requests get different IDs
+                key = (source.get_alias(), stream_id)
+                self._streams_in[key] = receiver
+        sink = self.stream_handler(receiver) if key is not None else None
+        if sink is None:
+            if key is not None:
+                self._streams_in.pop(key, None)
+            self._reject_stream(source, STREAM_REJECT_PERMANENT, data[6])
+            return
+        receiver.accept(sink)
+        receiver.future.add_done_callback(lambda _: self._streams_in.pop(key, None))
+        self.send(self._addressed_message(message_types.Stream_Initiate_Reply, source,
+                                          buffer_size.to_bytes(2, 'big') + STREAM_ACCEPT.to_bytes(2, 'big')
+                                          + bytes([data[6], stream_id])))
+
+    def _reject_stream(self, source: Address, code: int, source_stream_id: int):
+        self.send(self._addressed_message(message_types.Stream_Initiate_Reply, source,
+                                          bytes(2) + code.to_bytes(2, 'big') + bytes([source_stream_id, 0])))
+
+    def _process_stream_initiate_reply(self, message: Message):
+        data = message.data
+        if len(data) < 7:
+            return
+        sender = self._streams_out.get(data[6])
+        if sender is not None and sender.destination_alias == message.source.get_alias():
+            # A rejection may leave out the destination stream ID
+            sender.process_reply(int.from_bytes(data[2:4], 'big'), int.from_bytes(data[4:6], 'big'),
+                                 data[7] if len(data) > 7 else 0,
+                                 lambda payload: self.send(self._addressed_message(
+                                     message_types.Stream_Data_Complete, message.source, payload)))
+
+    def _process_stream_data(self, message: Message):
+        if not message.data:
+            return
+        receiver = self._streams_in.get((message.source.get_alias(), message.data[0]))
+        if receiver is not None:
+            receiver.process_data(message.data, lambda payload: self.send(self._addressed_message(
+                message_types.Stream_Data_Proceed, message.source, payload)))
+
+    def _process_stream_proceed(self, message: Message):
+        if len(message.data) < 3:
+            return
+        sender = self._streams_out.get(message.data[2])
+        if sender is not None and sender.destination_alias == message.source.get_alias():
+            sender.process_proceed(lambda payload: self.send(self._addressed_message(
+                message_types.Stream_Data_Complete, message.source, payload)))
+
+    def _process_stream_complete(self, message: Message):
+        if len(message.data) < 4:
+            return
+        receiver = self._streams_in.get((message.source.get_alias(), message.data[3]))
+        if receiver is not None:
+            receiver.process_complete(int.from_bytes(message.data[4:8], 'big') if len(message.data) >= 8 else None)
+
+    def _addressed_message(self, message_type: message_types.MessageTypeIndicator, destination: Address,
+                           payload: bytes = b'') -> Message:
+        return Message(message_type, destination.get_alias().to_bytes(2, 'big') + payload, self.address, destination)
+
+
+class _OutgoingDatagram:
+    __slots__ = ('datagram', 'future', 'timeout', 'retries', 'timer')
+
+    def __init__(self, datagram: Datagram, timeout: float, retries: int) -> None:
+        self.datagram = datagram
+        self.future = concurrent.futures.Future()
+        self.timeout = timeout
+        self.retries = retries
+        self.timer = None
 
 
 class SimpleNode(Node):
@@ -364,3 +1086,234 @@ class SimpleNode(Node):
 
     def __init__(self, address: Address, interfaces: Interface | list[Interface]):
         super().__init__(address, interfaces)
+
+
+class _Completed:
+    """
+    Awaitable wrapping a result that is already available.
+    """
+    __slots__ = ('result',)
+
+    def __init__(self, result):
+        self.result = result
+
+    def __await__(self):
+        return self.result
+        yield
+
+
+class AsyncNode(Node):
+    """
+    :class:`Node` for use with :mod:`asyncio`. Should be attached to an :class:`AsyncInterface`, so that
+    messages are processed on the event loop.
+
+    Sending returns an awaitable (``await node.send(message)``), received messages can be iterated with
+    ``async for message in node.messages()``, and request helpers such as :meth:`verify_node_id` await the reply.
+
+    Parameters
+    ----------
+    address : Address
+        The address (full and alias) to be associated with the :class:`Node`.
+    interfaces : AsyncInterface | list[AsyncInterface]
+        An :class:`AsyncInterface` or list thereof to connect the :class:`Node` to.
+    queue_size : int = 0
+        Maximum number of messages buffered for :meth:`messages`. Oldest messages are dropped once full.
+        Unbounded if 0.
+    """
+    queue_size = 0
+
+    def __init__(self, address: Address, interfaces: Interface | list[Interface], queue_size: int = 0):
+        self.queue_size = queue_size
+        self._queue = None
+        self._waiters = {}
+        super().__init__(address, interfaces)
+
+    def send(self, messages: Message | list[Message], block: bool = True):
+        """
+        Send a :class:`Message` (or sequence thereof) from this :class:`Node` on all registered interfaces. ``block``
+        is as for :meth:`Node.send`.
+
+        Returns
+        -------
+        Awaitable
+            Awaitable resolving to the result of sending on each interface. For interfaces with a transmit
+            queue, this waits until the messages have been written.
+        """
+        results = super().send(messages, block)
+        futures = [x for x in results if isinstance(x, concurrent.futures.Future)]
+        if futures:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return _Completed(results)
+            return asyncio.gather(*(asyncio.wrap_future(x) for x in futures))
+        return _Completed(results)
+
+    async def messages(self):
+        """
+        Iterate asynchronously over every message routed to this :class:`Node`. Calling this subscribes the
+        :class:`Node` to all global messages on its interfaces.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            for interface in self.interfaces:
+                interface.subscribe(self)
+        while True:
+            yield await self._queue.get()
+
+    def process_message(self, message):
+        if isinstance(message, can.Message):
+            message = Message.from_can_message(message)
+            if message is None:
+                return
+        super().process_message(message)
+
+        waiters = self._waiters.get(message.message_type.value)
+        if waiters:
+            for source, callback in waiters:
+                if source is None or source == message.source.get_alias():
+                    callback(message)
+        if self._queue is not None:
+            if self._queue.full():
+                self._queue.get_nowait()
+            self._queue.put_nowait(message)
+
+    def _add_waiter(self, message_types_: list, source: int, callback: callable):
+        waiter = (source, callback)
+        for message_type in message_types_:
+            mti = int(message_type)
+            self._waiters[mti] = self._waiters.get(mti, []) + [waiter]
+            for interface in self.interfaces:
+                interface.subscribe(self, mti)
+        return waiter
+
+    def _remove_waiter(self, message_types_: list, waiter: tuple):
+        for message_type in message_types_:
+            mti = int(message_type)
+            waiters = [x for x in self._waiters.get(mti, []) if x is not waiter]
+            if waiters:
+                self._waiters[mti] = waiters
+            else:
+                self._waiters.pop(mti, None)
+                if mti not in self.message_handlers:
+                    for interface in self.interfaces:
+                        interface.unsubscribe(self, mti)
+
+    async def request(self, messages: Message | list[Message], reply_type: message_types.MessageTypeIndicator | list,
+                      source: Address | int = None, timeout: float = None) -> Message:
+        """
+        Send a :class:`Message` (or sequence thereof) and wait for the reply.
+
+        Parameters
+        ----------
+        messages : Message | list[Message]
+            The request to send. If ``None``, nothing is sent and this waits for an unsolicited message.
+        reply_type : MessageTypeIndicator | list[MessageTypeIndicator]
+            The message type (or types) of the expected reply.
+        source : Address | int = None
+            If specified, only accept a reply from this address (or alias).
+        timeout : float = None
+            Seconds to wait before raising :class:`asyncio.TimeoutError`. Waits indefinitely if not given.
+
+        Returns
+        -------
+        Message
+            The reply.
+        """
+        if not isinstance(reply_type, list):
+            reply_type = [reply_type]
+        if isinstance(source, Address):
+            source = source.get_alias()
+        future = asyncio.get_running_loop().create_future()
+
+        def resolve(message):
+            if not future.done():
+                future.set_result(message)
+        waiter = self._add_waiter(reply_type, source, resolve)
+        try:
+            if messages is not None:
+                await self.send(messages)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._remove_waiter(reply_type, waiter)
+
+    async def wait_for(self, message_type: message_types.MessageTypeIndicator | list, source: Address | int = None,
+                       timeout: float = None) -> Message:
+        """
+        Wait for a message of a given type, optionally from a specific source.
+
+        Parameters
+        ----------
+        message_type : MessageTypeIndicator | list[MessageTypeIndicator]
+            The message type (or types) to wait for.
+        source : Address | int = None
+            If specified, only accept a message from this address (or alias).
+        timeout : float = None
+            Seconds to wait before raising :class:`asyncio.TimeoutError`. Waits indefinitely if not given.
+
+        Returns
+        -------
+        Message
+            The received message.
+        """
+        return await self.request(None, message_type, source, timeout)
+
+    async def collect(self, messages: Message | list[Message], reply_type: message_types.MessageTypeIndicator | list,
+                      duration: float) -> list[Message]:
+        """
+        Send a :class:`Message` (or sequence thereof) and collect every reply received over a period of time.
+
+        Parameters
+        ----------
+        messages : Message | list[Message]
+            The request to send. If ``None``, nothing is sent.
+        reply_type : MessageTypeIndicator | list[MessageTypeIndicator]
+            The message type (or types) to collect.
+        duration : float
+            Seconds to collect replies for.
+
+        Returns
+        -------
+        list[Message]
+            The replies, in order of receipt.
+        """
+        if not isinstance(reply_type, list):
+            reply_type = [reply_type]
+        collected = []
+        waiter = self._add_waiter(reply_type, None, collected.append)
+        try:
+            if messages is not None:
+                await self.send(messages)
+            await asyncio.sleep(duration)
+        finally:
+            self._remove_waiter(reply_type, waiter)
+        return collected
+
+    async def verify_node_id(self, address: Address | int = None, timeout: float = 1.0):
+        """
+        Send a request to verify aliases on an OpenLCB/LCC network and await the response(s).
+
+        Parameters
+        ----------
+        address : Address | int = None
+            If specified, only request a response for a :class:`Node` with a given alias. Otherwise, 
+            request responses from each :class:`Node` attached to all registered interfaces.
+        timeout : float = 1.0
+            Seconds to wait for the response. When verifying all nodes, responses are collected for this long.
+
+        Returns
+        -------
+        Address | list[Address]
+            The verified address of the requested :class:`Node`, or of each :class:`Node` that responded.
+        """
+        reply_type = [message_types.Verified_Node_ID_Number, message_types.Verified_Node_ID_Number_Simple]
+        if address is None:
+            replies = await self.collect(
+                Message(message_types.Verify_Node_ID_Number_Global, bytes(self.address), self.address), reply_type, timeout)
+            return [Address(bytes(x.data[:6]), x.source.get_alias()) for x in replies]
+        if isinstance(address, Address):
+            address = address.get_alias()
+        reply = await self.request(
+            Message(message_types.Verify_Node_ID_Number_Addressed, utilities.process_bytes(2, address), self.address, address),
+            reply_type, address, timeout)
+        return Address(bytes(reply.data[:6]), reply.source.get_alias())
@@ -1,28 +1,74 @@
+"""
+==============
+protocols
+==============
 
-class Protocol:
-    value = None
-    def __init__(self, mask:int = 0x0 ) -> None:
-        self.value = mask
-    def __add__(self, o):
-        return Protocol(self.value | o.value)
-    def __iter__(self):
-        return iter(self.value.to_bytes(3,'big'))
-
-Simple_Protocol_Subset = Protocol(0x800000)
-Datagram_Protocol = Protocol(0x400000)
-Stream_Protocol = Protocol(0x200000)
-Memory_Configuration_Protocol = Protocol(0x100000)
-Reservation_Protocol = Protocol(0x080000)
-Event_Exchange_Protocol = Protocol(0x040000)
-Identification_Protocol = Protocol(0x020000)
-Teaching_Learning_Configuration_Protocol = Protocol(0x010000)
-Remote_Button_Protocol = Protocol(0x008000)
-Abbreviated_Default_CDI_Protocol = Protocol(0x004000)
-Display_Protocol = Protocol(0x002000)
-Simple_Node_Information_Protocol = Protocol(0x001000)
-Configuration_Description_Information = Protocol(0x000800)
-Train_Control_Protocol = Protocol(0x000400)
-Function_Description_Information = Protocol(0x000200)
-Function_Configuration = Protocol(0x000040)
-Firmware_Upgrade_Protocol = Protocol(0x000020)
-Firmware_Upgrade_Active = Protocol(0x000010)
\ No newline at end of file
+The protocols a node supports, as reported in its Protocol Support Reply.
+"""
+from enum import IntFlag
+
+
+class Protocol(IntFlag):
+    """
+    Flags for the protocols a node supports. Combine them with ``|``; test them with ``in`` or ``&``.
+
+    The flags are the first three bytes of the six byte Protocol Support Reply; bits this library does not name are
+    kept when a reply is decoded.
+    """
+    SIMPLE_PROTOCOL_SUBSET = 0x800000
+    DATAGRAM = 0x400000
+    STREAM = 0x200000
+    MEMORY_CONFIGURATION = 0x100000
+    RESERVATION = 0x080000
+    EVENT_EXCHANGE = 0x040000
+    IDENTIFICATION = 0x020000
+    TEACHING_LEARNING_CONFIGURATION = 0x010000
+    REMOTE_BUTTON = 0x008000
+    ABBREVIATED_DEFAULT_CDI = 0x004000
+    DISPLAY = 0x002000
+    SIMPLE_NODE_INFORMATION = 0x001000
+    CONFIGURATION_DESCRIPTION_INFORMATION = 0x000800
+    TRAIN_CONTROL = 0x000400
+    FUNCTION_DESCRIPTION_INFORMATION = 0x000200
+    FUNCTION_CONFIGURATION = 0x000040
+    FIRMWARE_UPGRADE = 0x000020
+    FIRMWARE_UPGRADE_ACTIVE = 0x000010
+
+    def flags(self) -> list:
+        """
+        The named flags that are set, one :class:`Protocol` each. (Iterating a flag value directly needs Python 3.11.)
+        """
+        return [x for x in Protocol if x & self]
+
+    def encode(self) -> bytes:
+        """
+        Encode the flags as the six bytes of a Protocol Support Reply.
+        """
+        return self.to_bytes(3, 'big') + bytes(3)
+
+    @classmethod
+    def decode(cls, data: bytes | bytearray | memoryview):
+        """
+        Decode the flags from the data of a Protocol Support Reply (after the destination alias).
+        """
+        return cls(int.from_bytes(bytes(data[:3]).ljust(3, b'\0'), 'big'))
+
+
+Simple_Protocol_Subset = Protocol.SIMPLE_PROTOCOL_SUBSET
+Datagram_Protocol = Protocol.DATAGRAM
+Stream_Protocol = Protocol.STREAM
+Memory_Configuration_Protocol = Protocol.MEMORY_CONFIGURATION
+Reservation_Protocol = Protocol.RESERVATION
+Event_Exchange_Protocol = Protocol.EVENT_EXCHANGE
+Identification_Protocol = Protocol.IDENTIFICATION
+Teaching_Learning_Configuration_Protocol = Protocol.TEACHING_LEARNING_CONFIGURATION
+Remote_Button_Protocol = Protocol.REMOTE_BUTTON
+Abbreviated_Default_CDI_Protocol = Protocol.ABBREVIATED_DEFAULT_CDI
+Display_Protocol = Protocol.DISPLAY
+Simple_Node_Information_Protocol = Protocol.SIMPLE_NODE_INFORMATION
+Configuration_Description_Information = Protocol.CONFIGURATION_DESCRIPTION_INFORMATION
+Train_Control_Protocol = Protocol.TRAIN_CONTROL
+Function_Description_Information = Protocol.FUNCTION_DESCRIPTION_INFORMATION
+Function_Configuration = Protocol.FUNCTION_CONFIGURATION
+Firmware_Upgrade_Protocol = Protocol.FIRMWARE_UPGRADE
+Firmware_Upgrade_Active = Protocol.FIRMWARE_UPGRADE_ACTIVE
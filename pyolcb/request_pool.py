@@ -0,0 +1,152 @@
+"""
+==============
+request_pool
+==============
+
+Requests to other nodes that are each answered by a reply, for the clients that query many nodes at once: at most a
+fixed number are outstanding at a time, the rest wait in order, and each fails if no reply comes in time.
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+from .scheduler import scheduler
+
+
+class PendingRequest:
+    """
+    A request in a :class:`RequestPool`. Subclasses add what is needed to send it and collect its reply.
+
+    Attributes
+    ----------
+    key
+        Identifies the request in its pool, usually the alias its reply comes from.
+    future : concurrent.futures.Future
+        Resolved when the request completes.
+    """
+    __slots__ = ('key', 'future')
+
+    def __init__(self, key) -> None:
+        self.key = key
+        self.future = Future()
+
+
+class RequestPool:
+    """
+    Pending requests by key, with up to ``max_concurrent`` sent at once and the rest queued until a slot is released.
+
+    Parameters
+    ----------
+    send : callable
+        Sends a request; takes the :class:`PendingRequest`. An exception it raises fails the request.
+    max_concurrent : int = 8
+        Maximum number of requests outstanding at once.
+    timeout : float = 3.0
+        Seconds to wait for the reply to each request once sent.
+    timeout_message : str = "No reply to request"
+        Message of the :class:`TimeoutError` failing a request that is not answered.
+    """
+    def __init__(self, send: callable, max_concurrent: int = 8, timeout: float = 3.0,
+                 timeout_message: str = "No reply to request") -> None:
+        self.send = send
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.timeout_message = timeout_message
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._queued = deque()
+        self._active = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def get(self, key) -> PendingRequest | None:
+        """
+        Get the request pending with a key, or ``None``.
+        """
+        with self._lock:
+            return self._pending.get(key)
+
+    def pending(self) -> list[PendingRequest]:
+        """
+        Get the requests pending, sent or queued.
+        """
+        with self._lock:
+            return list(self._pending.values())
+
+    def submit(self, key, create: callable) -> PendingRequest:
+        """
+        Send a request, or queue it if ``max_concurrent`` are outstanding. If a request with the same key is already
+        pending, that one is returned instead.
+
+        Parameters
+        ----------
+        key
+            Identifies the request.
+        create : callable
+            Called with no arguments to make the :class:`PendingRequest` if none is pending with ``key``.
+
+        Returns
+        -------
+        PendingRequest
+            The request pending with ``key``.
+        """
+        with self._lock:
+            request = self._pending.get(key)
+            if request is not None:
+                return request
+            request = self._pending[key] = create()
+            start = self._active < self.max_concurrent
+            if start:
+                self._active += 1
+            else:
+                self._queued.append(request)
+        if start:
+            self._transmit(request)
+        return request
+
+    def complete(self, request: PendingRequest, result=None, exception: Exception = None, store: callable = None):
+        """
+        Complete a request, sending the next queued request in its place, and resolve its future. Does nothing if
+        the request is no longer pending, e.g. a reply arriving after it timed out.
+
+        Parameters
+        ----------
+        request : PendingRequest
+            The request to complete.
+        result = None
+            The result of the request.
+        exception : Exception = None
+            The exception failing the request, if it failed.
+        store : callable = None
+            Called with the request and ``result`` before the future is resolved, if the request succeeded. An
+            exception it raises fails the request and is raised again.
+        """
+        with self._lock:
+            if self._pending.get(request.key) is not request:
+                return
+            del self._pending[request.key]
+            following = self._queued.popleft() if self._queued else None
+            if following is None:
+                self._active -= 1
+        # The slot is released and the request no longer pending: the future must be resolved whatever happens
+        try:
+            if exception is None and store is not None:
+                store(request, result)
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            if exception is not None:
+                request.future.set_exception(exception)
+            else:
+                request.future.set_result(result)
+            if following is not None:
+                self._transmit(following)
+
+    def _transmit(self, request: PendingRequest):
+        try:
+            self.send(request)
+        except Exception as e:
+            self.complete(request, exception=e)
+            return
+        scheduler.schedule(self.timeout, self.complete, request, None, TimeoutError(self.timeout_message))
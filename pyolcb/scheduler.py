@@ -0,0 +1,55 @@
+"""
+==============
+scheduler
+==============
+
+A single background thread running callbacks at their deadlines, shared by everything in :mod:`pyolcb` that waits
+on a timer (alias reservation, paced transmission), instead of a thread per timer.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """
+    Runs callbacks after a delay, in deadline order, on one daemon thread started on first use.
+    """
+    def __init__(self) -> None:
+        self._heap = []
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def schedule(self, delay: float, function: callable, *args):
+        """
+        Call ``function(*args)`` after ``delay`` seconds.
+        """
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), function, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pyolcb-scheduler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                _, _, function, args = heapq.heappop(self._heap)
+            try:
+                function(*args)
+            except Exception:
+                logger.exception("Error in scheduled callback %s", function)
+
+
+scheduler = Scheduler()
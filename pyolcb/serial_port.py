@@ -0,0 +1,94 @@
+"""
+==============
+serial_port
+==============
+
+Serial (or any byte stream) transport for :class:`Interface`, e.g. a USB-serial LCC adapter opened with pyserial.
+Frames are carried using a codec, GridConnect by default.
+"""
+import logging
+import threading
+import can
+from .gridconnect import GridConnectCodec
+
+logger = logging.getLogger(__name__)
+
+
+class SerialConnection:
+    """
+    A byte stream carrying CAN frames, with a background reader thread.
+
+    Parameters
+    ----------
+    stream : object
+        An open stream with ``read`` and ``write`` methods, such as a ``serial.Serial``.
+    codec : object = None
+        The framing used on the stream. Defaults to :class:`pyolcb.gridconnect.GridConnectCodec`.
+    buffer_size : int = 4096
+        The maximum number of bytes to read at once.
+    """
+
+    def __init__(self, stream, codec=None, buffer_size: int = 4096) -> None:
+        self.stream = stream
+        self.codec = GridConnectCodec() if codec is None else codec
+        self.buffer_size = buffer_size
+        self._decoder = self.codec.decoder()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._callback = None
+        self._closed = False
+
+    def start(self, callback: callable):
+        """
+        Start the reader thread, which calls ``callback`` with each received :class:`can.Message`.
+        """
+        self._callback = callback
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pyolcb-serial", daemon=True)
+            self._thread.start()
+
+    def _read(self) -> bytes:
+        waiting = getattr(self.stream, 'in_waiting', None)
+        if waiting is not None:
+            return self.stream.read(min(max(waiting, 1), self.buffer_size))
+        if hasattr(self.stream, 'read1'):
+            return self.stream.read1(self.buffer_size)
+        return self.stream.read(self.buffer_size)
+
+    def _run(self):
+        while not self._closed:
+            try:
+                data = self._read()
+            except (OSError, ValueError):
+                return
+            if not data:
+                if getattr(self.stream, 'in_waiting', None) is None:
+                    return
+                continue
+            try:
+                frames = self._decoder.feed(data)
+            except Exception:
+                # Never let undecodable input stop the reader
+                logger.exception("Error decoding serial data")
+                self._decoder.reset()
+                continue
+            for frame in frames:
+                self._callback(frame)
+
+    def send(self, frames: list[can.Message]):
+        """
+        Write frames to the stream.
+        """
+        data = b''.join(self.codec.encode_many(frames))
+        with self._write_lock:
+            self.stream.write(data)
+            if hasattr(self.stream, 'flush'):
+                self.stream.flush()
+
+    def close(self):
+        """
+        Stop reading and close the stream.
+        """
+        self._closed = True
+        if hasattr(self.stream, 'close'):
+            self.stream.close()
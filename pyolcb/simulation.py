@@ -0,0 +1,349 @@
+"""
+==============
+simulation
+==============
+
+An in-process simulated CAN bus, for testing many nodes without CAN hardware or kernel modules.
+
+A :class:`SimulatedNetwork` is the shared medium; each :class:`SimulatedBus` attached to it is a
+:class:`can.BusABC`, so it can be given to an :class:`Interface` like any other bus:
+
+.. code-block:: python
+
+    network = SimulatedNetwork()
+    interface = pyolcb.Interface(network.bus())
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.00', 0xC00), interface)
+    ...
+    network.wait_idle()
+
+Every bus receives frames in the same order. Without a ``bitrate`` frames are delivered as soon as they are sent;
+with one, each frame occupies the bus for its nominal bit time, and frames waiting for the bus are sent lowest CAN
+header first, as arbitration does on a real bus. Frames can be dropped or duplicated, at random (from a seeded
+generator) or by a fault function, and frames from phantom nodes can be injected to provoke alias collisions.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+import can
+
+
+def frame_bits(frame: can.Message) -> int:
+    """
+    The nominal number of bits a frame occupies on the bus (without stuff bits), including the interframe space.
+    """
+    return (67 if frame.is_extended_id else 47) + 8 * len(frame.data)
+
+
+class VirtualClock:
+    """
+    A clock that only moves when advanced, for timestamping simulated frames.
+
+    Parameters
+    ----------
+    start : float = 0.0
+        The initial time, in seconds.
+    """
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> float:
+        """
+        Move the clock forward, returning the new time.
+        """
+        with self._lock:
+            self._now += seconds
+            return self._now
+
+    def advance_to(self, time: float) -> float:
+        """
+        Move the clock forward to a time (if it is not already later), returning the new time.
+        """
+        with self._lock:
+            self._now = max(self._now, time)
+            return self._now
+
+
+class SimulatedBus(can.BusABC):
+    """
+    A :class:`can.BusABC` attached to a :class:`SimulatedNetwork`. Create it with :meth:`SimulatedNetwork.bus`.
+    """
+    def __init__(self, network, channel: str = 'simulated', receive_own_messages: bool = False,
+                 **kwargs) -> None:
+        super().__init__(channel=channel, **kwargs)
+        self.channel_info = 'pyolcb simulated bus'
+        self.network = network
+        self.receive_own_messages = receive_own_messages
+        self._queue = deque()
+        self._readable = threading.Condition(network._lock)
+        self._waiting = False
+        self._read = False
+        self._closed = False
+
+    def _recv_internal(self, timeout: float | None) -> tuple[can.Message | None, bool]:
+        network = self.network
+        with network._lock:
+            self._read = True
+            if not self._queue:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                self._waiting = True
+                network._idle.notify_all()
+                try:
+                    while not self._queue and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return None, False
+                        self._readable.wait(remaining)
+                finally:
+                    self._waiting = False
+                if not self._queue:
+                    return None, False
+            return self._queue.popleft(), False
+
+    def send(self, msg: can.Message, timeout: float | None = None) -> None:
+        if self._closed:
+            raise can.CanOperationError("Bus is shut down")
+        self.network._send(msg, self)
+
+    def shutdown(self) -> None:
+        self.network._detach(self)
+        super().shutdown()
+
+
+class SimulatedNetwork:
+    """
+    The medium shared by :class:`SimulatedBus` objects.
+
+    Parameters
+    ----------
+    bitrate : int = None
+        Bits per second. If set, each frame takes its nominal bit time on the bus and waiting frames are sent in
+        arbitration order; otherwise frames are delivered immediately.
+    clock : VirtualClock = None
+        Clock to timestamp frames with. With a :class:`VirtualClock`, bus timing advances the clock instead of
+        taking real time; otherwise :func:`time.time` is used and a bitrate makes transmission take real time.
+    seed : int = 0
+        Seed of the random generator used for ``drop_rate`` and ``duplicate_rate``.
+    drop_rate : float = 0.0
+        Probability that a frame is lost.
+    duplicate_rate : float = 0.0
+        Probability that a frame is delivered twice.
+
+    Attributes
+    ----------
+    frames_sent : int
+        Frames sent onto the network.
+    frames_dropped : int
+        Frames lost to faults.
+    frames_duplicated : int
+        Frames delivered twice because of faults.
+    """
+    def __init__(self, bitrate: int = None, clock: VirtualClock = None, seed: int = 0, drop_rate: float = 0.0,
+                 duplicate_rate: float = 0.0) -> None:
+        self.bitrate = bitrate
+        self.clock = clock
+        self.drop_rate = drop_rate
+        self.duplicate_rate = duplicate_rate
+        self.random = random.Random(seed)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.frames_duplicated = 0
+        self.buses = ()
+        self._faults = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = []
+        self._sequence = itertools.count()
+        self._paused = False
+        self._busy_until = 0.0
+        self._transmitter = None
+        self._transmitting = False
+
+    def bus(self, receive_own_messages: bool = False, channel: str = 'simulated') -> SimulatedBus:
+        """
+        Attach a new bus to the network.
+
+        Parameters
+        ----------
+        receive_own_messages : bool = False
+            Whether the bus also receives the frames it sends.
+        """
+        bus = SimulatedBus(self, channel, receive_own_messages)
+        with self._lock:
+            self.buses = self.buses + (bus,)
+        return bus
+
+    def add_fault(self, fault: callable):
+        """
+        Add a fault function, called with each frame sent and returning how many times to deliver it: 0 to drop
+        it, 2 to duplicate it, or ``None`` to leave it to the other faults.
+        """
+        self._faults.append(fault)
+
+    def clear_faults(self):
+        """
+        Remove all fault functions and random faults.
+        """
+        self._faults = []
+        self.drop_rate = self.duplicate_rate = 0.0
+
+    def inject(self, frame: can.Message):
+        """
+        Send a frame as if from a node not attached to the network.
+        """
+        self._send(frame, None)
+
+    def collide_alias(self, alias: int, node_id: int = 0):
+        """
+        Inject a Verified Node ID frame from a phantom node using an alias, as another node claiming the same
+        alias would send. The node holding the alias must release it and reserve another.
+        """
+        self.inject(can.Message(arbitration_id=0x19170000 | alias, data=node_id.to_bytes(6, 'big'),
+                                is_extended_id=True))
+
+    def pause(self):
+        """
+        Hold frames sent from now on, until :meth:`step` or :meth:`resume`.
+        """
+        with self._lock:
+            self._paused = True
+
+    def step(self, count: int = 1) -> int:
+        """
+        Send up to ``count`` held frames, lowest CAN header first. Returns the number sent.
+        """
+        sent = 0
+        with self._lock:
+            while sent < count and self._pending:
+                self._transmit(heapq.heappop(self._pending))
+                sent += 1
+            self._idle.notify_all()
+        return sent
+
+    def resume(self):
+        """
+        Send all held frames (in arbitration order) and stop holding frames.
+        """
+        with self._lock:
+            self._paused = False
+            self._drain()
+            self._idle.notify_all()
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of frames waiting to be sent.
+        """
+        return len(self._pending)
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every frame sent has been received and processed: no frames are waiting to be sent (unless the
+        network is paused), and every bus being read has an empty queue and a reader waiting for more. Frames sent
+        while processing are waited for too.
+
+        Returns
+        -------
+        bool
+            ``True`` once idle, ``False`` on timeout.
+        """
+        with self._lock:
+            return self._idle.wait_for(self._is_idle, timeout)
+
+    def _is_idle(self) -> bool:
+        if self._transmitting or (self._pending and not self._paused):
+            return False
+        return all((not x._queue and x._waiting) or not x._read for x in self.buses if not x._closed)
+
+    def _detach(self, bus: SimulatedBus):
+        with self._lock:
+            bus._closed = True
+            bus._readable.notify_all()
+            self.buses = tuple(x for x in self.buses if x is not bus)
+            self._idle.notify_all()
+
+    def _send(self, frame: can.Message, sender: SimulatedBus | None):
+        with self._lock:
+            heapq.heappush(self._pending, (frame.arbitration_id, next(self._sequence), frame, sender))
+            if not self._paused:
+                self._drain()
+
+    def _drain(self):
+        # Called holding the lock
+        if self.bitrate and self.clock is None:
+            # Real-time transmission, by a thread sending one frame per bit time
+            if self._transmitter is None:
+                self._transmitter = threading.Thread(target=self._run, name='pyolcb-simulated-bus', daemon=True)
+                self._transmitter.start()
+            self._idle.notify_all()
+            return
+        while self._pending:
+            self._transmit(heapq.heappop(self._pending))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending or self._paused:
+                    self._idle.wait()
+                entry = heapq.heappop(self._pending)
+                self._transmitting = True
+                start = max(time.time(), self._busy_until)
+                self._busy_until = start + frame_bits(entry[2]) / self.bitrate
+                end = self._busy_until
+            delay = end - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            with self._lock:
+                self._transmitting = False
+                self._deliver(entry[2], entry[3], end)
+
+    def _transmit(self, entry: tuple):
+        # Called holding the lock: send one frame now
+        frame = entry[2]
+        timestamp = self.clock() if self.clock is not None else time.time()
+        if self.bitrate:
+            self._busy_until = timestamp = max(timestamp, self._busy_until) + frame_bits(frame) / self.bitrate
+            if self.clock is not None:
+                self.clock.advance_to(timestamp)
+        self._deliver(frame, entry[3], timestamp)
+
+    def _deliver(self, frame: can.Message, sender: SimulatedBus | None, timestamp: float):
+        # Called holding the lock
+        self.frames_sent += 1
+        copies = None
+        for fault in self._faults:
+            copies = fault(frame)
+            if copies is not None:
+                break
+        if copies is None:
+            copies = 1
+            if self.drop_rate and self.random.random() < self.drop_rate:
+                copies = 0
+            elif self.duplicate_rate and self.random.random() < self.duplicate_rate:
+                copies = 2
+        if copies == 0:
+            self.frames_dropped += 1
+            return
+        if copies > 1:
+            self.frames_duplicated += 1
+        received = can.Message(timestamp=timestamp, arbitration_id=frame.arbitration_id,
+                               is_extended_id=frame.is_extended_id, data=frame.data, channel='simulated')
+        for bus in self.buses:
+            if bus is sender:
+                if not bus.receive_own_messages:
+                    continue
+                message = can.Message(timestamp=timestamp, arbitration_id=frame.arbitration_id,
+                                      is_extended_id=frame.is_extended_id, data=frame.data, is_rx=False,
+                                      channel='simulated')
+            else:
+                message = received
+            bus._queue.extend([message] * copies)
+            if bus._waiting:
+                bus._readable.notify()
+        self._idle.notify_all()
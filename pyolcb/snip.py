@@ -0,0 +1,247 @@
+"""
+==============
+snip
+==============
+
+Simple Node Information Protocol (SNIP): the manufacturer, model and version strings and the user-assigned name
+and description of a node, and a client that queries them, one node or a whole network at a time.
+"""
+import threading
+from concurrent.futures import Future
+from . import message_types
+from .address import Address
+from .message import Message, FRAME_FIRST, FRAME_LAST
+from .request_pool import PendingRequest, RequestPool
+from .scheduler import scheduler
+
+# Maximum lengths (including the terminating null) of the manufacturer and user strings
+_MANUFACTURER_LENGTHS = (41, 41, 21, 21)
+_USER_LENGTHS = (63, 64)
+
+
+def _encode(value: str, length: int) -> bytes:
+    data = value.encode('utf-8')[:length - 1]
+    # Don't leave a partial character at the end
+    return data.decode('utf-8', 'ignore').encode('utf-8') + b'\0'
+
+
+class SNIPRecord:
+    """
+    The information a node returns in reply to a Simple Node Ident Info Request.
+
+    Attributes
+    ----------
+    manufacturer : str
+    model : str
+    hardware_version : str
+    software_version : str
+    user_name : str
+    user_description : str
+    """
+    __slots__ = ('manufacturer', 'model', 'hardware_version', 'software_version', 'user_name', 'user_description')
+
+    def __init__(self, manufacturer: str = '', model: str = '', hardware_version: str = '', software_version: str = '',
+                 user_name: str = '', user_description: str = '') -> None:
+        self.manufacturer = manufacturer
+        self.model = model
+        self.hardware_version = hardware_version
+        self.software_version = software_version
+        self.user_name = user_name
+        self.user_description = user_description
+
+    def __repr__(self) -> str:
+        return "SNIPRecord(%r, %r, %r, %r, %r, %r)" % tuple(getattr(self, x) for x in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SNIPRecord) and all(getattr(self, x) == getattr(other, x) for x in self.__slots__)
+
+    @property
+    def identity(self) -> tuple[str, str, str]:
+        """
+        The ``(manufacturer, model, software_version)`` identifying the node's firmware, e.g. to look up its CDI
+        with :meth:`pyolcb.cdi.CDIFetcher.fetch`.
+        """
+        return self.manufacturer, self.model, self.software_version
+
+    def encode(self) -> bytes:
+        """
+        Encode the reply payload: version 4 and the four manufacturer strings, then version 2 and the two user
+        strings, each null-terminated and truncated to its maximum length.
+        """
+        strings = (self.manufacturer, self.model, self.hardware_version, self.software_version)
+        return (bytes([4]) + b''.join(_encode(x, n) for x, n in zip(strings, _MANUFACTURER_LENGTHS))
+                + bytes([2]) + b''.join(_encode(x, n) for x, n in zip((self.user_name, self.user_description),
+                                                                      _USER_LENGTHS)))
+
+    @classmethod
+    def from_bytes(cls, data: bytes | bytearray):
+        """
+        Decode a reply payload. Missing trailing strings are left empty.
+        """
+        data = bytes(data)
+        manufacturer = data[1:].split(b'\0', 4)
+        strings = [x.decode('utf-8', 'replace') for x in manufacturer[:4]]
+        strings += [''] * (4 - len(strings))
+        if len(manufacturer) > 4 and manufacturer[4]:
+            strings += [x.decode('utf-8', 'replace') for x in manufacturer[4][1:].split(b'\0')[:2]]
+        return cls(*strings)
+
+
+def reply_complete(data: bytes | bytearray) -> bool:
+    """
+    Whether a (partially received) reply payload holds all six strings.
+    """
+    return data.count(0) >= len(_MANUFACTURER_LENGTHS) + len(_USER_LENGTHS)
+
+
+class _Request(PendingRequest):
+    __slots__ = ('destination', 'buffer')
+
+    def __init__(self, destination: Address) -> None:
+        super().__init__(destination.get_alias())
+        self.destination = destination
+        self.buffer = bytearray()
+
+
+class SNIPClient:
+    """
+    Queries the Simple Node Information of other nodes.
+
+    Up to ``max_concurrent`` requests are outstanding at once, across all nodes, and each is failed with
+    :class:`TimeoutError` if the node does not reply in ``timeout`` seconds. Replies are cached per alias until the
+    node sends Initialization Complete.
+
+    Parameters
+    ----------
+    node : Node
+        The local :class:`pyolcb.Node` to send requests from.
+    max_concurrent : int = 8
+        Maximum number of requests outstanding at once.
+    timeout : float = 3.0
+        Seconds to wait for each reply.
+    cache : bool = True
+        Whether to cache replies.
+    """
+    def __init__(self, node, max_concurrent: int = 8, timeout: float = 3.0, cache: bool = True) -> None:
+        self.node = node
+        self.cache_enabled = cache
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+        self._requests = RequestPool(self._transmit, max_concurrent, timeout,
+                                     "No reply to Simple Node Ident Info Request")
+        self._cache = {}
+        self._scans = []
+        node.register_message_handler(message_types.Simple_Node_Ident_Info_Reply, self._process_reply)
+        for mti in (message_types.Initialization_Complete, message_types.Initialization_Complete_Simple):
+            node.chain_message_handler(mti, self._initialized)
+        for mti in (message_types.Verified_Node_ID_Number, message_types.Verified_Node_ID_Number_Simple):
+            node.chain_message_handler(mti, self._verified)
+
+    def request(self, destination: Address, cache: bool = True) -> Future:
+        """
+        Request the Simple Node Information of another node.
+
+        Parameters
+        ----------
+        destination : Address
+            The node to query.
+        cache : bool = True
+            Whether a cached reply may be returned.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to a :class:`SNIPRecord`, or fails with :class:`TimeoutError`.
+        """
+        alias = destination.get_alias()
+        with self._lock:
+            record = self._cache.get(alias) if cache and self.cache_enabled else None
+            if record is not None:
+                self.cache_hits += 1
+                future = Future()
+                future.set_result(record)
+                return future
+        return self._requests.submit(alias, lambda: _Request(destination)).future
+
+    def scan_network(self, discovery_time: float = 0.5) -> Future:
+        """
+        Take an inventory of the network: send Verify Node ID Global, then request the Simple Node Information of
+        every node that replies within ``discovery_time`` seconds (up to ``max_concurrent`` at a time).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to a dict mapping the 48-bit node ID of each node found to its :class:`SNIPRecord`, or to
+            ``None`` if it did not reply to the request.
+        """
+        found = {}
+        future = Future()
+        with self._lock:
+            self._scans.append(found)
+        self.node.send(Message(message_types.Verify_Node_ID_Number_Global, b'', self.node.address))
+        scheduler.schedule(discovery_time, self._scan_discovered, found, future)
+        return future
+
+    def invalidate(self, destination: Address = None):
+        """
+        Discard the cached reply of one node, or of all nodes.
+        """
+        with self._lock:
+            if destination is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(destination.get_alias(), None)
+
+    def _scan_discovered(self, found: dict, future: Future):
+        with self._lock:
+            self._scans.remove(found)
+        addresses = list(found.values())
+        results = {}
+        if not addresses:
+            future.set_result(results)
+            return
+        remaining = [len(addresses)]
+        lock = threading.Lock()
+
+        def done(address, request):
+            with lock:
+                results[address.get_full_address()] = request.result() if request.exception() is None else None
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            future.set_result(results)
+
+        for address in addresses:
+            self.request(address).add_done_callback(lambda request, address=address: done(address, request))
+
+    def _transmit(self, request: _Request):
+        self.node.send(Message(message_types.Simple_Node_Ident_Info_Request,
+                               request.destination.get_alias().to_bytes(2, 'big'), self.node.address,
+                               request.destination))
+
+    def _store(self, request: _Request, result: SNIPRecord):
+        if self.cache_enabled:
+            with self._lock:
+                self._cache[request.key] = result
+
+    def _process_reply(self, message: Message):
+        request = self._requests.get(message.source.get_alias())
+        if request is None:
+            return
+        framing = message.data[0] & 0xF0
+        if framing == FRAME_FIRST:
+            request.buffer.clear()
+        request.buffer += message.data[2:]
+        # Older nodes send replies without framing bits, so the end is found by counting the strings
+        if framing == FRAME_LAST or reply_complete(request.buffer):
+            self._requests.complete(request, SNIPRecord.from_bytes(request.buffer), store=self._store)
+
+    def _initialized(self, message: Message):
+        self.invalidate(message.source)
+
+    def _verified(self, message: Message):
+        if self._scans and len(message.data) >= 6 and message.source.get_alias() != self.node.get_alias():
+            address = Address(int.from_bytes(message.data[:6], 'big'), message.source.get_alias())
+            with self._lock:
+                for found in self._scans:
+                    found[address.get_alias()] = address
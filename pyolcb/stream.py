@@ -0,0 +1,259 @@
+"""
+==============
+stream
+==============
+
+Sender and receiver state machines for the OpenLCB stream transport. After the receiver accepts a stream and
+the buffer size is agreed, the sender transmits one buffer (window) of data at a time and waits for the
+receiver's Stream Data Proceed before sending the next.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from enum import Enum
+import can
+
+DEFAULT_BUFFER_SIZE = 1024
+
+# Stream Initiate Reply flags
+STREAM_ACCEPT = 0x8000
+STREAM_REJECT_PERMANENT = 0x1000
+STREAM_REJECT_INVALID_REQUEST = 0x1080  # Permanent error: invalid arguments
+STREAM_REJECT_BUFFER_UNAVAILABLE = 0x2020
+
+
+class StreamState(Enum):
+    INITIATING = 0
+    SENDING = 1
+    WAITING = 2
+    COMPLETE = 3
+    FAILED = 4
+
+
+def stream_header(source: int, destination: int) -> int:
+    """
+    The CAN header of Stream Data Send frames between two aliases.
+    """
+    return 0x1F000000 | destination << 12 | source
+
+
+class _Stream:
+    buffer_size = DEFAULT_BUFFER_SIZE
+
+    def __init__(self) -> None:
+        self.future = Future()
+        self.state = StreamState.INITIATING
+        self.bytes_transferred = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Seconds from the start of the transfer of data until it completed (or until now, if still in progress).
+        """
+        if self.started is None:
+            return 0.0
+        return (self.finished if self.finished is not None else time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Bytes transferred per second.
+        """
+        elapsed = self.elapsed
+        return self.bytes_transferred / elapsed if elapsed > 0 else 0.0
+
+    def _finish(self, result=None, exception: Exception = None):
+        if self.future.done():
+            return
+        self.finished = time.perf_counter()
+        if exception is not None:
+            self.state = StreamState.FAILED
+            self.future.set_exception(exception)
+        else:
+            self.state = StreamState.COMPLETE
+            self.future.set_result(result)
+
+
+class StreamSender(_Stream):
+    """
+    Sends data from a buffer or file-like object to another node as a stream.
+
+    Parameters
+    ----------
+    source : bytes | bytearray | memoryview | object
+        The data to send, or a file-like object to read it from (using ``readinto`` where available).
+    source_alias : int
+        The alias of the sending node.
+    destination_alias : int
+        The alias of the receiving node.
+    source_stream_id : int
+        The sender's ID for this stream.
+    send_frames : callable
+        Function sending a list of :class:`can.Message` frames.
+    buffer_size : int = DEFAULT_BUFFER_SIZE
+        The buffer size to propose; the receiver may reduce it.
+    timeout : float = 3.0
+        Seconds to wait for each reply from the receiver.
+    """
+
+    def __init__(self, source, source_alias: int, destination_alias: int, source_stream_id: int,
+                 send_frames: callable, buffer_size: int = DEFAULT_BUFFER_SIZE, timeout: float = 3.0) -> None:
+        super().__init__()
+        self.source_alias = source_alias
+        self.destination_alias = destination_alias
+        self.source_stream_id = source_stream_id
+        self.destination_stream_id = None
+        self.buffer_size = buffer_size
+        self.timeout = timeout
+        self._send_frames = send_frames
+        self._header = stream_header(source_alias, destination_alias)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source).cast('B')
+            self._source = None
+        else:
+            self._view = None
+            self._source = source
+        self._offset = 0
+        self._window = None
+        self._timer = None
+
+    def initiate_payload(self) -> bytes:
+        """
+        The content of the Stream Initiate Request (after the destination alias).
+        """
+        return self.buffer_size.to_bytes(2, 'big') + bytes(2) + bytes([self.source_stream_id, 0])
+
+    def _read(self) -> memoryview:
+        if self._view is not None:
+            window = self._view[self._offset:self._offset + self.buffer_size]
+            self._offset += len(window)
+            return window
+        if self._window is None:
+            self._window = bytearray(self.buffer_size)
+        view = memoryview(self._window)
+        if hasattr(self._source, 'readinto'):
+            n = self._source.readinto(view) or 0
+            return view[:n]
+        data = self._source.read(self.buffer_size) or b''
+        view[:len(data)] = data
+        return view[:len(data)]
+
+    def _arm_timer(self):
+        self._cancel_timer()
+        self._timer = threading.Timer(self.timeout, self._timed_out)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _timed_out(self):
+        self._finish(exception=TimeoutError("No reply from stream receiver"))
+
+    def start(self, send_request: callable):
+        """
+        Send the Stream Initiate Request using ``send_request`` (a function taking the request content).
+        """
+        self._arm_timer()
+        send_request(self.initiate_payload())
+
+    def process_reply(self, buffer_size: int, flags: int, destination_stream_id: int, send_complete: callable):
+        """
+        Handle the Stream Initiate Reply, and start sending if the stream was accepted.
+        """
+        with self._lock:
+            if self.state != StreamState.INITIATING:
+                return
+            if buffer_size == 0 or not flags & STREAM_ACCEPT:
+                self._cancel_timer()
+                self._finish(exception=Exception("Stream rejected with error code 0x%04X" % flags))
+                return
+            self.buffer_size = min(self.buffer_size, buffer_size)
+            self.destination_stream_id = destination_stream_id
+            self.started = time.perf_counter()
+            self._send_window(send_complete)
+
+    def process_proceed(self, send_complete: callable):
+        """
+        Handle a Stream Data Proceed, sending the next window of data.
+        """
+        with self._lock:
+            if self.state == StreamState.WAITING:
+                self._send_window(send_complete)
+
+    def _send_window(self, send_complete: callable):
+        self.state = StreamState.SENDING
+        window = self._read()
+        if len(window):
+            prefix = bytes([self.destination_stream_id])
+            header = self._header
+            self._send_frames([can.Message(arbitration_id=header, data=prefix + window[i:i + 7], is_extended_id=True)
+                               for i in range(0, len(window), 7)])
+            self.bytes_transferred += len(window)
+        if len(window) < self.buffer_size:
+            self._cancel_timer()
+            send_complete(bytes([self.source_stream_id, self.destination_stream_id])
+                          + self.bytes_transferred.to_bytes(4, 'big'))
+            self._finish(self)
+        else:
+            self.state = StreamState.WAITING
+            self._arm_timer()
+
+
+class StreamReceiver(_Stream):
+    """
+    Receives a stream from another node into a buffer or file-like object.
+
+    Attributes
+    ----------
+    sink : bytearray | object
+        Where received data is written: appended to a :class:`bytearray`, or passed (as a :class:`memoryview`)
+        to the ``write`` method of a file-like object.
+    """
+
+    def __init__(self, source_alias: int, source_stream_id: int, destination_stream_id: int, buffer_size: int) -> None:
+        super().__init__()
+        self.source_alias = source_alias
+        self.source_stream_id = source_stream_id
+        self.destination_stream_id = destination_stream_id
+        self.buffer_size = buffer_size
+        self.sink = None
+        self._window_received = 0
+        self._expected = None
+
+    def accept(self, sink):
+        self.sink = sink
+        self.state = StreamState.SENDING
+        self.started = time.perf_counter()
+
+    def process_data(self, data: bytes | bytearray, send_proceed: callable):
+        """
+        Handle a Stream Data Send frame (including the leading destination stream ID).
+        """
+        payload = memoryview(data)[1:]
+        if isinstance(self.sink, bytearray):
+            self.sink += payload
+        else:
+            self.sink.write(payload)
+        self.bytes_transferred += len(payload)
+        self._window_received += len(payload)
+        if self._window_received >= self.buffer_size:
+            self._window_received -= self.buffer_size
+            send_proceed(bytes([self.source_stream_id, self.destination_stream_id]) + bytes(2))
+        if self._expected is not None and self.bytes_transferred >= self._expected:
+            self._finish(self.sink)
+
+    def process_complete(self, total: int = None):
+        """
+        Handle Stream Data Complete. If ``total`` is given and data frames are still outstanding (e.g. reordered by
+        priority in a transmit queue), the stream completes once they have arrived.
+        """
+        if total is not None and self.bytes_transferred < total:
+            self._expected = total
+        else:
+            self._finish(self.sink)
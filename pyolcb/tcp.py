@@ -0,0 +1,209 @@
+"""
+==============
+tcp
+==============
+
+TCP transport for :class:`Interface`. CAN frames are carried over the TCP stream using a codec; the default
+:class:`pyolcb.gridconnect.GridConnectCodec` is the text framing spoken by OpenLCB hubs and JMRI (usually on port
+12021).
+"""
+import logging
+import socket
+import struct
+import threading
+import time
+import can
+from .gridconnect import GridConnectCodec
+
+logger = logging.getLogger(__name__)
+
+_record = struct.Struct('>IB8s')
+_EXTENDED_FLAG = 0x80000000
+# Stay well under the IOV_MAX limit on the number of buffers passed to sendmsg
+_MAX_BUFFERS = 512
+
+
+class BinaryCodec:
+    """
+    Encodes each CAN frame as a fixed 13 byte record: the 32-bit identifier (with bit 31 set for extended
+    identifiers), the data length, and 8 data bytes (zero padded).
+
+    This framing is specific to pyOLCB (it is not the OpenLCB-TCP message format, and hubs and JMRI do not speak
+    it); it is only suitable between pyOLCB processes, where it is cheaper to encode and decode than GridConnect.
+    """
+
+    @staticmethod
+    def encode(frame: can.Message) -> bytes:
+        arbitration_id = frame.arbitration_id | _EXTENDED_FLAG if frame.is_extended_id else frame.arbitration_id
+        return _record.pack(arbitration_id, frame.dlc, bytes(frame.data))
+
+    def encode_many(self, frames: list[can.Message]) -> list[bytes]:
+        return [self.encode(frame) for frame in frames]
+
+    def decoder(self):
+        return BinaryDecoder()
+
+
+class BinaryDecoder:
+    """
+    Incremental decoder for :class:`BinaryCodec` records. Whole records are unpacked in bulk; a trailing
+    partial record is kept until the rest of it arrives.
+    """
+
+    def __init__(self) -> None:
+        self._pending = b''
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[can.Message]:
+        if self._pending:
+            data = self._pending + bytes(data)
+        whole = len(data) - len(data) % _record.size
+        frames = [
+            can.Message(arbitration_id=arbitration_id & 0x1FFFFFFF, is_extended_id=bool(arbitration_id & _EXTENDED_FLAG),
+                        dlc=dlc, data=payload[:dlc])
+            for arbitration_id, dlc, payload in _record.iter_unpack(data[:whole])
+        ]
+        self._pending = bytes(data[whole:])
+        return frames
+
+    def reset(self):
+        self._pending = b''
+
+
+class TCPConnection:
+    """
+    A TCP connection carrying CAN frames, with a background reader thread and automatic reconnection.
+
+    Parameters
+    ----------
+    connection : socket.socket | tuple[str, int]
+        A connected socket, or the (host, port) to connect to.
+    codec : object = None
+        The framing used on the stream. Defaults to :class:`pyolcb.gridconnect.GridConnectCodec`.
+    reconnect : bool = True
+        Whether to reconnect (with exponential back-off) when the connection drops.
+    buffer_size : int = 65536
+        The size of the receive buffer; many frames are decoded from each read.
+    """
+    reconnect = True
+    max_backoff = 5.0
+
+    def __init__(self, connection: socket.socket | tuple[str, int], codec=None, reconnect: bool = True,
+                 buffer_size: int = 65536) -> None:
+        self.codec = GridConnectCodec() if codec is None else codec
+        self.reconnect = reconnect
+        self._buffer = bytearray(buffer_size)
+        self._decoder = self.codec.decoder()
+        self._write_lock = threading.Lock()
+        self._connected = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._callback = None
+        if isinstance(connection, socket.socket):
+            self.socket = connection
+            self.address = connection.getpeername()
+        else:
+            self.address = tuple(connection)
+            self.socket = socket.create_connection(self.address)
+        self._configure(self.socket)
+        self._connected.set()
+
+    @staticmethod
+    def _configure(sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def start(self, callback: callable):
+        """
+        Start the reader thread, which calls ``callback`` with each received :class:`can.Message`.
+        """
+        self._callback = callback
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pyolcb-tcp", daemon=True)
+            self._thread.start()
+
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout: float = None) -> bool:
+        """
+        Wait until the connection is (re-)established.
+        """
+        return self._connected.wait(timeout)
+
+    def send(self, frames: list[can.Message]):
+        """
+        Write frames to the stream, gathering all encoded frames into as few system calls as possible.
+        """
+        buffers = self.codec.encode_many(frames)
+        with self._write_lock:
+            sock = self.socket
+            if sock is None or not self._connected.is_set():
+                raise ConnectionError("Not connected")
+            if not hasattr(sock, 'sendmsg') or len(buffers) > _MAX_BUFFERS:
+                sock.sendall(b''.join(buffers))
+                return
+            remaining = sum(len(x) for x in buffers)
+            while remaining:
+                sent = sock.sendmsg(buffers)
+                remaining -= sent
+                if remaining:
+                    buffers = [memoryview(b''.join(buffers))[sent:]]
+
+    def _run(self):
+        backoff = 0.1
+        view = memoryview(self._buffer)
+        while not self._closed:
+            sock = self.socket
+            if sock is None:
+                try:
+                    sock = socket.create_connection(self.address, timeout=self.max_backoff)
+                    sock.settimeout(None)
+                    self._configure(sock)
+                except OSError:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+                backoff = 0.1
+                self.socket = sock
+                self._connected.set()
+            try:
+                n = sock.recv_into(self._buffer)
+            except OSError:
+                n = 0
+            if n == 0:
+                self._disconnect()
+                if not self.reconnect:
+                    return
+                continue
+            try:
+                frames = self._decoder.feed(view[:n])
+            except Exception:
+                # Never let undecodable input stop the reader
+                logger.exception("Error decoding data from %s", self.address)
+                self._decoder.reset()
+                continue
+            for frame in frames:
+                self._callback(frame)
+
+    def _disconnect(self):
+        with self._write_lock:
+            self._connected.clear()
+            if self.socket is not None:
+                try:
+                    self.socket.close()
+                except OSError:
+                    pass
+            self.socket = None
+            self._decoder.reset()
+
+    def close(self):
+        """
+        Close the connection and stop reconnecting.
+        """
+        self._closed = True
+        sock = self.socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._disconnect()
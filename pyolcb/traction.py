@@ -0,0 +1,363 @@
+"""
+==============
+traction
+==============
+
+Traction Control Protocol: a :class:`Throttle` driving trains, and a :class:`TrainNode` being driven.
+
+Throttles driven by a user interface can be asked for many more speed changes than a CAN bus carries, so the
+:class:`Throttle` coalesces them: commands to a train are sent at most once per ``min_interval``, and only the
+latest speed and the latest value of each function changed in the meantime are sent, back to back.
+"""
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from . import message_types, protocols
+from .address import Address
+from .message import Message, AddressedReassembler, addressed_messages
+from .exceptions import TractionError
+from .node import Node
+from .scheduler import scheduler
+
+SET_SPEED = 0x00
+SET_FUNCTION = 0x01
+EMERGENCY_STOP = 0x02
+QUERY_SPEED = 0x10
+QUERY_FUNCTION = 0x11
+CONTROLLER = 0x20
+MANAGEMENT = 0x40
+
+# Controller configuration and management sub-commands
+ASSIGN_CONTROLLER = 0x01
+RELEASE_CONTROLLER = 0x02
+QUERY_CONTROLLER = 0x03
+RESERVE = 0x01
+RELEASE = 0x02
+NOOP = 0x03
+
+_UNKNOWN_SPEED = b'\x7e\x00'
+
+
+def encode_speed(speed: float, reverse: bool = False) -> bytes:
+    """
+    Encode a speed (in metres per second) and direction as a big-endian IEEE half-precision float, whose sign is
+    the direction.
+    """
+    speed = abs(float(speed))
+    return struct.pack('>e', -speed if reverse else speed)
+
+
+def decode_speed(data: bytes | bytearray) -> tuple[float, bool]:
+    """
+    Decode a speed encoded by :func:`encode_speed`, returning ``(speed, reverse)``.
+    """
+    return abs(struct.unpack('>e', bytes(data[:2]))[0]), bool(data[0] & 0x80)
+
+
+class _Train:
+    __slots__ = ('destination', 'speed', 'functions', 'last_sent', 'scheduled')
+
+    def __init__(self, destination: Address) -> None:
+        self.destination = destination
+        self.speed = None
+        self.functions = {}
+        self.last_sent = 0.0
+        self.scheduled = False
+
+
+class Throttle:
+    """
+    Drives trains through a local :class:`pyolcb.Node`.
+
+    Parameters
+    ----------
+    node : Node
+        The local node to send commands from.
+    min_interval : float = 0.05
+        Minimum seconds between batches of speed and function commands to each train.
+    timeout : float = 3.0
+        Seconds to wait for replies to assignments and queries.
+
+    Attributes
+    ----------
+    commands_sent : int
+        Speed and function commands sent.
+    commands_coalesced : int
+        Speed and function commands replaced by a later one before being sent.
+    """
+    def __init__(self, node: Node, min_interval: float = 0.05, timeout: float = 3.0) -> None:
+        self.node = node
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.commands_sent = 0
+        self.commands_coalesced = 0
+        self._lock = threading.Lock()
+        self._trains = {}
+        self._pending = {}
+        self._replies = AddressedReassembler()
+        node.register_message_handler(message_types.Traction_Control_Reply, self._process_reply)
+
+    def assign(self, train: Address) -> Future:
+        """
+        Make this throttle the controller of a train.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves once the train accepts, or fails with :class:`pyolcb.exceptions.TractionError` or
+            :class:`TimeoutError`.
+        """
+        future = self._expect((train.get_alias(), CONTROLLER, ASSIGN_CONTROLLER))
+        self._send(train, bytes([CONTROLLER, ASSIGN_CONTROLLER, 0]) + self.node.address.full)
+        return future
+
+    def release(self, train: Address):
+        """
+        Send any pending commands, then stop controlling a train.
+        """
+        self.flush(train)
+        with self._lock:
+            self._trains.pop(train.get_alias(), None)
+        return self._send(train, bytes([CONTROLLER, RELEASE_CONTROLLER, 0]) + self.node.address.full)
+
+    def set_speed(self, train: Address, speed: float, reverse: bool = False):
+        """
+        Set the speed (in metres per second) and direction of a train. If commands were sent to the train less
+        than ``min_interval`` ago, the speed is sent later, unless replaced by another in the meantime.
+        """
+        with self._lock:
+            state = self._train(train)
+            if state.speed is not None:
+                self.commands_coalesced += 1
+            state.speed = (speed, reverse)
+            send = self._due(state)
+        if send:
+            self._flush(state)
+
+    def set_function(self, train: Address, function: int, value: int):
+        """
+        Set a function (e.g. 0 for the headlight) of a train, batched with other commands as for :meth:`set_speed`.
+        """
+        with self._lock:
+            state = self._train(train)
+            if function in state.functions:
+                self.commands_coalesced += 1
+            state.functions[function] = value
+            send = self._due(state)
+        if send:
+            self._flush(state)
+
+    def emergency_stop(self, train: Address):
+        """
+        Stop a train immediately, discarding any pending speed.
+        """
+        with self._lock:
+            state = self._trains.get(train.get_alias())
+            if state is not None:
+                state.speed = None
+        return self._send(train, bytes([EMERGENCY_STOP]))
+
+    def flush(self, train: Address = None):
+        """
+        Send the pending commands to a train (or to every train) now.
+        """
+        with self._lock:
+            states = list(self._trains.values()) if train is None else [self._trains.get(train.get_alias())]
+        for state in states:
+            if state is not None:
+                self._flush(state)
+
+    def query_speed(self, train: Address) -> Future:
+        """
+        Ask a train for its speed.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the ``(speed, reverse)`` last set, or fails with :class:`TimeoutError`.
+        """
+        future = self._expect((train.get_alias(), QUERY_SPEED))
+        self._send(train, bytes([QUERY_SPEED]))
+        return future
+
+    def query_function(self, train: Address, function: int) -> Future:
+        """
+        Ask a train for the value of a function.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the value, or fails with :class:`TimeoutError`.
+        """
+        future = self._expect((train.get_alias(), QUERY_FUNCTION, function))
+        self._send(train, bytes([QUERY_FUNCTION]) + function.to_bytes(3, 'big'))
+        return future
+
+    def _train(self, train: Address) -> _Train:
+        # Called holding the lock
+        state = self._trains.get(train.get_alias())
+        if state is None:
+            state = self._trains[train.get_alias()] = _Train(train)
+        return state
+
+    def _due(self, state: _Train) -> bool:
+        # Called holding the lock: whether to send now, otherwise a flush is scheduled
+        if state.scheduled:
+            return False
+        delay = state.last_sent + self.min_interval - time.monotonic()
+        if delay <= 0:
+            return True
+        state.scheduled = True
+        scheduler.schedule(delay, self._flush, state)
+        return False
+
+    def _flush(self, state: _Train):
+        with self._lock:
+            state.scheduled = False
+            commands = []
+            if state.speed is not None:
+                commands.append(bytes([SET_SPEED]) + encode_speed(*state.speed))
+            commands += [bytes([SET_FUNCTION]) + function.to_bytes(3, 'big') + (value & 0xFFFF).to_bytes(2, 'big')
+                         for function, value in state.functions.items()]
+            state.speed = None
+            state.functions = {}
+            if not commands:
+                return
+            state.last_sent = time.monotonic()
+            self.commands_sent += len(commands)
+        self.node.send([message for command in commands
+                        for message in addressed_messages(message_types.Traction_Control_Command, command,
+                                                          self.node.address, state.destination)])
+
+    def _send(self, train: Address, command: bytes):
+        return self.node.send(addressed_messages(message_types.Traction_Control_Command, command, self.node.address,
+                                                 train))
+
+    def _expect(self, key: tuple) -> Future:
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = Future()
+                scheduler.schedule(self.timeout, self._resolve, key, None, TimeoutError("No reply from train"))
+        return future
+
+    def _resolve(self, key: tuple, result=None, exception: Exception = None):
+        with self._lock:
+            future = self._pending.pop(key, None)
+        if future is None:
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _process_reply(self, message: Message):
+        if message.destination != self.node.address:
+            return
+        reply = self._replies.add(message)
+        if not reply:
+            return
+        alias = message.source.get_alias()
+        match reply[0] & 0x7F:
+            case 0x10 if len(reply) >= 3:  # QUERY_SPEED
+                self._resolve((alias, QUERY_SPEED), decode_speed(reply[1:3]))
+            case 0x11 if len(reply) >= 6:  # QUERY_FUNCTION
+                self._resolve((alias, QUERY_FUNCTION, int.from_bytes(reply[1:4], 'big')),
+                              int.from_bytes(reply[4:6], 'big'))
+            case 0x20 if len(reply) >= 3 and reply[1] == ASSIGN_CONTROLLER:
+                if reply[2]:
+                    self._resolve((alias, CONTROLLER, ASSIGN_CONTROLLER), exception=TractionError(reply[2]))
+                else:
+                    self._resolve((alias, CONTROLLER, ASSIGN_CONTROLLER), True)
+
+
+class TrainNode(Node):
+    """
+    A :class:`Node` that is a train: it applies Traction Control commands to its state and answers queries.
+
+    Attributes
+    ----------
+    speed : float
+        The speed set, in metres per second.
+    reverse : bool
+        Whether the train is set to run in reverse.
+    emergency_stopped : bool
+        Whether the train was stopped by an emergency stop (until its speed is next set).
+    functions : dict[int, int]
+        The value of each function set.
+    controller : int
+        The node ID of the assigned controller (throttle), or ``None``.
+    """
+    speed = 0.0
+    reverse = False
+    emergency_stopped = False
+    functions = None
+    controller = None
+    train_handler = lambda *args: None
+
+    def __init__(self, address: Address, interfaces):
+        self.functions = {}
+        self._commands = AddressedReassembler()
+        super().__init__(address, interfaces)
+        self.add_supported_protocol(protocols.Protocol.TRAIN_CONTROL)
+        self.register_message_handler(message_types.Traction_Control_Command, self._process_traction_command)
+
+    def set_train_handler(self, train_handler: callable):
+        """
+        Register a function to be run after a command changes the train's state, e.g. to drive a model.
+
+        Parameters
+        ----------
+        train_handler : callable
+            The function, taking the :class:`TrainNode` as its parameter.
+        """
+        self.train_handler = train_handler
+        return self.train_handler
+
+    def _reply(self, destination: Address, payload: bytes):
+        self.send(addressed_messages(message_types.Traction_Control_Reply, payload, self.address, destination))
+
+    def _process_traction_command(self, message: Message):
+        if message.destination != self.address:
+            return
+        command = self._commands.add(message)
+        if not command:
+            return
+        changed = False
+        match command[0] & 0x7F, command[1:2]:
+            case (0x00, _) if len(command) >= 3:  # SET_SPEED
+                self.speed, self.reverse = decode_speed(command[1:3])
+                self.emergency_stopped = False
+                changed = True
+            case (0x01, _) if len(command) >= 6:  # SET_FUNCTION
+                self.functions[int.from_bytes(command[1:4], 'big')] = int.from_bytes(command[4:6], 'big')
+                changed = True
+            case (0x02, _):  # EMERGENCY_STOP
+                self.speed = 0.0
+                self.emergency_stopped = True
+                changed = True
+            case (0x10, _):  # QUERY_SPEED
+                speed = encode_speed(self.speed, self.reverse)
+                self._reply(message.source, bytes([QUERY_SPEED]) + speed + bytes([int(self.emergency_stopped)])
+                            + speed + _UNKNOWN_SPEED)
+            case (0x11, _) if len(command) >= 4:  # QUERY_FUNCTION
+                function = int.from_bytes(command[1:4], 'big')
+                self._reply(message.source, bytes([QUERY_FUNCTION]) + command[1:4]
+                            + self.functions.get(function, 0).to_bytes(2, 'big'))
+            case (0x20, b'\x01') if len(command) >= 9:  # ASSIGN_CONTROLLER
+                # The most recent controller takes over
+                self.controller = int.from_bytes(command[3:9], 'big')
+                self._reply(message.source, bytes([CONTROLLER, ASSIGN_CONTROLLER, 0]))
+                changed = True
+            case (0x20, b'\x02') if len(command) >= 9:  # RELEASE_CONTROLLER
+                if self.controller == int.from_bytes(command[3:9], 'big'):
+                    self.controller = None
+                    changed = True
+            case (0x20, b'\x03'):  # QUERY_CONTROLLER
+                self._reply(message.source, bytes([CONTROLLER, QUERY_CONTROLLER, 0])
+                            + (self.controller or 0).to_bytes(6, 'big'))
+            case (0x40, b'\x01'):  # RESERVE
+                self._reply(message.source, bytes([MANAGEMENT, RESERVE, 0]))
+        if changed:
+            self.train_handler(self)
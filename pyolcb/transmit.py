@@ -0,0 +1,192 @@
+"""
+==============
+transmit
+==============
+
+Prioritised transmit queue with a background writer, used by :class:`Interface` to send without blocking.
+"""
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from enum import Enum
+import can
+from .exceptions import TransmitQueueFull, TransmitQueueClosed
+
+
+class OverflowPolicy(Enum):
+    """
+    What to do when a :class:`TransmitQueue` (or a callback executor's queue) is full.
+    """
+    BLOCK = 0
+    """Wait for space (up to the queue's ``block_timeout``), then fail."""
+    DROP_NEW = 1
+    """Fail the frames being queued."""
+    DROP_LOWEST_PRIORITY = 2
+    """Drop queued frames with a lower priority than the frames being queued to make space."""
+    DROP_OLDEST = 3
+    """Drop the oldest queued item to make space (callback executors; a :class:`TransmitQueue` treats this as
+    :attr:`DROP_NEW`)."""
+
+
+class TransmitQueue:
+    """
+    Queue of outgoing CAN frames, written to the bus by a background thread in OpenLCB priority order
+    (the high bits of the CAN header, lowest first, as on the bus). Frames queued together are written
+    together and in order, so the fragments of a datagram are never interleaved with other traffic
+    from the queue.
+
+    Parameters
+    ----------
+    max_frames : int = 1024
+        The maximum number of frames waiting to be written.
+    overflow : OverflowPolicy = OverflowPolicy.BLOCK
+        What to do when queueing would exceed ``max_frames``.
+    block_timeout : float = 1.0
+        With :attr:`OverflowPolicy.BLOCK`, the number of seconds to wait for space before failing, so that a
+        sender on the receive thread (e.g. a consumer replying) cannot stall it for long. ``None`` waits
+        indefinitely.
+    """
+    max_frames = 1024
+    overflow = OverflowPolicy.BLOCK
+    block_timeout = 1.0
+
+    def __init__(self, max_frames: int = 1024, overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+                 block_timeout: float = 1.0) -> None:
+        self.max_frames = max_frames
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.sent = 0
+        self._write = None
+        self._heap = []
+        self._queued = 0
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def start(self, write: callable):
+        """
+        Start the background writer, which passes each batch of frames (a list of :class:`can.Message`) to ``write``.
+        """
+        with self._condition:
+            self._write = write
+            self._closed = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pyolcb-transmit", daemon=True)
+                self._thread.start()
+
+    def put(self, frames: can.Message | list[can.Message], block: bool = True) -> Future:
+        """
+        Queue a frame (or ordered list of frames) for transmission.
+
+        Parameters
+        ----------
+        frames : can.Message | list[can.Message]
+            The frame(s) to send. A list is kept together and sent in order, at the priority of its most urgent frame.
+        block : bool = True
+            If ``False``, never wait for space even if the overflow policy is :attr:`OverflowPolicy.BLOCK`.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Completes once all frames have been written, or fails with :class:`TransmitQueueFull` if they were
+            dropped, :class:`TransmitQueueClosed` if the queue has been closed, or the error raised while writing.
+        """
+        if isinstance(frames, can.Message):
+            frames = [frames]
+        future = Future()
+        if not frames:
+            future.set_result(0)
+            return future
+        priority = min(frame.arbitration_id for frame in frames) >> 12
+        count = len(frames)
+        entry = (priority, next(self._counter), frames, future)
+        with self._condition:
+            if self._closed:
+                # Nothing would ever write the frames
+                self.dropped += count
+                future.set_exception(TransmitQueueClosed("Transmit queue closed"))
+                return future
+            if self._queued + count > self.max_frames and not self._make_space(priority, count, block):
+                self.dropped += count
+                future.set_exception(TransmitQueueFull("Transmit queue full"))
+                return future
+            heapq.heappush(self._heap, entry)
+            self._queued += count
+            self._condition.notify_all()
+        return future
+
+    def _make_space(self, priority: int, count: int, block: bool) -> bool:
+        if count > self.max_frames:
+            return False
+        match self.overflow:
+            case OverflowPolicy.BLOCK:
+                if not block:
+                    return False
+                return self._condition.wait_for(lambda: self._queued + count <= self.max_frames or self._closed,
+                                                self.block_timeout) and not self._closed
+            case OverflowPolicy.DROP_LOWEST_PRIORITY:
+                victims = []
+                freed = 0
+                for entry in sorted(self._heap, reverse=True):
+                    if self._queued - freed + count <= self.max_frames or entry[0] <= priority:
+                        break
+                    victims.append(entry)
+                    freed += len(entry[2])
+                if self._queued - freed + count > self.max_frames:
+                    return False
+                for entry in victims:
+                    self._heap.remove(entry)
+                    self._queued -= len(entry[2])
+                    self.dropped += len(entry[2])
+                    entry[3].set_exception(TransmitQueueFull("Dropped for higher priority traffic"))
+                heapq.heapify(self._heap)
+                return True
+            case _:
+                return False
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._heap or self._closed)
+                if not self._heap:
+                    self._thread = None
+                    return
+                priority, _, frames, future = heapq.heappop(self._heap)
+                write = self._write
+            try:
+                write(frames)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(len(frames))
+            with self._condition:
+                self._queued -= len(frames)
+                self.sent += len(frames)
+                self._condition.notify_all()
+
+    def __len__(self) -> int:
+        return self._queued
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued frame has been written.
+
+        Returns
+        -------
+        bool
+            ``True`` if the queue emptied before the timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._queued == 0, timeout)
+
+    def close(self):
+        """
+        Stop the background writer once the queued frames have been written. Frames queued afterwards fail with
+        :class:`TransmitQueueClosed`, until the queue is started again.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
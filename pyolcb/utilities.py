@@ -20,3 +20,9 @@ def process_bytes(n: int | float, x: str | list[int] | int | bytes | bytearray):
 
 
 byte_options = str | list[int] | int | bytes | bytearray
+
+
+def process_int(n: int | float, x: byte_options) -> int:
+    if isinstance(x, int) and x >= 0 and x < 2**(math.ceil(n)*8):
+        return x
+    return int.from_bytes(process_bytes(n, x), 'big')
@@ -0,0 +1,91 @@
+import time
+import can
+import pytest
+import pyolcb
+from pyolcb.alias import alias_sequence, check_id_frames, control_frame, AMD, AME
+
+
+def receive(bus: can.BusABC, header_mask: int, header: int, timeout: float = 2) -> can.Message:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        frame = bus.recv(deadline - time.monotonic())
+        if frame is not None and frame.arbitration_id & header_mask == header:
+            return frame
+    raise TimeoutError("Frame 0x%08X not received" % header)
+
+
+def test_alias_sequence():
+    """
+    Test the alias generator and Check ID frames.
+    """
+    aliases = alias_sequence(0x050101018C00)
+    first = [next(aliases) for _ in range(100)]
+    assert first[:2] == [x for x, _ in zip(alias_sequence(0x050101018C00), range(2))]
+    assert all(0 < x <= 0xFFF for x in first)
+    assert len(set(first)) > 90
+    frames = check_id_frames(0xABC, 0x050101018C00)
+    assert [x.arbitration_id for x in frames] == [0x17050ABC, 0x16101ABC, 0x15018ABC, 0x14C00ABC]
+
+
+def test_concurrent_allocation():
+    """
+    Test that many nodes reserve unique aliases concurrently, well within a second.
+    """
+    bus = can.Bus(interface='virtual', channel='test_concurrent_allocation')
+    interface = pyolcb.Interface(bus)
+    start = time.perf_counter()
+    nodes = [pyolcb.Node(pyolcb.Address(0x050101018000 + i), interface) for i in range(300)]
+    aliases = [node.initialized.result(5) for node in nodes]
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0
+    assert len(set(aliases)) == 300
+    assert all(interface.get_node(node.get_alias()) is node for node in nodes)
+    interface.stop()
+    bus.shutdown()
+
+
+def test_alias_collisions():
+    """
+    Test recovery from collisions while reserving and after reserving, and replies to CID and AME frames.
+    """
+    channel = 'test_alias_collisions'
+    bus = can.Bus(interface='virtual', channel=channel)
+    other = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    node_id = 0x050101018C50
+    candidates = alias_sequence(node_id)
+    first, second = next(candidates), next(candidates)
+
+    node = pyolcb.Node(pyolcb.Address(node_id), interface)
+    other.send(control_frame(first, AMD, bytes(6)))
+    assert node.initialized.result(2) == second
+    assert interface.get_node(first) is None
+
+    other.send(check_id_frames(second, 0x050101018C51)[0])
+    assert receive(other, 0x1FFFFFFF, control_frame(second, 0x700).arbitration_id) is not None
+
+    other.send(control_frame(0x123, AME))
+    assert bytes(receive(other, 0x1FFFFFFF, control_frame(second, AMD).arbitration_id).data) == node.address.full
+
+    other.send(can.Message(arbitration_id=0x19170000 | second, data=bytes(6), is_extended_id=True))
+    receive(other, 0x1FFFFFFF, control_frame(second, 0x703).arbitration_id)
+    alias = node.alias_reservation.future.result(2)
+    assert alias not in (first, second)
+    assert interface.get_node(alias) is node and interface.get_node(second) is None
+    interface.stop()
+    bus.shutdown()
+    other.shutdown()
+
+
+def test_no_free_alias():
+    """
+    Test that reserving fails, rather than searching forever, when every alias is in use.
+    """
+    bus = can.Bus(interface='virtual', channel='test_no_free_alias')
+    interface = pyolcb.Interface(bus)
+    interface.aliases.observed.update(range(1, 0x1000))
+    node = pyolcb.Node(pyolcb.Address(0x050101018C60), interface)
+    with pytest.raises(Exception, match='No free alias'):
+        node.initialized.result(2)
+    interface.stop()
+    bus.shutdown()
@@ -0,0 +1,43 @@
+import asyncio
+import can
+import pyolcb
+
+TEST_ADDRESS = '05.01.01.01.8C.00'
+TEST_OTHER_ADDRESS = '05.01.01.01.8C.01'
+
+
+def test_async_verify_node_id():
+    """
+    Test awaiting Verified Node ID replies from another :class:`AsyncNode`.
+    """
+    async def main():
+        bus = can.Bus(interface='virtual', channel='test_async_verify_node_id')
+        other_bus = can.Bus(interface='virtual', channel='test_async_verify_node_id')
+        interface = pyolcb.AsyncInterface(bus)
+        other_interface = pyolcb.AsyncInterface(other_bus)
+        node = pyolcb.AsyncNode(pyolcb.Address(TEST_ADDRESS, 0xC00), interface)
+        other = pyolcb.AsyncNode(pyolcb.Address(TEST_OTHER_ADDRESS, 0xC01), other_interface)
+
+        verified = await node.verify_node_id(pyolcb.Address(alias=0xC01), timeout=1)
+        assert verified == other.address
+        verified = await node.verify_node_id(timeout=0.2)
+        assert [x.get_full_address() for x in verified] == [other.address.get_full_address()]
+
+        received = []
+
+        async def consume():
+            async for message in other.messages():
+                received.append(message)
+                if message.message_type == pyolcb.message_types.Producer_Consumer_Event_Report:
+                    return
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        await node.produce(1)
+        await asyncio.wait_for(task, 1)
+        assert received[-1].data == pyolcb.utilities.process_bytes(8, TEST_ADDRESS + '.00.01')
+
+        interface.stop()
+        other_interface.stop()
+        bus.shutdown()
+        other_bus.shutdown()
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+import json
+import threading
+from pyolcb import benchmark
+
+
+def test_benchmark_results():
+    """
+    Test running every benchmark briefly, and comparing JSON results for regressions.
+    """
+    results = benchmark.run(scale=0.002, repeat=1)
+    assert set(results["benchmarks"]) == set(benchmark.BENCHMARKS)
+    assert all(x["operations"] > 0 and x["us_per_operation"] > 0 for x in results["benchmarks"].values())
+    baseline = json.loads(json.dumps(results))
+    assert benchmark.compare(baseline, results) == {}
+    baseline["benchmarks"]["message_decode"]["us_per_operation"] /= 2
+    baseline["benchmarks"]["process_bytes"]["us_per_operation"] = 0
+    assert benchmark.compare(baseline, results) == {"message_decode": 2.0}
+
+    # Benchmarks hosting nodes stop their interfaces' receive threads
+    threads = threading.active_count()
+    benchmark.run(['dispatch_event', 'dispatch_datagram', 'end_to_end'], scale=0.002, repeat=2)
+    assert threading.active_count() == threads
+
+
+def test_benchmark_command(tmp_path, capsys):
+    """
+    Test writing results to a file from the command line, and failing a comparison with faster results.
+    """
+    path = tmp_path / "results.json"
+    assert benchmark.main(['process_bytes', '--scale', '0.01', '--repeat', '1', '--json', str(path)]) == 0
+    results = json.loads(path.read_text())
+    assert results["schema"] == benchmark.SCHEMA and list(results["benchmarks"]) == ['process_bytes']
+    assert 'process_bytes' in capsys.readouterr().out
+    results["benchmarks"]["process_bytes"]["us_per_operation"] /= 100
+    path.write_text(json.dumps(results))
+    assert benchmark.main(['process_bytes', '--scale', '0.01', '--repeat', '1', '--compare', str(path)]) == 1
+    assert 'process_bytes is' in capsys.readouterr().err
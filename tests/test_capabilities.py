@@ -0,0 +1,53 @@
+import time
+import can
+import pyolcb
+from pyolcb.capabilities import CapabilityMap
+from pyolcb.protocols import Protocol
+
+
+def test_protocol_flags():
+    """
+    Test combining, encoding and decoding protocol flags.
+    """
+    protocols = Protocol.DATAGRAM | Protocol.MEMORY_CONFIGURATION
+    assert Protocol.DATAGRAM in protocols and Protocol.STREAM not in protocols
+    assert protocols.encode() == bytes([0x50, 0, 0, 0, 0, 0])
+    assert Protocol.decode(bytes([0x50, 0x00, 0x81])) == protocols | 0x81
+    assert Protocol.decode(b'\x80') == pyolcb.protocols.Simple_Protocol_Subset
+
+
+def test_capability_map():
+    """
+    Test building a capability map of the network, and updating it when a node restarts.
+    """
+    channel = 'test_capability_map'
+    bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.C0', 0xCC0), interface)
+    remote_buses = [can.Bus(interface='virtual', channel=channel) for _ in range(4)]
+    remote_interfaces = [pyolcb.Interface(x) for x in remote_buses]
+    remotes = [pyolcb.Node(pyolcb.Address(0x050101018CC1 + i, 0xCC1 + i), x) for i, x in enumerate(remote_interfaces)]
+    for remote in remotes[:2]:
+        remote.add_supported_protocol(Protocol.MEMORY_CONFIGURATION)
+
+    capabilities = CapabilityMap(node, max_concurrent=2)
+    capabilities.refresh(0.2).result(5)
+    ids = [remote.address.get_full_address() for remote in remotes]
+    assert len(capabilities) == 4
+    assert capabilities.get(ids[0]) == Protocol.DATAGRAM | Protocol.STREAM | Protocol.EVENT_EXCHANGE | \
+        Protocol.MEMORY_CONFIGURATION
+    assert capabilities.nodes_supporting(Protocol.MEMORY_CONFIGURATION | Protocol.DATAGRAM) == set(ids[:2])
+    assert capabilities.nodes_supporting(Protocol.TRAIN_CONTROL) == set()
+    assert capabilities.get_alias(ids[3]) == 0xCC4
+
+    remotes[3].add_supported_protocol(Protocol.TRAIN_CONTROL)
+    remotes[3]._send_initialization_complete()
+    deadline = time.monotonic() + 2
+    while capabilities.nodes_supporting(Protocol.TRAIN_CONTROL) != {ids[3]} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert capabilities.nodes_supporting(Protocol.TRAIN_CONTROL) == {ids[3]}
+
+    for x in [interface] + remote_interfaces:
+        x.stop()
+    for x in [bus] + remote_buses:
+        x.shutdown()
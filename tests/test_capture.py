@@ -0,0 +1,85 @@
+import time
+import can
+import pytest
+import pyolcb
+from pyolcb.capture import Capture, CaptureWriter, replay
+from pyolcb.simulation import SimulatedNetwork
+
+EVENT = 0x0501010118000300
+
+
+def test_capture_replay(tmp_path):
+    """
+    Test recording the frames received by an interface and replaying them into another interface and a node.
+    """
+    path = str(tmp_path / 'test.olcbcap')
+    channel = 'test_capture_replay'
+    bus = can.Bus(interface='virtual', channel=channel)
+    other_bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    capture = CaptureWriter(path)
+    interface.register_listener(capture.write)
+    event = pyolcb.Event(EVENT)
+    event.source = pyolcb.Address('05.01.01.01.8C.E1', 0xCE1)
+    frames = [can.Message(arbitration_id=event.get_can_header(), data=event.data, is_extended_id=True)] * 5
+    frames.append(can.Message(arbitration_id=0x19490CE1, is_extended_id=True))
+    for frame in frames:
+        other_bus.send(frame)
+        time.sleep(0.02)
+    deadline = time.monotonic() + 2
+    while capture.frames < len(frames) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    capture.close()
+    interface.stop()
+    bus.shutdown()
+    other_bus.shutdown()
+
+    with Capture(path) as recorded:
+        assert len(recorded) == 6
+        assert [(x.arbitration_id, bytes(x.data), x.is_rx) for x in recorded] == \
+            [(x.arbitration_id, bytes(x.data), True) for x in frames]
+        assert 0.08 < recorded.duration < 1
+
+        received = []
+        interface = pyolcb.Interface(can.Bus(interface='virtual', channel='test_capture_replay_target'))
+        node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.E0', 0xCE0), interface)
+        node.add_consumer(EVENT, received.append)
+        start = time.monotonic()
+        assert replay(recorded, interface, realtime=True, speed=2) == 6
+        assert time.monotonic() - start > recorded.duration / 2 - 0.01
+        assert len(received) == 5
+        assert replay(recorded, node, start=1, stop=3) == 2
+        assert len(received) == 7
+        interface.stop()
+        interface.connection.shutdown()
+
+
+def test_capture_transmitted(tmp_path):
+    """
+    Test that frames sent by the interface's own nodes are recorded, once each, alongside received ones.
+    """
+    path = str(tmp_path / 'test.olcbcap')
+    network = SimulatedNetwork()
+    interface = pyolcb.Interface(network.bus(receive_own_messages=True))
+    other_bus = network.bus()
+    capture = CaptureWriter(path)
+    interface.register_listener(capture.write, transmitted=True)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.E0', 0xCE0), interface)
+    event = pyolcb.Event(EVENT)
+    event.source = node.address
+    node.produce(event)
+    other_bus.send(can.Message(arbitration_id=0x19490CE1, is_extended_id=True))
+    assert network.wait_idle()
+    capture.close()
+    interface.stop()
+    interface.connection.shutdown()
+    other_bus.shutdown()
+
+    with Capture(path) as recorded:
+        headers = [(x.arbitration_id, x.is_rx) for x in recorded]
+        # Initialization Complete, the event, a Verify Node ID from the other node and the Verified Node ID reply
+        assert headers == [(0x19100CE0, False), (event.get_can_header(), False), (0x19490CE1, True),
+                           (0x19170CE0, False)]
+        assert recorded.timestamp(-1) == recorded[3].timestamp
+        with pytest.raises(IndexError):
+            recorded.timestamp(4)
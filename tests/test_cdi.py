@@ -0,0 +1,69 @@
+import can
+import pyolcb
+from pyolcb.cdi import CDI, CDICache, CDIFetcher
+from pyolcb.memory_config import MemoryConfigClient, SPACE_CDI
+from tests.test_memory_config import MemoryServer
+
+XML = b'''<?xml version="1.0" encoding="utf-8"?>
+<cdi>
+  <identification><manufacturer>Example</manufacturer><model>IO</model></identification>
+  <acdi/>
+  <segment space="251"><name>Node ID</name>
+    <string size="63"><name>User name</name></string>
+    <string size="64"><name>User description</name></string>
+  </segment>
+  <segment space="253" origin="128"><name>Inputs</name>
+    <int size="2"><name>Debounce</name></int>
+    <group replication="4"><name>Input</name>
+      <string size="16"><name>Description</name></string>
+      <group offset="2"><name>Events</name>
+        <eventid><name>Active</name></eventid>
+        <eventid><name>Inactive</name><description>Sent when the input turns off</description></eventid>
+      </group>
+      <int size="1"><map><relation><property>0</property><value>Off</value></relation></map></int>
+    </group>
+    <float offset="3"><name>Threshold</name></float>
+  </segment>
+</cdi>
+''' + bytes(1)
+
+
+def test_cdi_index():
+    """
+    Test finding variables in nested and replicated groups.
+    """
+    cdi = CDI(XML)
+    variable = cdi.find('Inputs/Input(3)/Events/Inactive')
+    assert (variable.space, variable.address, variable.size, variable.type) == (253, 130 + 2 * 35 + 26, 8, 'eventid')
+    assert cdi.find('Node ID/User description').address == 63
+    assert cdi.find('Inputs/Threshold').address == 130 + 4 * 35 + 3
+    assert cdi.find('Inputs/Input(5)/Description') is None
+    assert len(cdi.variables()) == 2 + 1 + 4 * 3 + 1
+
+
+def test_cdi_fetch(tmp_path):
+    """
+    Test that CDI is downloaded once for identical nodes and then read from the on-disk cache.
+    """
+    channel = 'test_cdi_fetch'
+    buses = [can.Bus(interface='virtual', channel=channel) for _ in range(3)]
+    interfaces = [pyolcb.Interface(bus) for bus in buses]
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.40', 0xC40), interfaces[0])
+    remotes = [pyolcb.Node(pyolcb.Address(0x050101018C41 + i, 0xC41 + i), interfaces[1 + i]) for i in range(2)]
+    servers = [MemoryServer(remote, {SPACE_CDI: XML + bytes(100)}) for remote in remotes]
+    identity = ('Example', 'IO', '1.0')
+
+    fetcher = CDIFetcher(MemoryConfigClient(node), CDICache(str(tmp_path)))
+    documents = [fetcher.fetch(remote.address, *identity) for remote in remotes]
+    assert documents[0].result(5) is documents[1].result(5)
+    assert documents[0].result().xml == XML[:-1]
+    assert fetcher.downloads == 1
+    assert sum(len(server.requests) for server in servers) == (len(XML) + 255) // 256 * 4
+
+    fetcher = CDIFetcher(MemoryConfigClient(node), CDICache(str(tmp_path)))
+    assert fetcher.fetch(remotes[1].address, *identity).result(5).find('Inputs/Debounce').address == 128
+    assert fetcher.downloads == 0
+
+    for interface, bus in zip(interfaces, buses):
+        interface.stop()
+        bus.shutdown()
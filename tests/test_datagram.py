@@ -0,0 +1,110 @@
+import time
+import can
+import pytest
+import pyolcb
+from pyolcb.exceptions import DatagramRejected
+from pyolcb.datagram import DatagramReassembler, DATAGRAM_BUFFER_UNAVAILABLE, DATAGRAM_OUT_OF_ORDER, DATAGRAM_TIMEOUT
+
+SOURCE = pyolcb.Address('05.01.01.01.8C.01', 0xC01)
+DESTINATION = pyolcb.Address('05.01.01.01.8C.00', 0xC00)
+
+
+def frames(data: bytes, source: pyolcb.Address = SOURCE) -> list[pyolcb.Message]:
+    chunks = [data[i:i + 8] for i in range(0, len(data), 8)]
+    frame_ids = [None] if len(chunks) == 1 else [1] + [2] * (len(chunks) - 2) + [-1]
+    headers = [pyolcb.message_types.Datagram.get_can_header(source, DESTINATION, x) for x in frame_ids]
+    return [pyolcb.Message.from_can_message(can.Message(arbitration_id=header, data=chunk, is_extended_id=True))
+            for header, chunk in zip(headers, chunks)]
+
+
+def test_reassembly():
+    """
+    Test reassembling single and multi-frame datagrams.
+    """
+    reassembler = DatagramReassembler()
+    assert reassembler.add(frames(bytes([0x20, 0x43]))[0])[0].data == bytes([0x20, 0x43])
+    data = bytes(range(20))
+    results = [reassembler.add(x) for x in frames(data)]
+    assert [x[0] for x in results[:-1]] == [None, None]
+    assert results[-1][0].data == data
+    assert results[-1][0].source.get_alias() == SOURCE.get_alias()
+    assert len(reassembler) == 0
+
+
+def test_bounded_memory():
+    """
+    Test that abandoned first frames cannot grow memory without limit, and stale partial datagrams expire and are
+    rejected.
+    """
+    rejected = []
+    reassembler = DatagramReassembler(timeout=0.05, max_per_source=2, max_buffers=8,
+                                      reject=lambda *args: rejected.append(args))
+    errors = [reassembler.add(frames(bytes(20), pyolcb.Address(alias=0x100 + i))[0])[1] for i in range(1000)]
+    assert len(reassembler) == 8
+    assert errors.count(DATAGRAM_BUFFER_UNAVAILABLE) == 1000 - 8
+    assert reassembler.add(frames(bytes(20), pyolcb.Address(alias=0x200))[1])[1] == DATAGRAM_OUT_OF_ORDER
+    time.sleep(0.1)
+    reassembler.expire()
+    assert len(reassembler) == 0
+    assert reassembler.expired == 8
+    assert sorted(rejected) == [(0x100 + i, DESTINATION.get_alias(), DATAGRAM_TIMEOUT) for i in range(8)]
+
+
+def test_node_datagram_reply():
+    """
+    Test that a :class:`Node` acknowledges a received datagram and passes it to its datagram handler.
+    """
+    bus = can.Bus(interface='virtual', channel='test_node_datagram_reply')
+    other_bus = can.Bus(interface='virtual', channel='test_node_datagram_reply')
+    interface = pyolcb.Interface(bus)
+    node = pyolcb.Node(DESTINATION, interface)
+    received = []
+    node.set_datagram_handler(received.append)
+    data = bytes(range(30))
+    for message in frames(data):
+        interface.dispatch(message)
+    assert received[-1].data == data
+    reply = other_bus.recv(1)
+    while reply.arbitration_id != pyolcb.message_types.Datagram_Received_OK.get_can_header(DESTINATION):
+        reply = other_bus.recv(1)
+    assert bytes(reply.data) == bytes([0x0C, 0x01])
+
+    interface.dispatch(frames(data)[-1])
+    reply = other_bus.recv(1)
+    assert reply.arbitration_id == pyolcb.message_types.Datagram_Rejected.get_can_header(DESTINATION)
+    assert bytes(reply.data) == bytes([0x0C, 0x01]) + DATAGRAM_OUT_OF_ORDER.to_bytes(2, 'big')
+    interface.stop()
+    bus.shutdown()
+    other_bus.shutdown()
+
+
+def test_send_datagram():
+    """
+    Test sending datagrams to several destinations at once, with acceptance, rejection and timeout.
+    """
+    channel = 'test_send_datagram'
+    buses = [can.Bus(interface='virtual', channel=channel) for _ in range(3)]
+    interfaces = [pyolcb.Interface(bus) for bus in buses]
+    sender = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.10', 0xC10), interfaces[0])
+    receiver = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.11', 0xC11), interfaces[1])
+    rejecter = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.12', 0xC12), interfaces[2])
+    rejecter.datagram_reassembler = DatagramReassembler(max_buffers=0)
+    received = []
+    receiver.set_datagram_handler(received.append)
+
+    data = [bytes([i] * 40) for i in range(3)]
+    accepted = [sender.send_datagram(x, receiver.address) for x in data]
+    rejected = sender.send_datagram(bytes(40), rejecter.address, retries=1)
+    unanswered = sender.send_datagram(bytes(4), pyolcb.Address(alias=0xC13), timeout=0.2, retries=1)
+
+    assert [x.result(2).source.get_alias() for x in accepted] == [0xC11] * 3
+    assert [x.data for x in received] == data
+    with pytest.raises(DatagramRejected) as e:
+        rejected.result(2)
+    assert e.value.code == DATAGRAM_BUFFER_UNAVAILABLE
+    with pytest.raises(TimeoutError):
+        unanswered.result(2)
+
+    for interface, bus in zip(interfaces, buses):
+        interface.stop()
+        bus.shutdown()
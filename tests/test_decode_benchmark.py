@@ -0,0 +1,67 @@
+"""
+Micro-benchmark of the receive path: objects retained and time spent per decoded CAN frame.
+
+Run directly (``python -m tests.test_decode_benchmark``) to print the figures, or through pytest.
+"""
+import gc
+import sys
+import time
+import can
+import pyolcb
+
+SOURCE = pyolcb.Address('05.01.01.01.8C.01', 0xC01)
+DESTINATION = pyolcb.Address('05.01.01.01.8C.00', 0xC00)
+FRAMES = [
+    can.Message(arbitration_id=pyolcb.message_types.Producer_Consumer_Event_Report.get_can_header(SOURCE),
+                data=bytes([0x05, 0x01, 0x01, 0x01, 0x8C, 0x00, 0x00, 0x01]), is_extended_id=True),
+    can.Message(arbitration_id=pyolcb.message_types.Verify_Node_ID_Number_Global.get_can_header(SOURCE),
+                data=bytes(), is_extended_id=True),
+    can.Message(arbitration_id=pyolcb.message_types.Datagram.get_can_header(SOURCE, DESTINATION, 1),
+                data=bytes([0x20, 0x43, 0x00, 0x00, 0x00, 0x00, 0x40, 0x00]), is_extended_id=True),
+]
+
+
+def benchmark_decode(n: int = 100000) -> dict:
+    """
+    Decode ``n`` frames with :meth:`Message.from_can_message`, returning the number of objects
+    (allocated memory blocks) retained and the time taken per decoded frame.
+    """
+    frames = (FRAMES * (n // len(FRAMES) + 1))[:n]
+    decoded = [None] * n
+    decode = pyolcb.Message.from_can_message
+    # Garbage left by earlier work must not be collected (and counted as freed) while measuring
+    gc.collect()
+    gc.disable()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        for i, frame in enumerate(frames):
+            decoded[i] = decode(frame)
+        blocks_after = sys.getallocatedblocks()
+    finally:
+        gc.enable()
+    del decoded
+
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": n,
+        "objects_per_frame": (blocks_after - blocks_before) / n,
+        "us_per_frame": elapsed / n * 1e6,
+    }
+
+
+def test_decode_benchmark():
+    """
+    Test that decoding a frame retains only the :class:`Message` itself: the source and destination addresses and the
+    message type are interned, and the data is not copied. Before slotted, interned messages, the same frames
+    retained about 7.7 objects each (the message, new addresses and a new message type, with their ``__dict__``).
+    """
+    result = benchmark_decode(20000)
+    assert result["objects_per_frame"] <= 1.1
+    assert result["us_per_frame"] > 0
+
+
+if __name__ == '__main__':
+    print(benchmark_decode())
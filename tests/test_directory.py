@@ -0,0 +1,62 @@
+import time
+import can
+import pyolcb
+from pyolcb.alias import control_frame, AMD, AMR
+from pyolcb.directory import NodeDirectory
+
+
+def test_node_directory():
+    """
+    Test learning aliases from messages and control frames, alias reuse and ageing out.
+    """
+    directory = NodeDirectory(max_age=60)
+    verified = pyolcb.Message(pyolcb.message_types.Verified_Node_ID_Number, bytes.fromhex('050101018C60'),
+                              pyolcb.Address(alias=0x160))
+    directory.process_message(verified)
+    assert directory.resolve(0x160) == 0x050101018C60
+    assert directory.get_alias(0x050101018C60) == 0x160
+
+    directory.process_control_frame(control_frame(0x161, AMD, bytes.fromhex('050101018C61')))
+    directory.process_control_frame(control_frame(0x160, AMD, bytes.fromhex('050101018C62')))
+    assert directory.resolve(0x160) == 0x050101018C62
+    assert directory.get_alias(0x050101018C60) is None
+    directory.process_control_frame(control_frame(0x161, AMR, bytes.fromhex('050101018C61')))
+    assert directory.resolve(0x161) is None
+    assert len(directory) == 3
+
+    directory.add_address(pyolcb.Address('05.01.01.01.8C.63', 0x163), local=True)
+    directory.expire(time.monotonic() + 120)
+    assert [x.get_alias() for x in directory] == [0x163]
+
+    directory = NodeDirectory(max_age=0.05)
+    directory.process_message(verified)
+    directory.add(alias=0x171)
+    assert directory.get(0x171).get_full_address() is None
+    time.sleep(0.1)
+    # Ordinary traffic, not only identifying messages, forgets silent nodes
+    directory.process_message(pyolcb.Message(pyolcb.message_types.Producer_Consumer_Event_Report, bytes(8),
+                                             pyolcb.Address(alias=0x171)))
+    assert directory.resolve(0x160) is None and 0x050101018C60 not in directory
+
+
+def test_interface_directory():
+    """
+    Test that each :class:`Interface` has its own directory, learning from the nodes it hears.
+    """
+    channel = 'test_interface_directory'
+    buses = [can.Bus(interface='virtual', channel=channel) for _ in range(2)]
+    interfaces = [pyolcb.Interface(bus) for bus in buses]
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.64', 0xC64), interfaces[0])
+    other = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.65', 0xC65), interfaces[1])
+    node.verify_node_id()
+    deadline = time.monotonic() + 2
+    while interfaces[0].network.resolve(0xC65) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert interfaces[0].network.resolve(0xC65) == 0x050101018C65
+    assert interfaces[1].network.resolve(0xC64) == 0x050101018C64
+    assert interfaces[0].network is not interfaces[1].network
+    assert other.address in interfaces[1].network
+
+    for interface, bus in zip(interfaces, buses):
+        interface.stop()
+        bus.shutdown()
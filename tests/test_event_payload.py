@@ -0,0 +1,60 @@
+import threading
+import can
+import pyolcb
+from pyolcb.event import EventPayloadReassembler, payload_messages
+
+EVENT = 0x0501010118000200
+
+
+def test_event_payload():
+    """
+    Test producing and consuming an event report with a payload.
+    """
+    channel = 'test_event_payload'
+    bus = can.Bus(interface='virtual', channel=channel)
+    other_bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    other_interface = pyolcb.Interface(other_bus)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.A0', 0xCA0), interface)
+    other = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.A1', 0xCA1), other_interface)
+    received = []
+    done = threading.Event()
+    node.add_consumer(EVENT, lambda message: (received.append(message), done.set()))
+
+    payload = bytes(range(21))
+    event = pyolcb.Event(EVENT)
+    other.produce(event, payload)
+    assert done.wait(2)
+    report = received[0]
+    assert isinstance(report, pyolcb.EventReport) and isinstance(report.payload, memoryview)
+    assert bytes(report.data) == event.id and bytes(report.payload) == payload
+    assert report.source.get_alias() == 0xCA1
+    interface.stop()
+    other_interface.stop()
+    bus.shutdown()
+    other_bus.shutdown()
+
+
+def test_payload_reassembly():
+    """
+    Test reassembly of interleaved reports, and discarding of oversized and stale ones.
+    """
+    reassembler = EventPayloadReassembler(max_payload=16)
+    first = payload_messages(EVENT.to_bytes(8, 'big'), b'first', pyolcb.Address.from_alias(0x001))
+    second = payload_messages(EVENT.to_bytes(8, 'big'), bytes(16), pyolcb.Address.from_alias(0x002))
+    assert [x.message_type for x in second] == [pyolcb.message_types.PCER_w_Payload_1st,
+                                                 pyolcb.message_types.PCER_w_Payload_middle,
+                                                 pyolcb.message_types.PCER_w_Payload_last]
+    assert reassembler.add(first[0]) is None and reassembler.add(second[0]) is None
+    assert reassembler.add(second[1]) is None
+    assert bytes(reassembler.add(first[1]).payload) == b'first'
+    assert len(reassembler.add(second[2]).payload) == 16
+
+    oversized = payload_messages(EVENT.to_bytes(8, 'big'), bytes(40), pyolcb.Address.from_alias(0x003))
+    assert all(reassembler.add(x) is None for x in oversized)
+    assert reassembler.rejected == 1 and not reassembler._partial
+
+    reassembler.timeout = -1
+    reassembler.add(first[0])
+    assert reassembler.add(first[1]) is None
+    assert reassembler.expired == 1
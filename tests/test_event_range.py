@@ -0,0 +1,67 @@
+import time
+import can
+import pyolcb
+from pyolcb.event import EventRangeIndex, encode_event_range, decode_event_range
+
+ACCESSORIES = 0x0101020000FF0000
+
+
+def test_event_range_encoding():
+    """
+    Test encoding ranges as Range Identified event IDs and decoding them again.
+    """
+    for base, mask in [(ACCESSORIES, 0xFFFF), (0x0501010118000000, 0xFF), (0x0501010118000100, 0xFF)]:
+        assert decode_event_range(encode_event_range(base, mask)) == (base, mask)
+    assert encode_event_range(0x0501010118000000, 0xFF) == 0x05010101180000FF
+    assert encode_event_range(0x0501010118000100, 0xFF) == 0x0501010118000100
+
+
+def test_event_range_index():
+    """
+    Test matching events against ranges of several sizes.
+    """
+    index = EventRangeIndex()
+    index.add(ACCESSORIES, 0x3FFF, 'accessories')
+    index.add(ACCESSORIES + 0x100, 0xFF, 'block')
+    index.add(ACCESSORIES + 0x100, 0xFF, 'block')
+    assert index.match(ACCESSORIES + 0x105) == ['accessories', 'block']
+    assert index.match(ACCESSORIES + 0x3FFF) == ['accessories']
+    assert index.match(ACCESSORIES + 0x4000) == []
+    assert index.ranges(ACCESSORIES + 0x200) == [(ACCESSORIES, 0x3FFF)]
+    assert len(index) == 2
+    index.remove(ACCESSORIES, 0x3FFF)
+    assert index.match(ACCESSORIES + 0x105) == ['block']
+
+
+def test_node_event_ranges():
+    """
+    Test that a :class:`Node` consumes events in a range and identifies its ranges.
+    """
+    channel = 'test_node_event_ranges'
+    bus = can.Bus(interface='virtual', channel=channel)
+    other_bus = can.Bus(interface='virtual', channel=channel)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.70', 0xC70), pyolcb.Interface(bus))
+    other = pyolcb.Address('05.01.01.01.8C.71', 0xC71)
+    received = []
+    node.add_consumer_range(ACCESSORIES, 0x3FFF, received.append)
+    node.add_producer_range(ACCESSORIES + 0x4000, 0xFF)
+
+    for event_id in (ACCESSORIES + 0x1234, ACCESSORIES + 0x4000):
+        other_bus.send(can.Message(arbitration_id=pyolcb.message_types.Producer_Consumer_Event_Report
+                                   .get_can_header(other), data=event_id.to_bytes(8, 'big'), is_extended_id=True))
+    for mti, event_id in ((pyolcb.message_types.Identify_Consumer, ACCESSORIES + 7),
+                          (pyolcb.message_types.Identify_Producer, ACCESSORIES + 0x4001)):
+        other_bus.send(can.Message(arbitration_id=mti.get_can_header(other), data=event_id.to_bytes(8, 'big'),
+                                   is_extended_id=True))
+    replies = {}
+    deadline = time.monotonic() + 2
+    while not {0x4A4, 0x524} <= replies.keys() and time.monotonic() < deadline:
+        frame = other_bus.recv(0.1)
+        if frame is not None:
+            replies[(frame.arbitration_id >> 12) & 0xFFF] = int.from_bytes(frame.data, 'big')
+    assert [bytes(x.data) for x in received] == [(ACCESSORIES + 0x1234).to_bytes(8, 'big')]
+    assert decode_event_range(replies[0x4A4]) == (ACCESSORIES, 0x3FFF)
+    assert decode_event_range(replies[0x524]) == (ACCESSORIES + 0x4000, 0xFF)
+    node.interfaces[0].stop()
+    bus.shutdown()
+    other_bus.shutdown()
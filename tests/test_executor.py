@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+import can
+import pyolcb
+from pyolcb.executor import ThreadPoolCallbackExecutor, AsyncioCallbackExecutor, Ordering
+from pyolcb.transmit import OverflowPolicy
+
+EVENT = 0x0501010118000100
+
+
+def test_slow_consumer():
+    """
+    Test that a slow consumer run on a thread pool does not hold up reception of other events.
+    """
+    channel = 'test_slow_consumer'
+    bus = can.Bus(interface='virtual', channel=channel)
+    other_bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.90', 0xC90), interface)
+    other_interface = pyolcb.Interface(other_bus)
+    other = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.91', 0xC91), other_interface)
+    executor = node.set_executor(ThreadPoolCallbackExecutor(workers=2))
+    slow, fast = [], threading.Event()
+    node.add_consumer(EVENT, lambda message: (time.sleep(0.05), slow.append(message.data[-1])))
+    node.add_consumer(EVENT + 0x100, lambda message: fast.set())
+
+    events = [pyolcb.Event(EVENT), pyolcb.Event(EVENT + 0x100)]
+    for event in events:
+        event.source = other.address
+    for i in range(10):
+        other.produce(events[0])
+    other.produce(events[1])
+    assert fast.wait(0.3)
+    assert executor.queued + executor.in_flight > 0
+    deadline = time.monotonic() + 2
+    while len(slow) < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(slow) == 10
+    executor.shutdown()
+    assert executor.completed == 11 and executor.queued == executor.in_flight == 0
+    interface.stop()
+    other_interface.stop()
+    bus.shutdown()
+    other_bus.shutdown()
+
+
+def test_overflow_policies():
+    """
+    Test that a full queue drops the newest or the oldest callbacks.
+    """
+    for policy, expected in ((OverflowPolicy.DROP_NEW, [0, 1, 2, 3]), (OverflowPolicy.DROP_OLDEST, [0, 7, 8, 9])):
+        release = threading.Event()
+        ran = []
+
+        def callback(argument):
+            release.wait(2)
+            ran.append(argument)
+
+        executor = ThreadPoolCallbackExecutor(workers=1, max_queue=3, overflow=policy, ordering=Ordering.SOURCE)
+        executor.submit(callback, 0, source=1)
+        while executor.in_flight == 0:
+            time.sleep(0.001)
+        results = [executor.submit(callback, i, source=1) for i in range(1, 10)]
+        assert executor.queued == 3 and executor.dropped == 6
+        if policy == OverflowPolicy.DROP_NEW:
+            assert results == [True] * 3 + [False] * 6
+        release.set()
+        executor.shutdown()
+        assert ran == expected
+
+
+def test_asyncio_executor():
+    """
+    Test that coroutine consumers are awaited on the event loop, in order for each event.
+    """
+    async def main():
+        executor = AsyncioCallbackExecutor()
+        ran = []
+
+        async def callback(argument):
+            await asyncio.sleep(0.01 * (3 - argument))
+            ran.append(argument)
+
+        def submit():
+            for i in range(3):
+                executor.submit(callback, i, event=b'\x01')
+        thread = threading.Thread(target=submit)
+        thread.start()
+        thread.join()
+        for _ in range(100):
+            if executor.completed == 3:
+                break
+            await asyncio.sleep(0.01)
+        return ran
+    assert asyncio.run(main()) == [0, 1, 2]
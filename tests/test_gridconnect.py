@@ -0,0 +1,93 @@
+import socket
+import can
+import pyolcb
+from pyolcb import gridconnect
+from tests.test_tcp import Hub, wait_for
+
+TEST_ADDRESS = '05.01.01.01.8C.00'
+TEST_OTHER_ADDRESS = '05.01.01.01.8C.01'
+
+
+def read_until(sock: socket.socket, token: bytes) -> bytes:
+    data = b''
+    sock.settimeout(2)
+    while token not in data:
+        data += sock.recv(4096)
+    return data
+
+
+def test_encode_decode():
+    """
+    Test converting frames and messages to and from GridConnect.
+    """
+    address = pyolcb.Address('05.01.01.01.18.C0', 0x123)
+    message = pyolcb.Message(pyolcb.message_types.Verified_Node_ID_Number, bytes(address), address)
+    assert gridconnect.encode(message) == b':X19170123N0501010118C0;'
+    frame = gridconnect.decode(':X19170123N0501010118C0;')
+    assert frame.arbitration_id == 0x19170123 and frame.is_extended_id
+    assert bytes(frame.data) == bytes(address)
+    assert gridconnect.decode(gridconnect.encode(frame)).arbitration_id == frame.arbitration_id
+    assert not gridconnect.decode(':S123N;').is_extended_id
+
+
+def test_streaming_and_bulk_decode():
+    """
+    Test decoding GridConnect split across reads and from a log with other content.
+    """
+    frames = [can.Message(arbitration_id=0x195B4C00 + i, data=bytes([i] * (i % 9)), is_extended_id=True) for i in range(50)]
+    text = gridconnect.encode_many(frames)
+    decoder = gridconnect.GridConnectDecoder()
+    decoded = []
+    for i in range(0, len(text), 5):
+        decoded += decoder.feed(text[i:i + 5])
+    expected = [(x.arbitration_id, bytes(x.data)) for x in frames]
+    assert [(x.arbitration_id, bytes(x.data)) for x in decoded] == expected
+
+    log = b''.join(b'12:00:%02d.000 R ' % i + gridconnect.encode(x) + b' # comment\r\n' for i, x in enumerate(frames))
+    assert [(x.arbitration_id, bytes(x.data)) for x in gridconnect.decode_buffer(log)] == expected
+    assert [(x[0], x[1]) for x in gridconnect.iter_frames(log)] == expected
+
+
+def test_corrupt_frames_skipped():
+    """
+    Test that a frame with an odd number of data digits is skipped, in a stream and in a buffer, without losing the
+    frames around it.
+    """
+    text = b':X19170123N050;\n:X19170123N0501010118C0;\n:X195B4123N0501010118C00001;\n'
+    expected = [(0x19170123, bytes.fromhex('0501010118C0')), (0x195B4123, bytes.fromhex('0501010118C00001'))]
+    decoder = gridconnect.GridConnectDecoder()
+    decoded = decoder.feed(text[:20]) + decoder.feed(text[20:])
+    assert [(x.arbitration_id, bytes(x.data)) for x in decoded] == expected
+    assert [(x.arbitration_id, bytes(x.data)) for x in gridconnect.decode_buffer(text)] == expected
+    assert [x[:2] for x in gridconnect.iter_frames(b'12:00:00.000 R ' + text)] == expected
+
+
+
+def test_gridconnect_transports():
+    """
+    Test nodes exchanging events over GridConnect on a TCP hub and on a serial stream.
+    """
+    hub = Hub()
+    interface = pyolcb.Interface(('127.0.0.1', hub.port), codec=gridconnect.GridConnectCodec())
+    left, right = socket.socketpair()
+    serial_interface = pyolcb.Interface(left.makefile('rwb', buffering=0))
+    node = pyolcb.Node(pyolcb.Address(TEST_ADDRESS, 0xC00), [interface, serial_interface])
+    assert wait_for(lambda: len(hub.clients) == 1)
+
+    received = []
+    other_interface = pyolcb.Interface(('127.0.0.1', hub.port), codec=gridconnect.GridConnectCodec())
+    other = pyolcb.Node(pyolcb.Address(TEST_OTHER_ADDRESS, 0xC01), other_interface)
+    other.add_consumer(pyolcb.Event(TEST_ADDRESS + '.00.01'), received.append)
+    assert wait_for(lambda: len(hub.clients) == 2)
+
+    node.produce(1)
+    assert wait_for(lambda: len(received) == 1)
+    assert read_until(right, b':X195B4C00N050101018C000001;\n')
+    right.sendall(b':X19490C01N;\n')
+    assert read_until(right, b':X19170C00N050101018C00;')
+
+    interface.stop()
+    other_interface.stop()
+    serial_interface.stop()
+    right.close()
+    hub.close()
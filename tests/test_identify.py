@@ -0,0 +1,44 @@
+import time
+import can
+import pyolcb
+
+BASE = 0x0501010118000000
+
+
+def test_identify_events():
+    """
+    Test that a :class:`Node` replies to Identify Events with every event, using cached frames paced to a rate.
+    """
+    channel = 'test_identify_events'
+    bus = can.Bus(interface='virtual', channel=channel)
+    other_bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    interface.paced_frame_rate = 2000
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.80', 0xC80), interface)
+    for i in range(1000):
+        node.add_consumer(BASE + 0x10000 + i, lambda *args: None)
+    node.add_producer(BASE + 1)
+    node.add_consumer_range(BASE + 0x20000, 0xFFFF, lambda *args: None)
+    frames = node.get_identify_frames()
+    assert node.get_identify_frames() is frames
+    node.add_producer_range(BASE + 0x30000, 0xFF)
+    assert node.get_identify_frames() is not frames
+    frames = node.get_identify_frames()
+    assert len(frames) == 1003
+
+    other = pyolcb.Address('05.01.01.01.8C.81', 0xC81)
+    other_bus.send(can.Message(arbitration_id=pyolcb.message_types.Identify_Events_Global.get_can_header(other),
+                               is_extended_id=True))
+    received = []
+    start = time.monotonic()
+    while len(received) < len(frames) and time.monotonic() - start < 5:
+        frame = other_bus.recv(0.5)
+        if frame is not None and frame.arbitration_id != pyolcb.message_types.Initialization_Complete.get_can_header(
+                node.address):
+            received.append(frame)
+    elapsed = time.monotonic() - start
+    assert [(x.arbitration_id, bytes(x.data)) for x in received] == [(x.arbitration_id, bytes(x.data)) for x in frames]
+    assert elapsed > 0.4
+    interface.stop()
+    bus.shutdown()
+    other_bus.shutdown()
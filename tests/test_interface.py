@@ -0,0 +1,53 @@
+import threading
+import can
+import pyolcb
+
+TEST_EVENT = '05.01.01.01.8C.00.00.01'
+
+
+def make_nodes(interface: pyolcb.Interface, n: int) -> list[pyolcb.Node]:
+    return [pyolcb.Node(pyolcb.Address(0x050101018000 + i, 0x100 + i), interface) for i in range(n)]
+
+
+def frame(message_type, source_alias: int, data: bytes) -> pyolcb.Message:
+    header = message_type.get_can_header(pyolcb.Address(alias=source_alias))
+    return pyolcb.Message.from_can_message(can.Message(arbitration_id=header, data=data, is_extended_id=True))
+
+
+def test_single_reader_thread():
+    """
+    Test that hosting many nodes on one :class:`Interface` uses a single receive thread.
+    """
+    bus = can.Bus(interface='virtual', channel='test_single_reader_thread')
+    interface = pyolcb.Interface(bus)
+    make_nodes(interface, 1)
+    threads = threading.active_count()
+    make_nodes(interface, 200)
+    assert threading.active_count() == threads
+    interface.stop()
+    bus.shutdown()
+
+
+def test_routing():
+    """
+    Test that addressed messages reach only their destination and events reach only their consumers.
+    """
+    bus = can.Bus(interface='virtual', channel='test_routing')
+    interface = pyolcb.Interface(bus)
+    nodes = make_nodes(interface, 50)
+    received = {}
+    for node in nodes:
+        node.register_message_handler(pyolcb.message_types.Datagram_Received_OK,
+                                      lambda message, node=node: received.setdefault(node, []).append(message))
+    nodes[7].add_consumer(pyolcb.Event(TEST_EVENT),
+                          lambda message: received.setdefault(nodes[7], []).append(message))
+
+    interface.dispatch(frame(pyolcb.message_types.Datagram_Received_OK, 0xC01, bytes([0x01, 0x03])))
+    assert list(received) == [nodes[3]]
+
+    received.clear()
+    interface.dispatch(frame(pyolcb.message_types.Producer_Consumer_Event_Report, 0xC01,
+                             pyolcb.utilities.process_bytes(8, TEST_EVENT)))
+    assert list(received) == [nodes[7]]
+    interface.stop()
+    bus.shutdown()
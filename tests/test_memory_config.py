@@ -0,0 +1,74 @@
+import can
+import pytest
+import pyolcb
+from pyolcb.exceptions import MemoryConfigError
+from pyolcb.memory_config import MemoryConfigClient, SPACE_CONFIG, SPACE_CDI
+
+
+class MemoryServer:
+    """
+    Minimal Memory Configuration Protocol server for testing, serving spaces 0xFD-0xFF.
+    """
+    def __init__(self, node: pyolcb.Node, spaces: dict[int, bytes]) -> None:
+        self.node = node
+        self.spaces = {space: bytearray(data) for space, data in spaces.items()}
+        self.requests = []
+        node.add_datagram_handler(0x20, self.process)
+
+    def process(self, datagram: pyolcb.Datagram):
+        data = datagram.data
+        self.requests.append(data)
+        if data[1] == 0x84:
+            if data[2] in self.spaces:
+                self.reply(datagram, bytes([0x20, 0x86, data[2]])
+                           + (len(self.spaces[data[2]]) - 1).to_bytes(4, 'big') + bytes([0]))
+            else:
+                self.reply(datagram, bytes([0x20, 0x87, data[2]]))
+            return
+        memory = self.spaces.get(0xFC + (data[1] & 0x03))
+        address = int.from_bytes(data[2:6], 'big')
+        if data[1] & 0xFC == 0x40:
+            if memory is None or address >= len(memory):
+                self.reply(datagram, bytes([0x20, 0x58 | data[1] & 0x03]) + data[2:6] + bytes([0x10, 0x81]))
+            else:
+                self.reply(datagram, bytes([0x20, 0x50 | data[1] & 0x03]) + data[2:6]
+                           + memory[address:address + data[6]])
+        elif data[1] & 0xFC == 0x00:
+            memory[address:address + len(data) - 6] = data[6:]
+
+    def reply(self, datagram: pyolcb.Datagram, data: bytes):
+        self.node.send_datagram(data, datagram.source)
+
+
+def test_memory_config_client():
+    """
+    Test pipelined reads, caching, writes and errors against a simple server.
+    """
+    channel = 'test_memory_config_client'
+    buses = [can.Bus(interface='virtual', channel=channel) for _ in range(2)]
+    interfaces = [pyolcb.Interface(bus) for bus in buses]
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.30', 0xC30), interfaces[0])
+    remote = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.31', 0xC31), interfaces[1])
+    server = MemoryServer(remote, {SPACE_CONFIG: bytes(i % 256 for i in range(300))})
+    client = MemoryConfigClient(node)
+    memory = server.spaces[SPACE_CONFIG]
+
+    assert client.read_space(remote.address, SPACE_CONFIG).result(5) == bytes(memory)
+    assert len(server.requests) == 6
+    assert client.read(remote.address, SPACE_CONFIG, 10, 100).result(5) == bytes(memory[10:110])
+    assert len(server.requests) == 8
+    assert client.read(remote.address, SPACE_CONFIG, 0, 300).result(5) == bytes(memory)
+    assert len(server.requests) == 8
+    assert client.cache_hits == 5
+
+    client.write(remote.address, SPACE_CONFIG, 70, b'written').result(5)
+    assert bytes(memory[70:77]) == b'written'
+    assert client.read(remote.address, SPACE_CONFIG, 64, 64).result(5)[6:13] == b'written'
+
+    with pytest.raises(MemoryConfigError) as e:
+        client.read(remote.address, SPACE_CDI, 0, 10).result(5)
+    assert e.value.code == 0x1081
+
+    for interface, bus in zip(interfaces, buses):
+        interface.stop()
+        bus.shutdown()
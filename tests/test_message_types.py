@@ -0,0 +1,37 @@
+import pickle
+import pyolcb
+from pyolcb import message_types
+
+TEST_ADDRESS = pyolcb.Address('05.01.01.01.8C.00', 0xC00)
+TEST_OTHER_ADDRESS = pyolcb.Address('05.01.01.01.8C.01', 0xC01)
+
+
+def test_mti_interned():
+    """
+    Test that :class:`MTI` objects are interned by value and hashable.
+    """
+    assert message_types.MTI(0x05B4) is message_types.Producer_Consumer_Event_Report
+    assert message_types.get_mti(0x0A28) is message_types.Datagram_Received_OK
+    assert message_types.get_mti(0x0FFF) is None
+    assert {message_types.Datagram: True}[message_types.MessageTypeIndicator(0x1C48)]
+    assert pickle.loads(pickle.dumps(message_types.Datagram)) is message_types.Datagram
+
+
+def test_from_can_header_returns_canonical_mti():
+    """
+    Test that decoding a CAN header returns the registered :class:`MTI` instance.
+    """
+    header = message_types.Producer_Consumer_Event_Report.get_can_header(TEST_ADDRESS)
+    assert message_types.MessageTypeIndicator.from_can_header(header) is message_types.Producer_Consumer_Event_Report
+    for frame_id in (None, 1, 2, -1):
+        header = message_types.Datagram.get_can_header(TEST_ADDRESS, TEST_OTHER_ADDRESS, frame_id)
+        assert message_types.MessageTypeIndicator.from_can_header(header) is message_types.Datagram
+
+
+def test_unknown_mti():
+    """
+    Test that unknown message types and CAN control frames are not reported as known.
+    """
+    assert not message_types.is_known_mti(message_types.MessageTypeIndicator.from_can_header(0x19FFFC00))
+    assert not message_types.is_known_mti(message_types.MessageTypeIndicator.from_can_header(0x17C48C00))
+    assert message_types.is_known_mti(0x0490)
@@ -1,14 +1,15 @@
 import can
 import pyolcb
-import time
+from pyolcb.simulation import SimulatedNetwork
 
 TEST_ADDRESS = '05.01.01.01.8C.00'
 TEST_OTHER_ADDRESS = '05.01.01.01.8C.01'
 GLOBAL_ADDRESS = '00.00.00.00.00.00'
 
 # For efficiency's sake we initialize the BUS and NODE here so we don't have to re-create every time
-BUS = can.Bus(interface='socketcan', channel='vcan0', bitrate=125000, receive_own_messages=True) # Primary Bus
-BUS2 = can.Bus(interface='socketcan', channel='vcan0', bitrate=125000, receive_own_messages=True) # Secondary Bus for validating responses
+NETWORK = SimulatedNetwork()
+BUS = NETWORK.bus(receive_own_messages=True) # Primary Bus
+BUS2 = NETWORK.bus(receive_own_messages=True) # Secondary Bus for validating responses
 MSGS = [] # List of all messages received
 can.Notifier(BUS2, [MSGS.append])
 NODE = pyolcb.Node(pyolcb.Address(TEST_ADDRESS), pyolcb.Interface(BUS))
@@ -17,7 +18,8 @@ def test_initialize_node():
     """
     Test the :class:`Node` initialization message.
     """
-    time.sleep(1)
+    NODE.initialized.result(2)
+    NETWORK.wait_idle()
     assert MSGS[-1].data == bytearray(pyolcb.utilities.process_bytes(6, TEST_ADDRESS))
     assert MSGS[-1].arbitration_id == pyolcb.message_types.Initialization_Complete.get_can_header(NODE.address)
 
@@ -33,7 +35,7 @@ def test_produce_consume_event():
 
     NODE.add_consumer(1, event_processor)
     NODE.produce(1)
-    time.sleep(1)
+    NETWORK.wait_idle()
     assert MSGS[-1].data == pyolcb.utilities.process_bytes(8, TEST_ADDRESS+'.00.02')
     
 
@@ -42,7 +44,7 @@ def test_verify_node_id_global():
     Test the :class:`Node` global verify node ID message.
     """
     NODE.verify_node_id()
-    time.sleep(1)
+    NETWORK.wait_idle()
     assert MSGS[-2].data == bytearray(
         pyolcb.utilities.process_bytes(6, NODE.address.full))
     assert MSGS[-2].arbitration_id == pyolcb.message_types.Verify_Node_ID_Number_Global.get_can_header(NODE.address)
@@ -55,13 +57,22 @@ def test_verify_node_id_addressed():
     test_addr = pyolcb.Address(TEST_OTHER_ADDRESS)
     test_addr.set_alias(TEST_OTHER_ADDRESS[-4:])
     NODE.verify_node_id(test_addr)
-    time.sleep(1)
+    NETWORK.wait_idle()
     assert MSGS[-1].data == bytearray(
         pyolcb.utilities.process_bytes(2, TEST_OTHER_ADDRESS[-4:]))
     assert MSGS[-1].arbitration_id == pyolcb.message_types.Verify_Node_ID_Number_Addressed.get_can_header(NODE.address)
 
-    
-
-
-        
 
+def test_register_message_handler():
+    """
+    Test dispatching a message type to a registered handler.
+    """
+    received = []
+    NODE.register_message_handler(pyolcb.message_types.Identify_Producer, received.append)
+    other = pyolcb.Address(TEST_OTHER_ADDRESS, 0xC01)
+    BUS2.send(can.Message(arbitration_id=pyolcb.message_types.Identify_Producer.get_can_header(other),
+                          data=pyolcb.utilities.process_bytes(8, TEST_ADDRESS+'.00.01'), is_extended_id=True))
+    NETWORK.wait_idle()
+    NODE.remove_message_handler(pyolcb.message_types.Identify_Producer)
+    assert received[-1].message_type == pyolcb.message_types.Identify_Producer
+    assert received[-1].source.get_alias() == 0xC01
@@ -0,0 +1,28 @@
+import pytest
+from pyolcb.request_pool import PendingRequest, RequestPool
+
+
+def test_request_pool():
+    """
+    Test the concurrency limit, duplicate requests, a failing store, late replies and timeouts.
+    """
+    sent = []
+    pool = RequestPool(sent.append, max_concurrent=2, timeout=0.2, timeout_message="No reply")
+    requests = [pool.submit(i, lambda i=i: PendingRequest(i)) for i in range(3)]
+    assert pool.submit(0, lambda: PendingRequest(0)) is requests[0]
+    assert sent == requests[:2] and len(pool) == 3
+
+    def store(request, result):
+        raise ValueError("Bad reply")
+
+    with pytest.raises(ValueError):
+        pool.complete(requests[0], 'reply', store=store)
+    assert isinstance(requests[0].future.exception(), ValueError)
+    assert sent == requests and pool.get(0) is None
+
+    pool.complete(requests[1], 'reply')
+    pool.complete(requests[1], 'late reply')
+    assert requests[1].future.result() == 'reply'
+    with pytest.raises(TimeoutError, match="No reply"):
+        requests[2].future.result(2)
+    assert len(pool) == 0 and pool._active == 0
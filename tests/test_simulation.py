@@ -0,0 +1,74 @@
+import time
+import can
+import pyolcb
+from pyolcb.simulation import SimulatedNetwork, VirtualClock, frame_bits
+
+
+def frame(header: int, data: bytes = b'') -> can.Message:
+    return can.Message(arbitration_id=header, data=data, is_extended_id=True)
+
+
+def test_arbitration_and_timing():
+    """
+    Test that held frames are sent lowest header first, timestamped by a virtual clock at the bus bitrate.
+    """
+    clock = VirtualClock()
+    network = SimulatedNetwork(bitrate=125000, clock=clock)
+    sender, receiver = network.bus(), network.bus()
+    network.pause()
+    for header in (0x19490003, 0x195B4001, 0x19170002):
+        sender.send(frame(header, bytes(8)))
+    assert network.pending == 3 and receiver.recv(0) is None
+    network.resume()
+    received = [receiver.recv(0) for _ in range(3)]
+    assert [x.arbitration_id for x in received] == [0x19170002, 0x19490003, 0x195B4001]
+    assert received[-1].timestamp == clock() == 3 * frame_bits(received[0]) / 125000
+    assert sender.recv(0) is None
+
+
+def test_faults():
+    """
+    Test seeded random drops and duplicates, and fault functions.
+    """
+    counts = []
+    for _ in range(2):
+        network = SimulatedNetwork(seed=1, drop_rate=0.2, duplicate_rate=0.1)
+        sender, receiver = network.bus(), network.bus()
+        for i in range(100):
+            sender.send(frame(0x19490000 | i))
+        received = []
+        while (x := receiver.recv(0)) is not None:
+            received.append(x.arbitration_id)
+        assert len(received) == 100 - network.frames_dropped + network.frames_duplicated
+        counts.append(received)
+    assert counts[0] == counts[1] and 0 < network.frames_dropped < 40
+
+    network.clear_faults()
+    network.add_fault(lambda x: 0 if x.arbitration_id & 1 else None)
+    for i in range(4):
+        sender.send(frame(0x19490000 | i))
+    assert [receiver.recv(0).arbitration_id for _ in range(2)] == [0x19490000, 0x19490002]
+
+
+def test_simulated_nodes():
+    """
+    Test reserving aliases for a thousand nodes, and recovering from an injected alias collision.
+    """
+    network = SimulatedNetwork()
+    interfaces = [pyolcb.Interface(network.bus()) for _ in range(4)]
+    start = time.perf_counter()
+    nodes = [pyolcb.Node(pyolcb.Address(0x050101019000 + i), interfaces[i % 4]) for i in range(1000)]
+    aliases = [node.initialized.result(5) for node in nodes]
+    assert network.wait_idle()
+    assert time.perf_counter() - start < 5
+    assert len(set(aliases)) == 1000
+
+    node = nodes[0]
+    network.collide_alias(node.get_alias())
+    assert network.wait_idle()
+    alias = node.alias_reservation.future.result(2)
+    assert network.wait_idle()
+    assert node.get_alias() == alias != aliases[0]
+    for interface in interfaces:
+        interface.stop()
+        interface.connection.shutdown()
@@ -0,0 +1,54 @@
+import time
+import can
+import pyolcb
+from pyolcb.snip import SNIPClient, SNIPRecord
+
+
+def test_snip_record():
+    """
+    Test encoding and decoding Simple Node Information, including strings longer than allowed.
+    """
+    record = SNIPRecord('Example', 'IO-16', '1.0', '2.3', 'Yard throat', 'Ñ' * 40)
+    data = record.encode()
+    assert data[0] == 4 and data.count(0) == 6 and len(data) <= 253
+    decoded = SNIPRecord.from_bytes(data)
+    assert decoded.identity == ('Example', 'IO-16', '2.3')
+    assert decoded.user_name == 'Yard throat' and decoded.user_description == 'Ñ' * 31
+    assert SNIPRecord.from_bytes(data[:data.index(b'2.3') + 4]) == SNIPRecord('Example', 'IO-16', '1.0', '2.3')
+
+
+def test_scan_network():
+    """
+    Test a network inventory: concurrent requests, cached replies, invalidation and timeouts.
+    """
+    channel = 'test_scan_network'
+    bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.B0', 0xCB0), interface)
+    remote_buses = [can.Bus(interface='virtual', channel=channel) for _ in range(6)]
+    remote_interfaces = [pyolcb.Interface(x) for x in remote_buses]
+    remotes = [pyolcb.Node(pyolcb.Address(0x050101018CB1 + i, 0xCB1 + i), x) for i, x in enumerate(remote_interfaces)]
+    for i, remote in enumerate(remotes[:5]):
+        remote.set_snip(SNIPRecord('Example', 'IO-16', '1.0', '2.3', 'Node %d' % i))
+
+    client = SNIPClient(node, max_concurrent=2, timeout=0.5)
+    inventory = client.scan_network(0.2).result(5)
+    assert set(inventory) == {remote.address.get_full_address() for remote in remotes}
+    assert [inventory[x.address.get_full_address()].user_name for x in remotes[:5]] == ['Node %d' % i
+                                                                                          for i in range(5)]
+    assert inventory[remotes[5].address.get_full_address()] is None
+
+    assert client.request(remotes[0].address).result(1).user_name == 'Node 0'
+    assert client.cache_hits == 1
+    remotes[0].set_snip(SNIPRecord(user_name='Renamed'))
+    remotes[0]._send_initialization_complete()
+    deadline = time.monotonic() + 2
+    while remotes[0].get_alias() in client._cache and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.request(remotes[0].address).result(2).user_name == 'Renamed'
+    assert client.cache_hits == 1
+
+    for x in [interface] + remote_interfaces:
+        x.stop()
+    for x in [bus] + remote_buses:
+        x.shutdown()
@@ -0,0 +1,75 @@
+import io
+import time
+import can
+import pytest
+import pyolcb
+
+
+def nodes(channel: str):
+    buses = [can.Bus(interface='virtual', channel=channel) for _ in range(2)]
+    interfaces = [pyolcb.Interface(bus) for bus in buses]
+    sender = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.20', 0xC20), interfaces[0])
+    receiver = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.21', 0xC21), interfaces[1])
+    return sender, receiver, interfaces, buses
+
+
+def close(interfaces, buses):
+    for interface, bus in zip(interfaces, buses):
+        interface.stop()
+        bus.shutdown()
+
+
+def test_stream_transfer():
+    """
+    Test sending a buffer and a file-like object as streams, with flow control across several windows.
+    """
+    sender, receiver, interfaces, buses = nodes('test_stream_transfer')
+    incoming = []
+
+    def accept(stream):
+        incoming.append(stream)
+        return bytearray() if len(incoming) == 1 else io.BytesIO()
+
+    receiver.set_stream_handler(accept)
+    data = bytes(i % 251 for i in range(5000))
+    stream = sender.send_stream(data, receiver.address, buffer_size=512)
+    assert stream.future.result(5) is stream
+    assert incoming[0].future.result(2) == data
+    assert incoming[0].buffer_size == 512
+    assert stream.bytes_transferred == len(data)
+    assert stream.throughput > 0
+
+    stream = sender.send_stream(io.BytesIO(data[:1500]), receiver.address)
+    stream.future.result(5)
+    assert incoming[1].future.result(2).getvalue() == data[:1500]
+    close(interfaces, buses)
+
+
+def test_stream_rejected():
+    """
+    Test that a stream is rejected when no handler accepts it.
+    """
+    sender, receiver, interfaces, buses = nodes('test_stream_rejected')
+    stream = sender.send_stream(bytes(100), receiver.address)
+    with pytest.raises(Exception, match='rejected'):
+        stream.future.result(2)
+    with pytest.raises(TimeoutError):
+        sender.send_stream(bytes(100), pyolcb.Address(alias=0xC22), timeout=0.2).future.result(2)
+    close(interfaces, buses)
+
+
+def test_stream_malformed_request():
+    """
+    Test that a Stream Initiate Request too short to be valid is rejected instead of raising.
+    """
+    sender, receiver, interfaces, buses = nodes('test_stream_malformed_request')
+    replies = []
+    sender.register_message_handler(pyolcb.message_types.Stream_Initiate_Reply, replies.append)
+    receiver.set_stream_handler(lambda stream: bytearray())
+    receiver.process_message(pyolcb.Message(pyolcb.message_types.Stream_Initiate_Request, bytes([0x0C, 0x21, 0x02]),
+                                            sender.address, receiver.address))
+    deadline = time.monotonic() + 2
+    while not replies and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(replies) == 1 and int.from_bytes(replies[0].data[4:6], 'big') == 0x1080
+    close(interfaces, buses)
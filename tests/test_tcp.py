@@ -0,0 +1,109 @@
+import socket
+import threading
+import time
+import can
+import pyolcb
+from pyolcb.tcp import BinaryCodec
+
+TEST_ADDRESS = '05.01.01.01.8C.00'
+TEST_OTHER_ADDRESS = '05.01.01.01.8C.01'
+
+
+class Hub:
+    """
+    Loopback hub relaying everything received from each client to every other client.
+    """
+
+    def __init__(self, port: int = 0):
+        self.server = socket.create_server(('127.0.0.1', port))
+        self.port = self.server.getsockname()[1]
+        self.clients = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.clients.append(client)
+            threading.Thread(target=self.relay, args=(client,), daemon=True).start()
+
+    def relay(self, client: socket.socket):
+        while True:
+            try:
+                data = client.recv(4096)
+            except OSError:
+                data = b''
+            if not data:
+                with self.lock:
+                    if client in self.clients:
+                        self.clients.remove(client)
+                return
+            with self.lock:
+                for other in self.clients:
+                    if other is not client:
+                        other.sendall(data)
+
+    def drop_clients(self):
+        with self.lock:
+            for client in self.clients:
+                client.shutdown(socket.SHUT_RDWR)
+                client.close()
+            self.clients = []
+
+    def close(self):
+        self.server.close()
+        self.drop_clients()
+
+
+def wait_for(condition: callable, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_binary_decoder_partial_reads():
+    """
+    Test decoding frames split across reads.
+    """
+    codec = BinaryCodec()
+    frames = [can.Message(arbitration_id=0x19490C00 + i, data=bytes([i] * (i % 9)), is_extended_id=True) for i in range(20)]
+    data = b''.join(codec.encode_many(frames))
+    decoder = codec.decoder()
+    decoded = []
+    for i in range(0, len(data), 7):
+        decoded += decoder.feed(data[i:i + 7])
+    assert [(x.arbitration_id, bytes(x.data)) for x in decoded] == [(x.arbitration_id, bytes(x.data)) for x in frames]
+
+
+def test_tcp_interface():
+    """
+    Test exchanging messages between two nodes over a TCP hub, including after the hub drops the connections.
+    """
+    hub = Hub()
+    interface = pyolcb.Interface(('127.0.0.1', hub.port))
+    other_interface = pyolcb.Interface(('127.0.0.1', hub.port))
+    node = pyolcb.Node(pyolcb.Address(TEST_ADDRESS, 0xC00), interface)
+    received = []
+    other = pyolcb.Node(pyolcb.Address(TEST_OTHER_ADDRESS, 0xC01), other_interface)
+    other.add_consumer(pyolcb.Event(TEST_ADDRESS + '.00.01'), received.append)
+
+    assert wait_for(lambda: len(hub.clients) == 2)
+    node.produce(1)
+    assert wait_for(lambda: len(received) == 1)
+
+    hub.drop_clients()
+    assert wait_for(lambda: len(hub.clients) == 2 and interface.connection.is_connected())
+    node.produce(1)
+    assert wait_for(lambda: len(received) == 2)
+    assert received[-1].source.get_alias() == 0xC00
+
+    interface.stop()
+    other_interface.stop()
+    hub.close()
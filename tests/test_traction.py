@@ -0,0 +1,64 @@
+import time
+import can
+import pyolcb
+from pyolcb.traction import Throttle, TrainNode, encode_speed, decode_speed
+
+
+def wait_for(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_speed_encoding():
+    """
+    Test half-precision speeds, with the direction in the sign bit.
+    """
+    assert encode_speed(0, True) == b'\x80\x00'
+    assert decode_speed(encode_speed(12.5, True)) == (12.5, True)
+    assert decode_speed(encode_speed(3.0)) == (3.0, False)
+
+
+def test_throttle():
+    """
+    Test driving a train: assignment, coalesced speed and function updates, queries and emergency stop.
+    """
+    channel = 'test_throttle'
+    bus = can.Bus(interface='virtual', channel=channel)
+    train_bus = can.Bus(interface='virtual', channel=channel)
+    interface = pyolcb.Interface(bus)
+    train_interface = pyolcb.Interface(train_bus)
+    node = pyolcb.Node(pyolcb.Address('05.01.01.01.8C.D0', 0xCD0), interface)
+    train = TrainNode(pyolcb.Address('05.01.01.01.8C.D1', 0xCD1), train_interface)
+    assert pyolcb.protocols.Protocol.TRAIN_CONTROL in train.supported_protocols
+    changes = []
+    train.set_train_handler(lambda x: changes.append(x.speed))
+
+    throttle = Throttle(node, min_interval=0.1)
+    assert throttle.assign(train.address).result(2) is True
+    assert wait_for(lambda: train.controller == node.address.get_full_address())
+
+    for i in range(100):
+        throttle.set_speed(train.address, i / 10)
+    for i in range(10):
+        throttle.set_function(train.address, 0, i % 2)
+    throttle.set_function(train.address, 1, 1)
+    assert wait_for(lambda: train.speed == 9.8984375 and train.functions == {0: 1, 1: 1})
+    assert throttle.commands_sent <= 4
+    assert throttle.commands_sent + throttle.commands_coalesced == 111
+    assert len(changes) < 10
+
+    throttle.set_speed(train.address, 2, reverse=True)
+    throttle.flush()
+    assert throttle.query_speed(train.address).result(2) == (2, True)
+    assert throttle.query_function(train.address, 1).result(2) == 1
+    throttle.emergency_stop(train.address)
+    assert wait_for(lambda: train.emergency_stopped and train.speed == 0)
+
+    throttle.release(train.address)
+    assert wait_for(lambda: train.controller is None)
+    interface.stop()
+    train_interface.stop()
+    bus.shutdown()
+    train_bus.shutdown()
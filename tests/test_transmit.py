@@ -0,0 +1,89 @@
+import threading
+import can
+import pytest
+import pyolcb
+from pyolcb.transmit import TransmitQueue, OverflowPolicy
+from pyolcb.exceptions import TransmitQueueFull, TransmitQueueClosed
+
+SOURCE = pyolcb.Address('05.01.01.01.8C.00', 0xC00)
+DESTINATION = pyolcb.Address('05.01.01.01.8C.01', 0xC01)
+
+
+def frame(message_type, frame_id=None) -> can.Message:
+    header = message_type.get_can_header(SOURCE, DESTINATION, frame_id)
+    return can.Message(arbitration_id=header, data=bytes(2), is_extended_id=True)
+
+
+class BlockedWriter:
+    def __init__(self):
+        self.written = []
+        self.release = threading.Event()
+
+    def __call__(self, frames: list[can.Message]):
+        self.release.wait(5)
+        self.written += [x.arbitration_id for x in frames]
+
+
+def test_priority_order():
+    """
+    Test that queued frames are written in priority order, with batches kept together.
+    """
+    writer = BlockedWriter()
+    queue = TransmitQueue()
+    datagram = [frame(pyolcb.message_types.Datagram, i) for i in (1, 2, -1)]
+    queue.put(datagram)
+    first = queue.put(frame(pyolcb.message_types.Producer_Consumer_Event_Report))
+    queue.put(frame(pyolcb.message_types.Verify_Node_ID_Number_Global))
+    writer.release.set()
+    queue.start(writer)
+    assert queue.flush(5)
+    assert first.result() == 1
+    assert writer.written == [
+        pyolcb.message_types.Verify_Node_ID_Number_Global.get_can_header(SOURCE),
+        pyolcb.message_types.Producer_Consumer_Event_Report.get_can_header(SOURCE),
+    ] + [x.arbitration_id for x in datagram]
+    queue.close()
+
+
+def test_overflow_policies():
+    """
+    Test dropping frames once the queue is full.
+    """
+    writer = BlockedWriter()
+    queue = TransmitQueue(max_frames=2, overflow=OverflowPolicy.DROP_NEW)
+    queue.start(writer)
+    queue.put(frame(pyolcb.message_types.Datagram, 1))
+    queue.put(frame(pyolcb.message_types.Datagram, -1))
+    with pytest.raises(TransmitQueueFull):
+        queue.put(frame(pyolcb.message_types.Producer_Consumer_Event_Report)).result(1)
+
+    queue.overflow = OverflowPolicy.DROP_LOWEST_PRIORITY
+    assert not queue.put(frame(pyolcb.message_types.Producer_Consumer_Event_Report)).done()
+    assert queue.dropped >= 2
+    writer.release.set()
+    assert queue.flush(5)
+    assert pyolcb.message_types.Producer_Consumer_Event_Report.get_can_header(SOURCE) in writer.written
+    queue.close()
+
+
+def test_non_blocking_send_and_closed_queue():
+    """
+    Test that senders can skip waiting on a full queue, and that frames queued after closing fail.
+    """
+    writer = BlockedWriter()
+    # Room for Initialization Complete and one more frame
+    queue = TransmitQueue(max_frames=2, block_timeout=None)
+    bus = can.Bus(interface='virtual', channel='test_non_blocking_send')
+    interface = pyolcb.Interface(bus, transmit_queue=queue)
+    queue.start(writer)
+    node = pyolcb.Node(SOURCE, interface)
+    node.send(pyolcb.Message(pyolcb.message_types.Verify_Node_ID_Number_Global, b'', SOURCE))
+    [future] = node.send(pyolcb.Message(pyolcb.message_types.Verify_Node_ID_Number_Global, b'', SOURCE), block=False)
+    with pytest.raises(TransmitQueueFull):
+        future.result(0)
+
+    writer.release.set()
+    interface.stop()
+    with pytest.raises(TransmitQueueClosed):
+        interface.send_frames([frame(pyolcb.message_types.Producer_Consumer_Event_Report)]).result(1)
+    bus.shutdown()